@@ -1,6 +1,11 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 from PyInstaller.utils.hooks import collect_all
 
+# Bản khởi động nhanh: WMP_FAST_START=1 pyinstaller "Window Manager Pro.spec"
+# Build dạng thư mục (onedir), không nén UPX: mỗi lần mở không phải giải nén vào thư mục tạm
+FAST_START = os.environ.get("WMP_FAST_START") == "1"
+
 datas = []
 binaries = []
 hiddenimports = []
@@ -17,25 +22,19 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['PIL'],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
+exe_options = dict(
     name='Window Manager Pro',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=not FAST_START,
     upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -43,3 +42,31 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+if FAST_START:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        **exe_options,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='Window Manager Pro',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        runtime_tmpdir=None,
+        **exe_options,
+    )
@@ -0,0 +1,957 @@
+"""
+Benchmark hiệu năng cho Window Manager
+Chạy được trên Linux không có desktop nhờ backend cửa sổ giả lập
+
+Cách dùng:
+  python benchmark.py                 - Chạy tất cả benchmark
+  python benchmark.py supervisor      - Chỉ chạy benchmark được chọn
+  python benchmark.py startup         - Thời gian khởi động lạnh (import, list, khung hình đầu GUI)
+  python benchmark.py scaling --save-baseline   - Lưu kết quả làm baseline
+  python benchmark.py scaling [--threshold 0.25] [--baseline file]
+                                      - So với baseline, thoát mã 1 nếu chậm hơn quá ngưỡng
+"""
+
+import bisect
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from layout_columns import ColumnarLayout
+from window_apply import ConcurrentApplier, PlannedMove, apply_layout
+from window_backends import SimulatedBackend, WindowBackend
+from window_events import EVENT_RESIZE, WindowEvent, WindowEventSource
+from window_layout import LayoutPlanner
+from window_manager import WindowManager, WindowInfo, _parse_options
+from window_oscillation import OscillationPolicy
+from window_scheduler import AdaptiveScheduler
+from window_supervisor import MonitorSupervisor, PatternSettings
+
+
+class _TwoCallBackend(SimulatedBackend):
+    """Backend giả lập chỉ có moveTo + resizeTo (2 lệnh mỗi cửa sổ)"""
+
+    set_geometry = WindowBackend.set_geometry
+
+
+def _make_manager(backend):
+    config = os.path.join(tempfile.mkdtemp(prefix="wm_bench_"), "window_positions.json")
+    with contextlib.redirect_stdout(io.StringIO()):
+        return WindowManager(config, backend=backend)
+
+
+def bench_supervisor(windows_per_pattern: int = 8, background: int = 200, ticks: int = 20):
+    """So sánh một monitor mỗi pattern với supervisor dùng chung snapshot"""
+    print("\n== Giám sát nhiều pattern: một monitor/pattern vs supervisor ==")
+    print(f"{'patterns':>9} {'enum/tick (riêng)':>18} {'ms/tick (riêng)':>16} "
+          f"{'enum/tick (chung)':>18} {'ms/tick (chung)':>16}")
+
+    for n_patterns in (1, 2, 4, 8, 16, 32):
+        # Mỗi lần liệt kê tốn 2µs/cửa sổ, mô phỏng lệnh gọi sang tiến trình khác
+        backend = SimulatedBackend(enumerate_latency=2e-6)
+        for i in range(background):
+            backend.add_window(f"Background {i}", i, i, 100, 100)
+        manager = _make_manager(backend)
+        patterns = [f"Client {p:02d}" for p in range(n_patterns)]
+        for p in patterns:
+            slots = []
+            for i in range(windows_per_pattern):
+                backend.add_window(f"{p} #{i}", i * 100, 0, 100, 100)
+                slots.append(WindowInfo(p, i, i * 100, 0, 100, 100, 0.0))
+            manager.set_layout(p, slots)
+
+        states = {p: {"last_count": 0} for p in patterns}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Lượt đầu gán slot cho các cửa sổ, không tính vào kết quả
+            for p in patterns:
+                manager._check_windows(p, 10, states[p])
+            backend.enumerations = 0
+            start = time.perf_counter()
+            for _ in range(ticks):
+                for p in patterns:
+                    manager._check_windows(p, 10, states[p])
+            separate = (time.perf_counter() - start) / ticks
+            separate_enum = backend.enumerations / ticks
+
+            supervisor = MonitorSupervisor(manager, patterns, default=PatternSettings(interval=0.0))
+            supervisor.tick()
+            backend.enumerations = 0
+            start = time.perf_counter()
+            for _ in range(ticks):
+                supervisor.tick()
+            shared = (time.perf_counter() - start) / ticks
+            shared_enum = backend.enumerations / ticks
+
+        print(f"{n_patterns:>9} {separate_enum:>18.1f} {separate * 1000:>16.2f} "
+              f"{shared_enum:>18.1f} {shared * 1000:>16.2f}")
+
+
+def bench_assignment(slots_count: int = 16, repeats: int = 200):
+    """Số cửa sổ phải di chuyển: ghép theo thứ tự sắp xếp vs ghép dịch chuyển nhỏ nhất"""
+    print("\n== Ghép cửa sổ vào slot: theo thứ tự vs dịch chuyển nhỏ nhất ==")
+    cols = 4
+    # Slot được lưu theo thứ tự (x, y) giống capture_windows
+    slots = sorted(((i % cols) * 480, (i // cols) * 270, 488, 278) for i in range(slots_count))
+
+    scenarios = {
+        "đóng 1 cửa sổ": [s for i, s in enumerate(slots) if i != 1],
+        "1 cửa sổ lệch 15px": [
+            (x + 15, y + 15, w, h) if i == 5 else (x, y, w, h) for i, (x, y, w, h) in enumerate(slots)
+        ],
+        "đóng 2, lệch 1": [
+            (x + 30, y, w, h) if i == 9 else (x, y, w, h)
+            for i, (x, y, w, h) in enumerate(slots) if i not in (0, 7)
+        ],
+    }
+
+    print(f"{'kịch bản':<22} {'moves (thứ tự)':>15} {'moves (tối ưu)':>15} {'µs/plan':>9} {'µs/plan (cache)':>16}")
+    for name, current in scenarios.items():
+        ordered = sorted(current, key=lambda r: (r[0], r[1]))
+        naive_moves = sum(1 for idx, rect in enumerate(ordered) if idx < len(slots) and rect != slots[idx])
+
+        planner = LayoutPlanner()
+        assignment = planner.plan(ordered, slots)
+        optimal_moves = sum(1 for rect, slot in zip(ordered, assignment)
+                            if slot is not None and rect != slots[slot])
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            planner.clear()
+            planner.plan(ordered, slots)
+        cold = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            planner.plan(ordered, slots)
+        warm = (time.perf_counter() - start) / repeats
+
+        print(f"{name:<22} {naive_moves:>15} {optimal_moves:>15} {cold * 1e6:>9.1f} {warm * 1e6:>16.1f}")
+
+
+def bench_apply(n_windows: int = 100, drifted: int = 10):
+    """Số lệnh gọi khi áp dụng layout: cách cũ vs bỏ qua no-op + lệnh gộp + batch"""
+    print(f"\n== Áp dụng layout: {n_windows} cửa sổ, {drifted} bị lệch ==")
+    print(f"{'cách áp dụng':<28} {'lệnh gọi':>9} {'bỏ qua':>7}")
+
+    def make_moves(backend):
+        windows = [backend.add_window(f"Client #{i}", i * 10, 0, 100, 100) for i in range(n_windows)]
+        for window in windows[:drifted]:
+            window.left += 25
+        return [
+            PlannedMove(w, (w.left, w.top, w.width, w.height), (i * 10, 0, 100, 100), i, i)
+            for i, w in enumerate(windows)
+        ]
+
+    # Cách cũ: moveTo + resizeTo cho mọi cửa sổ
+    print(f"{'moveTo + resizeTo (cũ)':<28} {2 * n_windows:>9} {0:>7}")
+    for name, backend in (
+        ("bỏ qua no-op, 2 lệnh", _TwoCallBackend()),
+        ("bỏ qua no-op, lệnh gộp", SimulatedBackend()),
+        ("bỏ qua no-op, batch", SimulatedBackend(batch=True)),
+    ):
+        result = apply_layout(backend, make_moves(backend))
+        print(f"{name:<28} {result.calls:>9} {len(result.skipped):>7}")
+
+
+def bench_concurrent(sizes=(8, 32, 128), call_latency: float = 0.02, workers: int = 16):
+    """Thời gian một lượt áp dụng với cửa sổ chậm/treo: lần lượt vs pool worker có hạn chót"""
+    print(f"\n== Áp dụng song song (mỗi lệnh {call_latency * 1000:g}ms, {workers} worker) ==")
+    print(f"{'số cửa sổ':>10} {'lần lượt (ms)':>14} {'song song (ms)':>15} {'ceil(n/worker) lệnh (ms)':>25}")
+
+    def make_moves(windows):
+        return [PlannedMove(w, (w.left, w.top, w.width, w.height),
+                            (w.left + 100, w.top, w.width, w.height), i)
+                for i, w in enumerate(windows)]
+
+    for n in sizes:
+        backend = SimulatedBackend(call_latency=call_latency)
+        windows = backend.add_grid("Client", n)
+        start = time.perf_counter()
+        apply_layout(backend, make_moves(windows))
+        serial = time.perf_counter() - start
+        start = time.perf_counter()
+        ConcurrentApplier(max_workers=workers).apply(backend, make_moves(windows))
+        concurrent = time.perf_counter() - start
+        waves = -(-n // workers)  # Song song vẫn tăng theo số đợt lệnh
+        print(f"{n:>10} {serial * 1000:>14.1f} {concurrent * 1000:>15.1f} {waves * call_latency * 1000:>25.1f}")
+
+    # Một cửa sổ bị treo: lượt đầu chờ hết hạn chót, các lượt sau bỏ qua cửa sổ đang cách ly
+    backend = SimulatedBackend(call_latency=call_latency)
+    windows = backend.add_grid("Client", sizes[-1])
+    backend.hang(windows[0])
+    applier = ConcurrentApplier(max_workers=workers, timeout=0.5)
+    for label in ("lượt đầu", "lượt sau"):
+        start = time.perf_counter()
+        result = applier.apply(backend, make_moves(windows))
+        print(f"1 cửa sổ treo, {label}: {(time.perf_counter() - start) * 1000:.1f} ms - {result.summary()}")
+    backend.release()
+
+
+def bench_columnar(sizes=(1000, 10000, 50000), patterns: int = 50, tolerance: int = 10, repeats: int = 20):
+    """
+    Bộ nhớ và tốc độ kiểm tra lệch: danh sách WindowInfo vs layout dạng cột
+
+    Khung mới = dựng và ghi lại toàn bộ khung (lượt đầu); khung giữ = lượt tiếp
+    theo trên khung giữ qua các lượt như monitor, 1% cửa sổ đổi hình học
+    """
+    print(f"\n== Layout dạng cột ({patterns} pattern, sai số {tolerance}px) ==")
+    print(f"{'số slot':>8} {'bộ nhớ list (KB)':>17} {'bộ nhớ cột (KB)':>16} "
+          f"{'lệch list (ms)':>15} {'khung mới (ms)':>15} {'khung giữ (ms)':>15} {'JSON (ms)':>10}")
+    for n in sizes:
+        per_pattern = n // patterns
+
+        tracemalloc.start()
+        windows_data = {
+            f"Client {p}": [WindowInfo(f"Client {p}", i, (i % 10) * 472, (i // 10) * 262, 480, 270, 0.0)
+                            for i in range(per_pattern)]
+            for p in range(patterns)
+        }
+        list_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        columns = ColumnarLayout.from_windows(windows_data)
+        column_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # 2% cửa sổ bị lệch 50px; giữa hai lượt liên tiếp 1% cửa sổ đổi hình học
+        ticks = []
+        for shift in (0, 5):
+            observed = {}
+            for pattern, windows in windows_data.items():
+                observed[pattern] = [
+                    (w.x + (50 if i % 50 == 0 else 0) + (shift if i % 100 == 1 else 0), w.y, w.width, w.height)
+                    for i, w in enumerate(windows)
+                ]
+            ticks.append(observed)
+
+        def drift_lists(observed):
+            drifted = []
+            for pattern, windows in windows_data.items():
+                for slot, (w, rect) in enumerate(zip(windows, observed[pattern])):
+                    if (abs(rect[0] - w.x) > tolerance or abs(rect[1] - w.y) > tolerance or
+                            abs(rect[2] - w.width) > tolerance or abs(rect[3] - w.height) > tolerance):
+                        drifted.append((pattern, slot))
+            return drifted
+
+        def drift_frame(frame, observed):
+            for pattern, current in observed.items():
+                frame.put(pattern, current, tolerance)
+            return frame.drift()
+
+        kept = columns.frame()
+        drift_frame(kept, ticks[1])
+        assert len(drift_lists(ticks[0])) == len(drift_frame(kept, ticks[0])) == \
+            len(drift_frame(columns.frame(), ticks[0]))
+        timings = []
+        for operation in (drift_lists,
+                          lambda observed: drift_frame(columns.frame(), observed),
+                          lambda observed: drift_frame(kept, observed)):
+            start = time.perf_counter()
+            for r in range(repeats):
+                operation(ticks[r % 2])
+            timings.append((time.perf_counter() - start) / repeats)
+
+        start = time.perf_counter()
+        data = json.loads(json.dumps(columns.to_dict()))
+        assert ColumnarLayout.from_dict(data).to_dict() == data
+        round_trip = time.perf_counter() - start
+
+        print(f"{n:>8} {list_bytes / 1024:>17.0f} {column_bytes / 1024:>16.0f} "
+              f"{timings[0] * 1000:>15.2f} {timings[1] * 1000:>15.2f} {timings[2] * 1000:>15.2f} "
+              f"{round_trip * 1000:>10.1f}")
+
+
+def bench_selectors(sizes=(500, 2000, 10000), patterns: int = 20, changed: float = 0.01, ticks: int = 50):
+    """Chi phí phân cửa sổ về pattern mỗi lượt: lowercase mọi tiêu đề vs bộ chọn nhớ theo handle"""
+    from window_selectors import SelectorGroup
+
+    print(f"\n== Khớp tiêu đề ({patterns} pattern, {changed:.0%} cửa sổ đổi tiêu đề mỗi lượt) ==")
+    print(f"{'số cửa sổ':>10} {'lowercase (ms)':>15} {'bộ chọn nhớ (ms)':>17} {'tính lại/lượt':>14}")
+    for n in sizes:
+        backend = SimulatedBackend(seed=n)
+        for i in range(n):
+            backend.add_window(f"Tab {i} - Client {i % (patterns * 2)} - Browser", 0, 0, 480, 270)
+        windows = backend.get_all_windows()
+        names = [f"Client {p} " for p in range(patterns)]
+        manager = _make_manager(backend)
+        group = SelectorGroup({name: manager.selector(name) for name in names})
+        step = max(1, int(1 / changed))
+
+        def lowercase(tick):
+            lowered = [(p, p.lower()) for p in names]
+            groups = {p: [] for p in names}
+            for window in windows:
+                title = window.title.lower()
+                matched = [p for p, lp in lowered if lp in title]
+                if matched and window.visible:
+                    for p in matched:
+                        groups[p].append(window)
+            return groups
+
+        def cached(tick):
+            return group.group(windows, names)
+
+        timings = []
+        for operation in (lowercase, cached):
+            operation(0)
+            group.hits = group.misses = 0
+            elapsed = 0.0
+            for tick in range(1, ticks + 1):
+                for window in windows[tick % step::step]:
+                    window.title = window.title.replace(" - Browser", f" - Browser ({tick})", 1) \
+                        if "(" not in window.title else window.title.split(" (")[0]
+                start = time.perf_counter()
+                operation(tick)
+                elapsed += time.perf_counter() - start
+            timings.append(elapsed / ticks)
+        recomputed = group.misses / ticks
+        assert {k: len(v) for k, v in lowercase(0).items()} == {k: len(v) for k, v in cached(0).items()}
+        print(f"{n:>10} {timings[0] * 1000:>15.3f} {timings[1] * 1000:>17.3f} {recomputed:>14.0f}")
+
+
+def bench_async(patterns=(10, 50), interval: float = 0.05, duration: float = 1.0):
+    """Nhiều monitor trên một event loop: số thread, số lần kiểm tra/giây, độ trễ sửa"""
+    import asyncio
+    import threading
+
+    from window_async import AsyncWindowManager
+
+    print(f"\n== Monitor asyncio (mỗi pattern 4 tab, quét mỗi {interval}s trong {duration:g}s) ==")
+    print(f"{'số pattern':>11} {'thread':>7} {'kiểm tra/giây':>14} {'trễ sửa p50 (ms)':>17}")
+
+    async def run(count):
+        backend = SimulatedBackend(seed=count)
+        groups = {f"Pattern {i:03d}": backend.add_grid(f"Pattern {i:03d} -", 4) for i in range(count)}
+        async with AsyncWindowManager(_make_manager(backend)) as wm:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for pattern in groups:
+                    await wm.capture(pattern)
+                monitors = [wm.monitor(pattern, interval=interval) for pattern in groups]
+                await asyncio.sleep(interval * 3)  # Lượt đầu gán slot
+                threads = threading.active_count()
+                checks = sum(m.checks for m in monitors)
+                drifted = {}
+                latencies = []
+
+                async def collect():
+                    async for change in wm.changes():
+                        if change.pattern in drifted:
+                            latencies.append(time.perf_counter() - drifted.pop(change.pattern))
+
+                collector = asyncio.ensure_future(collect())
+                start = time.perf_counter()
+                for pattern, windows in groups.items():
+                    backend.drift(windows[0], 40)
+                    drifted[pattern] = time.perf_counter()
+                await asyncio.sleep(duration)
+                rate = (sum(m.checks for m in monitors) - checks) / (time.perf_counter() - start)
+                collector.cancel()
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+        print(f"{count:>11} {threads:>7} {rate:>14.0f} {p50:>17.1f}")
+
+    for count in patterns:
+        asyncio.run(run(count))
+
+
+def bench_lifecycle(cycles: int = 200, interval: float = 2.0, captures: int = 200, windows: int = 50):
+    """Kiểm tra sức chịu: bật/tắt monitor liên tục, capture/rearrange trong lúc monitor đang chạy"""
+    import threading
+
+    print(f"\n== Vòng đời monitor (khoảng quét {interval:g}s) ==")
+    backend = SimulatedBackend(seed=19)
+    backend.add_grid("Client", windows, columns=10)
+    manager = _make_manager(backend)
+    baseline_threads = threading.active_count()
+    stop_times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.capture_windows("Client")
+        for _ in range(cycles):
+            manager.start_monitoring("Client", interval=interval)
+            start = time.perf_counter()
+            manager.stop_monitoring()
+            stop_times.append(time.perf_counter() - start)
+        # Bật lại ngay sau khi tắt: chỉ một thread monitor được chạy
+        manager.start_monitoring("Client", interval=interval)
+        manager.stop_monitoring()
+        manager.start_monitoring("Client", interval=interval)
+        monitors = [t for t in threading.enumerate() if t.name == "window-monitor"]
+        manager.stop_monitoring()
+    stop_times.sort()
+    print(f"{cycles} lần bật/tắt: dừng p50 {stop_times[len(stop_times) // 2] * 1000:.2f} ms, "
+          f"tối đa {stop_times[-1] * 1000:.2f} ms; thread monitor khi bật lại: {len(monitors)}, "
+          f"thread còn sót: {max(threading.active_count() - baseline_threads, 0)}")
+
+    # Capture và rearrange liên tục trong lúc monitor quét gần như không nghỉ
+    backend.drift_rate = 0.05
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        manager.start_monitoring("Client", interval=0.001)
+        errors = []
+
+        def hammer(action):
+            try:
+                for _ in range(captures):
+                    action("Client")
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=hammer, args=(action,))
+                   for action in (manager.capture_windows, manager.rearrange_windows)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        manager.stop_monitoring()
+    monitor_errors = output.getvalue().count("Lỗi trong quá trình giám sát")
+    print(f"{captures} capture + {captures} rearrange trong {elapsed:.2f}s khi monitor đang chạy: "
+          f"{len(errors)} lỗi ở thread gọi, {monitor_errors} lỗi trong monitor, "
+          f"{manager.metrics.ticks} lượt monitor")
+
+
+def bench_oscillation(windows: int = 20, minutes: float = 10.0, interval: float = 2.0, drift_rate: float = 0.01):
+    """Cửa sổ chống lại việc sửa (đồng hồ giả lập): số lần sửa khi có/không phát hiện dao động"""
+    print(f"\n== Cửa sổ dao động: {windows} tab, 2 tab tự đổi lại, {minutes:g} phút mô phỏng, "
+          f"quét {interval:g}s ==")
+    print(f"{'phát hiện dao động':<20} {'lượt':>6} {'lần sửa':>8} {'lệnh đặt':>9} {'không giữ':>10} "
+          f"{'dao động':>9} {'tab thường được sửa':>20}")
+
+    def simulate(name, policy):
+        backend = SimulatedBackend(seed=20)
+        tabs = backend.add_grid("Client", windows, columns=5)
+        manager = _make_manager(backend)
+        manager.oscillation = policy
+        clock = [0.0]
+        manager.clock = lambda: clock[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.capture_windows("Client")
+            # Một tab tự đổi lại ở lượt sau, một tab từ chối ngay khi bị đặt
+            backend.fight(tabs[0], (100, 100, 800, 600))
+            backend.fight(tabs[1], (200, 150, 640, 480), immediate=True)
+            backend.drift_rate = drift_rate
+            state = {"last_count": 0}
+            ticks = int(minutes * 60 / interval)
+            calls = backend.calls
+            for _ in range(ticks):
+                manager._check_windows("Client", 10, state)
+                clock[0] += interval
+            calls = backend.calls - calls
+        snap = manager.stats()
+        # Tab thường vẫn được sửa dù các tab dao động được để yên
+        tracker = state["tracker"]
+        off = sum(
+            1 for tab in tabs[2:]
+            if max(abs(a - b) for a, b in zip((tab.left, tab.top, tab.width, tab.height),
+                                               tracker.slots[tracker.assigned[tab.handle]])) > 10
+        )
+        print(f"{name:<20} {snap['ticks']:>6} {snap['corrections']:>8} {calls:>9} "
+              f"{snap['unconverged_moves']:>10} {snap['oscillations']:>9} {windows - 2 - off:>14}/{windows - 2}")
+
+    simulate("tắt", OscillationPolicy(threshold=0))
+    simulate("mặc định", OscillationPolicy())
+    simulate("ngưỡng 2, miễn 60s", OscillationPolicy(threshold=2, backoff=60.0))
+
+
+def bench_gui_tasks(clicks: int = 10, gap: float = 0.02, windows: int = 16, enumerate_latency: float = 0.005):
+    """Bấm Sắp Xếp Lại liên tục: mỗi lần bấm một thread (cách cũ) vs hàng đợi một worker có gộp"""
+    import threading
+    from task_executor import CoalescingExecutor
+
+    print(f"\n== Nút GUI: {clicks} lần bấm Sắp Xếp Lại cách nhau {gap * 1000:.0f} ms, {windows} tab ==")
+    print(f"{'cách chạy':<22} {'lượt sắp xếp':>13} {'chạy chồng tối đa':>18} {'lệnh đặt':>9} {'xong sau (ms)':>14}")
+
+    def simulate(name, submit, wait):
+        # Mỗi lượt tốn ~80 ms để liệt kê, lâu hơn khoảng cách giữa hai lần bấm
+        backend = SimulatedBackend(enumerate_latency=enumerate_latency, seed=21)
+        backend.add_grid("Client", windows, columns=4)
+        manager = _make_manager(backend)
+        passes = [0]
+        active = [0, 0]  # đang chạy, tối đa
+        lock = threading.Lock()
+
+        def rearrange(title):
+            with lock:
+                passes[0] += 1
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            try:
+                manager.rearrange_windows(title)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.capture_windows("Client")
+            for tab in backend.windows.values():
+                backend.drift(tab)
+            calls = backend.calls
+            start = time.perf_counter()
+            for _ in range(clicks):
+                submit(rearrange, "Client")
+                time.sleep(gap)
+            wait()
+            elapsed = time.perf_counter() - start
+        print(f"{name:<22} {passes[0]:>13} {active[1]:>18} {backend.calls - calls:>9} {elapsed * 1000:>14.0f}")
+
+    threads = []
+
+    def spawn(function, title):
+        thread = threading.Thread(target=function, args=(title,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    simulate("thread mỗi lần bấm", spawn, lambda: [t.join() for t in threads])
+    executor = CoalescingExecutor()
+    simulate("hàng đợi có gộp", lambda function, title: executor.submit(("rearrange", title), "sắp xếp",
+                                                                        function, title), executor.join)
+    executor.shutdown()
+
+
+def bench_scheduler(hours: float = 1.0, bursts=(600.0, 1800.0, 3000.0), resize_time: float = 2.0):
+    """Vòng lặp monitor thật trên đồng hồ giả lập: số lần thức dậy/giờ và độ trễ sửa, quét cố định vs thích ứng"""
+    print(f"\n== Lập lịch quét trong {hours:g} giờ mô phỏng, {len(bursts)} lần game tự resize "
+          f"({resize_time:g}s mỗi lần) ==")
+    print(f"{'lịch quét':<26} {'wakeups/giờ':>12} {'sửa giữa chừng':>15} {'trễ sửa TB (s)':>15}")
+
+    def simulate(name, scheduler, fixed_interval=2.0, events=False):
+        backend = SimulatedBackend(seed=6)
+        game = backend.add_grid("Client", 4)[1]
+        manager = _make_manager(backend)
+        clock = [0.0]
+        if scheduler is not None:
+            scheduler.clock = lambda: clock[0]
+        end = hours * 3600
+        finished = set()
+        wakeups = [0]
+        mid_resize = 0
+        latencies = {}  # mốc resize → thời gian từ lúc resize xong đến lần sửa đầu tiên
+        set_geometry = backend.set_geometry
+
+        def timed_set_geometry(window, *rect):
+            nonlocal mid_resize
+            now = clock[0]
+            burst = max((b for b in bursts if b <= now), default=None)
+            if burst is not None:
+                if now < burst + resize_time:
+                    mid_resize += 1  # Sửa khi game vẫn đang resize → sẽ bị game ghi đè
+                else:
+                    latencies.setdefault(burst, now - (burst + resize_time))
+            return set_geometry(window, *rect)
+
+        def sleep(seconds):
+            wakeups[0] += 1
+            clock[0] += seconds
+            now = clock[0]
+            # Game tự resize trong `resize_time` giây sau mỗi mốc, rồi giữ kích thước lệch
+            for burst in bursts:
+                if burst <= now and burst not in finished:
+                    game.width = 500 + int(min(now - burst, resize_time) * 40)
+                    if now >= burst + resize_time:
+                        finished.add(burst)
+            if now >= end:
+                manager.monitoring = False
+
+        class ClockedEvents(WindowEventSource):
+            """Nguồn sự kiện trên đồng hồ giả lập: game phát sự kiện resize mỗi 0.1s khi đang resize"""
+
+            times = sorted(b + i * 0.1 for b in bursts for i in range(int(resize_time * 10) + 1))
+
+            def wait(self, timeout=None):
+                now = clock[0]
+                upcoming = self.times[bisect.bisect_right(self.times, now + 1e-9):][:1]
+                if upcoming and upcoming[0] <= now + timeout:
+                    sleep(upcoming[0] - now)
+                    return [WindowEvent(EVENT_RESIZE, game.handle, upcoming[0])]
+                sleep(timeout)
+                return []
+
+        backend.set_geometry = timed_set_geometry
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.capture_windows("Client")
+            manager.monitoring = True
+            manager.monitor_windows("Client", fixed_interval, tolerance=10, scheduler=scheduler, sleep=sleep,
+                                    event_source=ClockedEvents() if events else None)
+        avg = sum(latencies.values()) / len(latencies) if latencies else float("nan")
+        print(f"{name:<26} {wakeups[0] / hours:>12.0f} {mid_resize:>15} {avg:>15.2f}")
+
+    simulate("cố định 2s", None)
+    simulate("thích ứng 0.25s - 2s", AdaptiveScheduler(min_interval=0.25, max_interval=2.0, settle_time=0.5))
+    simulate("thích ứng 0.25s - 8s", AdaptiveScheduler(min_interval=0.25, max_interval=8.0, settle_time=0.5))
+    simulate("sự kiện + thích ứng", AdaptiveScheduler(min_interval=0.25, max_interval=2.0, settle_time=0.5),
+             fixed_interval=30.0, events=True)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _summarize(samples):
+    total = sum(samples)
+    return {
+        "ops_per_s": len(samples) / total if total else float("inf"),
+        "p50_ms": _percentile(samples, 0.5) * 1000,
+        "p95_ms": _percentile(samples, 0.95) * 1000,
+    }
+
+
+def _measure(operation, repeats: int):
+    """Chạy `operation` nhiều lần, trả về (số lần/giây, p50 ms, p95 ms)"""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            operation()
+            samples.append(time.perf_counter() - start)
+    return _summarize(samples)
+
+
+def bench_scaling(sizes=(10, 100, 1000), call_latency: float = 0.0, drift_rate: float = 0.02):
+    """Thông lượng và độ trễ của capture/restore/rearrange/lượt monitor theo số cửa sổ"""
+    print(f"\n== Khả năng mở rộng (độ trễ mỗi lệnh {call_latency * 1e6:g}µs, "
+          f"tự lệch {drift_rate:.0%}/lượt) ==")
+    print(f"{'thao tác':<22} {'lần/giây':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    results = {}
+    for n in sizes:
+        backend = SimulatedBackend(call_latency=call_latency, seed=n)
+        # Vài cửa sổ không liên quan để bước lọc tiêu đề có việc làm
+        for i in range(n // 10):
+            backend.add_window(f"Other app {i}", 0, 0, 800, 600)
+        windows = backend.add_grid("Client", n, columns=max(int(n ** 0.5), 1))
+        manager = _make_manager(backend)
+        repeats = max(5, min(200, 20000 // n))
+
+        def drift_some():
+            for window in windows:
+                if backend.random.random() < drift_rate:
+                    backend.drift(window)
+
+        def restore():
+            drift_some()
+            manager.restore_windows("Client")
+
+        def rearrange():
+            drift_some()
+            manager.rearrange_windows("Client")
+
+        state = {"last_count": 0}
+
+        def monitor_tick():
+            drift_some()
+            manager._check_windows("Client", 10, state)
+
+        operations = (
+            ("capture", lambda: manager.capture_windows("Client")),
+            ("restore", restore),
+            ("rearrange", rearrange),
+            ("monitor_tick", monitor_tick),
+        )
+        for name, operation in operations:
+            key = f"{name}/{n}"
+            results[key] = _measure(operation, repeats)
+            r = results[key]
+            print(f"{key:<22} {r['ops_per_s']:>10.1f} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f}")
+    return results
+
+
+def bench_tiling(saved: int = 8, counts=(12, 50, 200), ticks: int = 200):
+    """Thời gian sinh lưới (lần đầu vs đã ghi nhớ) và lượt monitor khi số cửa sổ vượt layout đã lưu"""
+    print(f"\n== Lưới tự sinh (layout đã capture {saved} tab) ==")
+    print(f"{'số tab':>8} {'sinh lưới (ms)':>15} {'đã nhớ (µs)':>12} {'lượt monitor (ms)':>18}")
+    for n in counts:
+        backend = SimulatedBackend(seed=n)
+        backend.add_grid("Client", saved)
+        manager = _make_manager(backend)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.capture_windows("Client")
+        backend.add_grid("Client", n - saved)
+
+        manager.tiling.clear()
+        start = time.perf_counter()
+        manager.layout_slots("Client", n)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(ticks):
+            manager.layout_slots("Client", n)
+        cached = (time.perf_counter() - start) / ticks
+
+        state = {"last_count": 0}
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager._check_windows("Client", 10, state)  # Lượt đầu xếp tất cả vào lưới
+            start = time.perf_counter()
+            for _ in range(ticks):
+                manager._check_windows("Client", 10, state)
+        tick = (time.perf_counter() - start) / ticks
+        print(f"{n:>8} {first * 1000:>15.3f} {cached * 1e6:>12.2f} {tick * 1000:>18.3f}")
+    print(f"Bộ nhớ lưới: {manager.tiling.hits} lần trúng, {manager.tiling.misses} lần tính")
+
+
+def bench_replay(windows: int = 24, minutes: float = 30.0, sample: float = 0.5,
+                 policies=((2.0, 10), (2.0, 3), (0.5, 10), (8.0, 10), ("thích ứng", 10))):
+    """Ghi một phiên giả lập (cửa sổ tự lệch) rồi phát lại với nhiều khoảng quét/sai số"""
+    from window_trace import RECORD, TraceReader, TraceRecorder, TraceReplay
+
+    backend = SimulatedBackend(drift_rate=0.002, drift_pixels=25, seed=16)
+    backend.add_grid("Client", windows, columns=6)
+    manager = _make_manager(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.capture_windows("Client")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="wm_trace_"), "session.wmt")
+    clock = [0.0]
+    samples = int(minutes * 60 / sample)
+    with TraceRecorder(path, sample, clock=lambda: clock[0]) as recorder:
+        for _ in range(samples):
+            recorder.sample(backend.get_all_windows())
+            clock[0] += sample
+    size = os.path.getsize(path)
+
+    print(f"\n== Phát lại trace: {windows} tab, {minutes:g} phút, lấy mẫu {sample}s "
+          f"({size / 1024:.0f} KB, {RECORD.size} byte/bản ghi) ==")
+    print(f"{'khoảng quét':>12} {'sai số':>7} {'lượt':>6} {'lần sửa':>8} {'cửa sổ di chuyển':>17} "
+          f"{'thời gian (ms)':>15} {'tăng tốc':>10}")
+    for interval, tolerance in policies:
+        scheduler = AdaptiveScheduler() if interval == "thích ứng" else None
+        replay_manager = WindowManager(manager.config_file, verbose=False)
+        with TraceReader(path) as trace, contextlib.redirect_stdout(io.StringIO()):
+            report = TraceReplay(trace).run(replay_manager, "Client",
+                                            interval=None if scheduler else interval,
+                                            tolerance=tolerance, scheduler=scheduler)
+        label = interval if scheduler else f"{interval:g}s"
+        print(f"{label:>12} {tolerance:>6}px {report.ticks:>6} {report.corrections:>8} "
+              f"{report.windows_moved:>17} {report.wall_time * 1000:>15.1f} "
+              f"{report.duration / report.wall_time:>9.0f}x")
+
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import window_manager
+print(time.perf_counter() - start, 'pygetwindow' in sys.modules or 'Xlib' in sys.modules)
+"""
+
+_LIST_PROBE = """
+import sys, time
+start = time.perf_counter()
+import window_manager
+sys.argv = ['window_manager.py', 'list', '--local']
+window_manager.main()
+print(time.perf_counter() - start, 'pygetwindow' in sys.modules or 'Xlib' in sys.modules, file=sys.stderr)
+"""
+
+_GUI_PROBE = """
+import time
+start = time.perf_counter()
+import window_manager_gui
+app = window_manager_gui.WindowManagerApp()
+app.update()
+first_frame = time.perf_counter() - start
+while app.manager is None and not app._load_failed:
+    app.update()
+    time.sleep(0.002)
+ready = time.perf_counter() - start
+app.on_closing()
+print(first_frame, ready)
+"""
+
+
+def _run_probe(script: str, cwd: str):
+    """Chạy đoạn script trong tiến trình Python mới (khởi động lạnh), trả về (thời gian tường, stdout, stderr)"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                          capture_output=True, text=True, timeout=60)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "lỗi")
+    return elapsed, proc.stdout, proc.stderr
+
+
+@contextlib.contextmanager
+def _virtual_display():
+    """Chạy Xvfb trên display trống đầu tiên; trả về tên display, None nếu không có Xvfb"""
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield None
+        return
+    number = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X11-unix/X{n}"))
+    process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("Xvfb không khởi động được")
+            time.sleep(0.05)
+        yield f":{number}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def bench_x11(sizes=(50, 200, 500), repeats: int = 10):
+    """Liệt kê cửa sổ trên Xvfb: truy vấn gửi dồn (một lượt khứ hồi) vs chờ trả lời từng truy vấn"""
+    try:
+        from Xlib import X, display
+        from window_backends import X11Backend
+    except ImportError:
+        print("\nℹ Bỏ qua benchmark X11 (cần python-xlib)")
+        return None
+    with _virtual_display() as name:
+        if name is None:
+            print("\nℹ Bỏ qua benchmark X11 (cần Xvfb)")
+            return None
+        print(f"\n== Liệt kê cửa sổ X11 trên Xvfb {name} ({repeats} lần mỗi cỡ) ==")
+        print(f"{'số cửa sổ':>10} {'từng truy vấn (ms)':>19} {'gửi dồn (ms)':>13} {'nhanh hơn':>10}")
+        client = display.Display(name)
+        root = client.screen().root
+        pipelined = X11Backend(name)
+        naive = X11Backend(name, pipeline=False)
+        created = []
+        results = {}
+        for size in sizes:
+            while len(created) < size:
+                i = len(created)
+                window = root.create_window((i % 20) * 90, (i // 20) * 40, 320, 240, 0, X.CopyFromParent)
+                window.set_wm_name(f"Client #{i}")
+                window.map()
+                created.append(window)
+            client.sync()
+            assert [(w.handle, w.title, w.left, w.top) for w in pipelined.get_all_windows()] == \
+                [(w.handle, w.title, w.left, w.top) for w in naive.get_all_windows()]
+            timings = {}
+            for label, backend in (("naive", naive), ("pipelined", pipelined)):
+                samples = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    backend.get_all_windows()
+                    samples.append(time.perf_counter() - start)
+                timings[label] = _summarize(samples)
+                results[f"x11_enumerate_{label}_{size}"] = timings[label]
+            slow, fast = timings["naive"]["p50_ms"], timings["pipelined"]["p50_ms"]
+            print(f"{size:>10} {slow:>19.2f} {fast:>13.2f} {slow / fast:>9.1f}x")
+        for backend in (pipelined, naive):
+            backend.close()
+        client.close()
+    return results
+
+
+def bench_startup(runs: int = 10):
+    """Thời gian khởi động lạnh: import module, lệnh `list`, khung hình đầu tiên của GUI"""
+    print(f"\n== Khởi động lạnh ({runs} tiến trình mỗi phép đo) ==")
+    print(f"{'phép đo':<22} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    cwd = tempfile.mkdtemp(prefix="wm_bench_")
+    samples = {"import": [], "list": [], "list_process": []}
+    backend_loaded = False
+    for _ in range(runs):
+        _, out, _ = _run_probe(_IMPORT_PROBE, cwd)
+        seconds, loaded = out.split()
+        samples["import"].append(float(seconds))
+        elapsed, _, err = _run_probe(_LIST_PROBE, cwd)
+        seconds, loaded_by_list = err.split()[-2:]
+        samples["list"].append(float(seconds))
+        samples["list_process"].append(elapsed)
+        backend_loaded = backend_loaded or loaded == "True" or loaded_by_list == "True"
+
+    try:
+        gui = {"gui_first_frame": [], "gui_ready": []}
+        for _ in range(runs):
+            _, out, _ = _run_probe(_GUI_PROBE, cwd)
+            first_frame, ready = out.split()[-2:]
+            gui["gui_first_frame"].append(float(first_frame))
+            gui["gui_ready"].append(float(ready))
+        samples.update(gui)
+    except Exception as e:
+        print(f"ℹ Bỏ qua đo GUI (cần customtkinter và màn hình/Xvfb): {e}")
+
+    results = {}
+    for name, values in samples.items():
+        key = f"startup_{name}"
+        results[key] = _summarize(values)
+        print(f"{key:<22} {results[key]['p50_ms']:>10.1f} {results[key]['p95_ms']:>10.1f}")
+    print(f"Backend cửa sổ (pygetwindow/Xlib) được import khi chạy list: {'có' if backend_loaded else 'không'}")
+    return results
+
+
+BENCHMARKS = {
+    "supervisor": bench_supervisor,
+    "assignment": bench_assignment,
+    "apply": bench_apply,
+    "concurrent": bench_concurrent,
+    "columnar": bench_columnar,
+    "selectors": bench_selectors,
+    "async": bench_async,
+    "lifecycle": bench_lifecycle,
+    "oscillation": bench_oscillation,
+    "gui_tasks": bench_gui_tasks,
+    "scheduler": bench_scheduler,
+    "scaling": bench_scaling,
+    "tiling": bench_tiling,
+    "replay": bench_replay,
+    "x11": bench_x11,
+    "startup": bench_startup,
+}
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+def compare_baseline(results, baseline, threshold: float):
+    """So sánh p50 với baseline, trả về các thao tác chậm hơn quá `threshold`"""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append((key, base["p50_ms"], current["p50_ms"]))
+    return regressions
+
+
+def main():
+    names, options = _parse_options(sys.argv[1:])
+    names = names or list(BENCHMARKS)
+    baseline_file = options.get("baseline", DEFAULT_BASELINE)
+    threshold = float(options.get("threshold", 0.25))
+
+    results = {}
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"✗ Không có benchmark: {name}")
+            continue
+        # Chỉ các benchmark trả về số đo mới được so với baseline
+        measured = BENCHMARKS[name]()
+        if measured:
+            results.update(measured)
+
+    if not results:
+        return
+    if options.get("save-baseline"):
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Đã lưu baseline vào {baseline_file}")
+        return
+    if not os.path.exists(baseline_file):
+        print(f"\nℹ Chưa có baseline ({baseline_file}), chạy với --save-baseline để tạo")
+        return
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_baseline(results, baseline, threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} thao tác chậm hơn baseline quá {threshold:.0%}:")
+        for key, base, current in regressions:
+            print(f"  {key:<22} {base:.3f} ms → {current:.3f} ms")
+        sys.exit(1)
+    print(f"\n✓ Không có thao tác nào chậm hơn baseline quá {threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Layout dạng cột
+Mỗi thuộc tính slot (x, y, width, height, ...) của tất cả pattern nằm trong
+một mảng số nguyên liền mạch. Monitor ghi hình học hiện tại vào một DriftFrame
+cùng bố cục và giữ nó qua các lượt, nên mỗi lượt chỉ các cửa sổ đã đổi hình
+học mới phải tính lại độ lệch. Lần tính cả layout dùng phép toán vector nếu có
+numpy (requirements-optional.txt) và layout đủ lớn, ngược lại duyệt bằng Python
+"""
+
+import json
+from array import array
+from dataclasses import dataclass
+from itertools import compress
+from operator import ne
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from window_layout import ACCEL_MIN_CELLS, Rect, _accelerators
+
+_RECT_COLUMNS = ("x", "y", "width", "height")
+
+
+@dataclass(frozen=True)
+class Drift:
+    """Một cửa sổ lệch khỏi slot của nó"""
+    pattern: str
+    slot: int
+    delta: Rect  # (dx, dy, dw, dh) = hiện tại - slot
+
+
+class ColumnarLayout:
+    """
+    Tất cả layout đã lưu trong các mảng cột
+
+    Pattern chiếm một đoạn liên tiếp [start, end) trong mỗi mảng, slot thứ j
+    của pattern nằm ở vị trí start + j.
+    """
+
+    def __init__(self):
+        self.patterns: Dict[str, Tuple[int, int]] = {}
+        self.x = array('i')
+        self.y = array('i')
+        self.width = array('i')
+        self.height = array('i')
+        self.index = array('i')
+        self.timestamp = array('d')
+        self.titles: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _append(self, pattern: str, slots: Iterable[Tuple[str, int, int, int, int, int, float]]):
+        start = len(self.x)
+        for title, index, x, y, width, height, timestamp in slots:
+            self.titles.append(title)
+            self.index.append(index)
+            self.x.append(x)
+            self.y.append(y)
+            self.width.append(width)
+            self.height.append(height)
+            self.timestamp.append(timestamp)
+        self.patterns[pattern] = (start, len(self.x))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[dict]]) -> "ColumnarLayout":
+        """Từ dữ liệu dạng JSON: pattern → danh sách slot (dict giống WindowInfo)"""
+        layout = cls()
+        for pattern, windows in data.items():
+            layout._append(pattern, (
+                (w["title"], w["index"], w["x"], w["y"], w["width"], w["height"], w["timestamp"])
+                for w in windows
+            ))
+        return layout
+
+    @classmethod
+    def from_slots(cls, pattern: str, slots: Sequence[Rect]) -> "ColumnarLayout":
+        """Layout một pattern từ danh sách hình học (vd: lưới tự sinh)"""
+        layout = cls()
+        layout._append(pattern, (("", i, x, y, w, h, 0.0) for i, (x, y, w, h) in enumerate(slots)))
+        return layout
+
+    @classmethod
+    def from_windows(cls, windows_data: Dict[str, Sequence]) -> "ColumnarLayout":
+        """Từ windows_data của WindowManager (pattern → danh sách WindowInfo)"""
+        layout = cls()
+        for pattern, windows in windows_data.items():
+            layout._append(pattern, (
+                (w.title, w.index, w.x, w.y, w.width, w.height, w.timestamp) for w in windows
+            ))
+        return layout
+
+    def to_dict(self) -> Dict[str, List[dict]]:
+        """Dữ liệu dạng JSON, cùng định dạng với window_positions.json"""
+        data = {}
+        for pattern, (start, end) in self.patterns.items():
+            data[pattern] = [
+                {
+                    "title": self.titles[i],
+                    "index": self.index[i],
+                    "x": self.x[i],
+                    "y": self.y[i],
+                    "width": self.width[i],
+                    "height": self.height[i],
+                    "timestamp": self.timestamp[i],
+                }
+                for i in range(start, end)
+            ]
+        return data
+
+    @classmethod
+    def load_json(cls, path: str) -> "ColumnarLayout":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def slots(self, pattern: str) -> List[Rect]:
+        """Hình học các slot của một pattern"""
+        start, end = self.patterns[pattern]
+        return list(zip(self.x[start:end], self.y[start:end],
+                        self.width[start:end], self.height[start:end]))
+
+    def nbytes(self) -> int:
+        """Dung lượng các mảng cột (byte, không tính chuỗi tiêu đề dùng chung)"""
+        columns = (self.x, self.y, self.width, self.height, self.index, self.timestamp)
+        return sum(c.itemsize * len(c) for c in columns) + 8 * len(self.titles)
+
+    def frame(self) -> "DriftFrame":
+        """Khung hình học hiện tại cùng bố cục với layout này"""
+        return DriftFrame(self)
+
+    def drift(self, observed: Dict[str, Sequence[Optional[Rect]]],
+              tolerance: Union[int, Dict[str, int]],
+              magnitudes: Optional[Dict[str, List[int]]] = None) -> List[Drift]:
+        """
+        Độ lệch của tất cả cửa sổ ở tất cả pattern trong một lần tính
+
+        Args:
+            observed: pattern → hình học hiện tại theo thứ tự slot (None = slot trống)
+            tolerance: Sai số cho phép (pixel), chung hoặc riêng cho từng pattern
+            magnitudes: Nếu có, nhận độ lệch lớn nhất của mỗi cửa sổ theo pattern (cho histogram)
+        Returns:
+            Toàn bộ các slot lệch quá sai số cùng độ lệch của chúng
+        """
+        frame = self.frame()
+        for pattern, current in observed.items():
+            frame.put(pattern, current, tolerance[pattern] if isinstance(tolerance, dict) else tolerance)
+        return frame.drift(magnitudes)
+
+
+class DriftFrame:
+    """
+    Hình học hiện tại của các cửa sổ, lưu theo cột với cùng vị trí như
+    ColumnarLayout
+
+    Khung được giữ qua các lượt giám sát: `put` chỉ ghi các slot có hình học
+    khác lần ghi trước và `drift` chỉ tính lại độ lệch của các slot đó. Lần
+    ghi đầu của một pattern (hoặc khi đổi sai số) tính lại cả đoạn của nó, bằng
+    phép toán vector trên toàn bộ mảng nếu có numpy và layout đủ lớn.
+    """
+
+    def __init__(self, layout: ColumnarLayout):
+        n = len(layout)
+        self.layout = layout
+        self.x = array('i', bytes(4 * n))
+        self.y = array('i', bytes(4 * n))
+        self.width = array('i', bytes(4 * n))
+        self.height = array('i', bytes(4 * n))
+        self.tolerance = array('i', bytes(4 * n))
+        self.present = array('b', bytes(n))
+        self.size = array('i', bytes(4 * n))  # Độ lệch lớn nhất của mỗi cửa sổ
+        self._seen: Dict[str, List[Optional[Rect]]] = {}  # pattern → hình học ở lần ghi trước
+        self._tolerances: Dict[str, int] = {}
+        self._drifted: Dict[str, Dict[int, Rect]] = {}  # pattern → slot lệch → độ lệch
+        # Pattern đã ghi từ lần `drift` trước → vị trí cần tính lại (None = cả đoạn)
+        self._pending: Dict[str, Optional[List[int]]] = {}
+
+    def put(self, pattern: str, current: Sequence[Optional[Rect]], tolerance: int):
+        """Ghi hình học hiện tại của một pattern theo thứ tự slot (None = slot trống)"""
+        start, end = self.layout.patterns[pattern]
+        current = list(current[:end - start])
+        current.extend([None] * (end - start - len(current)))
+        seen = self._seen.get(pattern)
+        self._seen[pattern] = current
+        if seen is None or self._tolerances[pattern] != tolerance:
+            self._tolerances[pattern] = tolerance
+            self._write_all(start, end, current, tolerance)
+            self._pending[pattern] = None
+            return
+
+        if current == seen:
+            changed = []
+        else:
+            changed = list(compress(range(start, end), map(ne, current, seen)))
+        x, y, width, height, present = self.x, self.y, self.width, self.height, self.present
+        for position in changed:
+            rect = current[position - start]
+            if rect is None:
+                present[position] = 0
+            else:
+                x[position], y[position], width[position], height[position] = rect
+                present[position] = 1
+        pending = self._pending.get(pattern, [])
+        if pending is not None:
+            pending.extend(changed)
+        self._pending[pattern] = pending
+
+    def _write_all(self, start: int, end: int, current: List[Optional[Rect]], tolerance: int):
+        flags = [rect is not None for rect in current]
+        if not all(flags):
+            current = [rect if rect is not None else (0, 0, 0, 0) for rect in current]
+        if current:
+            xs, ys, widths, heights = zip(*current)
+            self.x[start:end] = array('i', xs)
+            self.y[start:end] = array('i', ys)
+            self.width[start:end] = array('i', widths)
+            self.height[start:end] = array('i', heights)
+        self.present[start:end] = array('b', flags)
+        self.tolerance[start:end] = array('i', [tolerance]) * (end - start)
+
+    def drift(self, magnitudes: Optional[Dict[str, List[int]]] = None) -> List[Drift]:
+        """
+        Các slot lệch quá sai số trong các pattern đã ghi từ lần gọi trước
+        (xem `ColumnarLayout.drift`), theo thứ tự slot trong mỗi pattern
+        """
+        pending, self._pending = self._pending, {}
+        full = [pattern for pattern, positions in pending.items() if positions is None]
+        if full:
+            self._recompute(full)
+        for pattern, positions in pending.items():
+            if positions:
+                self._update(pattern, positions)
+
+        drifted = []
+        for pattern in pending:
+            drifted.extend(Drift(pattern, slot, delta)
+                           for slot, delta in sorted(self._drifted[pattern].items()))
+            if magnitudes is not None:
+                start, end = self.layout.patterns[pattern]
+                magnitudes.setdefault(pattern, []).extend(
+                    compress(self.size[start:end], self.present[start:end]))
+        return drifted
+
+    def _recompute(self, patterns: List[str]):
+        """Tính lại độ lệch của cả đoạn các pattern, một lượt vector trên toàn bộ mảng nếu có numpy"""
+        layout = self.layout
+        np = _accelerators()[0] if len(layout) * 4 >= ACCEL_MIN_CELLS else None
+        if np is None:
+            for pattern in patterns:
+                start, end = layout.patterns[pattern]
+                self._drifted[pattern] = {}
+                self._update(pattern, range(start, end))
+            return
+
+        def column(values):
+            return np.frombuffer(values, dtype=np.int32)
+
+        deltas = [column(getattr(self, c)) - column(getattr(layout, c)) for c in _RECT_COLUMNS]
+        present = np.frombuffer(self.present, dtype=np.int8) != 0
+        size = np.where(present, np.maximum.reduce([np.abs(d) for d in deltas]), 0)
+        offending = present & (size > column(self.tolerance))
+        sizes = column(self.size)
+        for pattern in patterns:
+            start, end = layout.patterns[pattern]
+            sizes[start:end] = size[start:end]
+            slots = np.nonzero(offending[start:end])[0]
+            rows = np.stack([d[start:end][slots] for d in deltas], axis=1).tolist()
+            self._drifted[pattern] = {slot: tuple(row) for slot, row in zip(slots.tolist(), rows)}
+
+    def _update(self, pattern: str, positions: Iterable[int]):
+        """Tính lại độ lệch của các vị trí đã đổi, duyệt bằng Python"""
+        layout = self.layout
+        start = layout.patterns[pattern][0]
+        limit = self._tolerances[pattern]
+        drifted = self._drifted[pattern]
+        for position in positions:
+            slot = position - start
+            if not self.present[position]:
+                self.size[position] = 0
+                drifted.pop(slot, None)
+                continue
+            delta = (self.x[position] - layout.x[position], self.y[position] - layout.y[position],
+                     self.width[position] - layout.width[position],
+                     self.height[position] - layout.height[position])
+            size = max(abs(delta[0]), abs(delta[1]), abs(delta[2]), abs(delta[3]))
+            self.size[position] = size
+            if size > limit:
+                drifted[slot] = delta
+            else:
+                drifted.pop(slot, None)
@@ -0,0 +1,131 @@
+"""
+Lưu trữ layout bằng SQLite (WAL)
+Ghi nguyên tử, chỉ ghi lại pattern vừa thay đổi, an toàn khi nhiều tiến trình
+dùng chung và cho phép phát hiện thay đổi rẻ bằng stat (mtime/size)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+_COLUMNS = ("title", "idx", "x", "y", "width", "height", "timestamp")
+
+
+class LayoutStore:
+    """Kho layout dạng SQLite, mỗi slot là một dòng (pattern, idx)"""
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        """
+        Args:
+            path: Đường dẫn file SQLite
+            timeout: Thời gian chờ khi tiến trình khác đang ghi (giây)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS slots (
+                pattern TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                x INTEGER NOT NULL,
+                y INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (pattern, idx)
+            )
+        """)
+        self._signature: Optional[Tuple] = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _stat_signature(self) -> Tuple:
+        """(mtime, size) của file chính và file WAL: thay đổi khi có tiến trình ghi"""
+        signature = []
+        for suffix in ("", "-wal"):
+            try:
+                st = os.stat(self.path + suffix)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def changed(self) -> bool:
+        """
+        Kho đã bị thay đổi (bởi tiến trình khác) kể từ lần đọc/ghi cuối chưa
+        Chỉ gọi os.stat, không đọc dữ liệu
+        """
+        return self._stat_signature() != self._signature
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM slots LIMIT 1").fetchone() is None
+
+    def load_all(self) -> Dict[str, List[dict]]:
+        """Đọc tất cả pattern: pattern → danh sách slot (dict giống WindowInfo)"""
+        with self._lock:
+            # Ghi nhận chữ ký trước khi đọc để không bỏ lỡ thay đổi xảy ra trong lúc đọc
+            self._signature = self._stat_signature()
+            rows = self._conn.execute(
+                "SELECT pattern, title, idx, x, y, width, height, timestamp "
+                "FROM slots ORDER BY pattern, idx"
+            ).fetchall()
+        data: Dict[str, List[dict]] = {}
+        for pattern, *values in rows:
+            row = dict(zip(_COLUMNS, values))
+            row["index"] = row.pop("idx")
+            data.setdefault(pattern, []).append(row)
+        return data
+
+    def save_pattern(self, pattern: str, windows: List[dict]):
+        """Ghi lại một pattern trong một transaction (các pattern khác không bị đụng tới)"""
+        rows = [
+            (pattern, w["index"], w["title"], w["x"], w["y"], w["width"], w["height"], w["timestamp"])
+            for w in windows
+        ]
+        self._write(
+            ("DELETE FROM slots WHERE pattern = ?", [(pattern,)]),
+            ("INSERT INTO slots (pattern, idx, title, x, y, width, height, timestamp) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows),
+        )
+
+    def delete_pattern(self, pattern: str):
+        self._write(("DELETE FROM slots WHERE pattern = ?", [(pattern,)]))
+
+    def _write(self, *statements):
+        """
+        Chạy các câu lệnh trong một transaction
+
+        Chữ ký chỉ được cập nhật sau khi ghi nếu trước đó kho chưa bị tiến trình
+        khác thay đổi; nếu đã bị thay đổi, chữ ký cũ được giữ để lần kiểm tra
+        `changed()` sau vẫn tải lại thay đổi của tiến trình kia.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Đang giữ khóa ghi: không tiến trình nào ghi xen vào giữa lúc so và lúc ghi
+                seen = self._stat_signature() == self._signature
+                for sql, rows in statements:
+                    self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if seen:
+                self._signature = self._stat_signature()
+
+    def import_json(self, json_path: str) -> int:
+        """Nhập file window_positions.json cũ, trả về số pattern đã nhập"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for pattern, windows in data.items():
+            self.save_pattern(pattern, windows)
+        return len(data)
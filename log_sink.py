@@ -0,0 +1,71 @@
+"""
+Đích ghi log an toàn giữa các thread cho GUI
+Các thread worker/monitor chỉ đẩy text vào queue (và file log nếu bật); thread
+Tk lấy ra theo lô bằng timer `after`, nên worker không phải chờ giao diện và
+không gọi Tk sai thread
+"""
+
+import logging
+import queue
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+
+class QueueLogSink:
+    """
+    Thay cho sys.stdout: `write()` chỉ đẩy vào queue có giới hạn
+
+    Thread giao diện gọi `drain()` định kỳ để lấy toàn bộ text đang chờ
+    thành một chuỗi duy nhất (một lần insert vào textbox thay vì mỗi dòng).
+    File log (nếu có) được ghi ngay trong `write()`, trước giới hạn của queue,
+    nên vẫn đủ lịch sử khi textbox phải bỏ dòng.
+    """
+
+    def __init__(self, max_pending: int = 100000, mirror_file: Optional[str] = None,
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        """
+        Args:
+            max_pending: Số đoạn text tối đa chờ trong queue, vượt quá sẽ không hiện lên textbox
+            mirror_file: Ghi toàn bộ lịch sử ra file (xoay vòng), kể cả các dòng bị bỏ; None để tắt
+            max_bytes: Kích thước mỗi file log trước khi xoay vòng
+            backup_count: Số file log cũ được giữ lại
+        """
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._file_handler: Optional[RotatingFileHandler] = None
+        if mirror_file:
+            handler = RotatingFileHandler(mirror_file, maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding='utf-8')
+            handler.terminator = ""
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_handler = handler
+
+    def write(self, text: str):
+        if not text:
+            return
+        if self._file_handler is not None:
+            self._file_handler.emit(logging.makeLogRecord({"msg": text}))
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        pass
+
+    def drain(self, max_items: int = 50000) -> str:
+        """Lấy tối đa `max_items` đoạn text đang chờ, ghép thành một chuỗi"""
+        parts = []
+        try:
+            for _ in range(max_items):
+                parts.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if self.dropped:
+            parts.append(f"⚠ Đã bỏ {self.dropped} dòng log do ghi quá nhanh\n")
+            self.dropped = 0
+        return "".join(parts)
+
+    def close(self):
+        if self._file_handler is not None:
+            self._file_handler.close()
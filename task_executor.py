@@ -0,0 +1,164 @@
+"""
+Hàng đợi tác vụ một worker cho các nút bấm của GUI
+Mọi tác vụ (capture/restore/rearrange) chạy lần lượt trên một thread nền, nên
+các lần bấm liên tiếp không chạy chồng lên nhau. Tác vụ trùng (cùng thao tác,
+cùng pattern) còn đang chờ được gộp thành một. Thay đổi trạng thái được báo
+qua callback từ thread worker; GUI chuyển chúng về thread Tk qua queue
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(eq=False)
+class Task:
+    """Một tác vụ trong hàng đợi"""
+    id: int
+    key: Hashable  # Tác vụ cùng key đang chờ được gộp lại
+    label: str
+    function: Callable = field(repr=False)
+    args: Tuple = field(default=(), repr=False)
+    status: str = PENDING
+    submitted: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    coalesced: int = 0  # Số lần bấm thêm đã được gộp vào tác vụ này
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        """Thời gian chạy (giây); tác vụ đang chạy tính đến `now`"""
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else (now if now is not None else time.monotonic())
+        return end - self.started
+
+
+class CoalescingExecutor:
+    """
+    Chạy tác vụ lần lượt trên một thread, gộp các tác vụ trùng đang chờ
+
+    Tác vụ cùng key với một tác vụ đang chờ không được thêm mới: tác vụ đang
+    chờ giữ chỗ trong hàng nhưng lấy hàm/tham số của lần gửi mới nhất và tăng
+    `coalesced`. Tác vụ cùng key với tác vụ đang chạy vẫn được
+    xếp hàng (cửa sổ có thể đã đổi sau khi tác vụ đó bắt đầu), nên mười lần
+    bấm liên tiếp chạy tối đa hai lượt.
+    """
+
+    def __init__(self, on_update: Optional[Callable[[Task], None]] = None,
+                 name: str = "gui-tasks"):
+        """
+        Args:
+            on_update: Gọi (từ thread worker hoặc thread gửi) mỗi khi tác vụ được
+                thêm, gộp, bắt đầu hoặc kết thúc. Không được gọi Tk trực tiếp
+            name: Tên thread worker
+        """
+        self.on_update = on_update
+        self.name = name
+        self._pending: "OrderedDict[Hashable, Task]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.running: Optional[Task] = None
+        self.completed = 0
+
+    def submit(self, key: Hashable, label: str, function: Callable, *args) -> Task:
+        """Xếp tác vụ vào hàng đợi; trả về tác vụ đang chờ cùng key nếu có (đã gộp lần gửi này)"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Hàng đợi tác vụ đã đóng")
+            task = self._pending.get(key)
+            if task is not None:
+                task.label, task.function, task.args = label, function, args
+                task.coalesced += 1
+            else:
+                task = Task(next(self._ids), key, label, function, args, submitted=time.monotonic())
+                self._pending[key] = task
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                    self._thread.start()
+                self._condition.notify_all()
+        self._notify(task)
+        return task
+
+    def pending(self) -> List[Task]:
+        """Các tác vụ đang chờ, theo thứ tự sẽ chạy"""
+        with self._condition:
+            return list(self._pending.values())
+
+    def _notify(self, task: Task):
+        if self.on_update is not None:
+            try:
+                self.on_update(task)
+            except Exception as e:
+                print(f"✗ Lỗi khi báo trạng thái tác vụ: {e}")
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                _, task = self._pending.popitem(last=False)
+                task.status = RUNNING
+                task.started = time.monotonic()
+                self.running = task
+            self._notify(task)
+            try:
+                task.result = task.function(*task.args)
+                task.status = DONE
+            except Exception as e:
+                task.error = e
+                task.status = FAILED
+            task.finished = time.monotonic()
+            with self._condition:
+                self.running = None
+                self.completed += 1
+                self._condition.notify_all()
+            self._notify(task)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Chờ đến khi hết tác vụ đang chờ/đang chạy. Trả về False nếu quá hạn"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self.running is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def shutdown(self, wait: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Bỏ các tác vụ đang chờ và dừng worker sau tác vụ đang chạy
+
+        Args:
+            wait: Chờ worker thoát (tác vụ đang chạy kết thúc)
+            timeout: Thời gian chờ tối đa khi `wait` (giây)
+        Returns:
+            False nếu worker vẫn chưa thoát khi hết thời gian chờ
+        """
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+            thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
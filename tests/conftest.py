@@ -0,0 +1,30 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from window_backends import SimulatedBackend  # noqa: E402
+from window_manager import WindowManager  # noqa: E402
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """Tạo WindowManager dùng chung một kho layout trong tmp_path (không in ra màn hình)"""
+    managers = []
+
+    def make(backend=None, **options):
+        backend = backend or SimulatedBackend(seed=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = WindowManager(str(tmp_path / "window_positions.json"), backend=backend, **options)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.stop_monitoring()
+        manager.store.close()
+
@@ -0,0 +1,91 @@
+import time
+
+from window_apply import ConcurrentApplier, PlannedMove
+from window_backends import SimulatedBackend
+
+
+class _RecordingBackend(SimulatedBackend):
+    """Ghi lại cửa sổ của mỗi lệnh set_geometry riêng lẻ"""
+
+    def __init__(self):
+        super().__init__(batch=True, seed=1)
+        self.single_calls = []
+
+    def set_geometry(self, window, x, y, width, height):
+        self.single_calls.append(window.handle)
+        return super().set_geometry(window, x, y, width, height)
+
+
+def _moves(windows):
+    return [PlannedMove(w, (w.left, w.top, w.width, w.height), (i * 500, 300, 480, 270), i, i)
+            for i, w in enumerate(windows)]
+
+
+def test_hung_batch_is_not_resent_to_its_windows():
+    backend = _RecordingBackend()
+    windows = backend.add_grid("Client", 6)
+    hung = windows[2]
+    backend.hang(hung)
+    applier = ConcurrentApplier(max_workers=4, timeout=0.1, retry_base=0.3)
+    try:
+        start = time.monotonic()
+        result = applier.apply(backend, _moves(windows))
+        assert time.monotonic() - start < 1.0
+        # Batch đã đặt xong hai cửa sổ đầu trước khi treo, không lệnh nào bị gửi lại ngay
+        assert [m.index for m in result.applied] == [0, 1]
+        assert [m.index for m in result.timed_out] == [2, 3, 4, 5]
+        assert backend.single_calls == []
+
+        result = applier.apply(backend, _moves(windows))
+        assert [m.index for m in result.quarantined] == [2, 3, 4, 5]
+        assert backend.single_calls == []
+
+        # Hết hạn cách ly: thử riêng từng cửa sổ, chỉ cửa sổ treo còn bị cách ly
+        time.sleep(0.35)
+        result = applier.apply(backend, _moves(windows))
+        assert sorted(m.index for m in result.applied) == [3, 4, 5]
+        assert [m.index for m in result.timed_out] == [2]
+        assert backend.single_calls.count(hung.handle) == 1
+
+        # Lệnh riêng tới cửa sổ treo chưa trả về → không gửi thêm dù hết hạn cách ly
+        time.sleep(0.7)
+        result = applier.apply(backend, _moves(windows))
+        assert [m.index for m in result.quarantined] == [2]
+        assert backend.single_calls.count(hung.handle) == 1
+    finally:
+        backend.release()
+    time.sleep(0.05)
+    # Các lệnh đang treo trả về và đã đặt cửa sổ vào slot
+    result = applier.apply(backend, _moves(windows))
+    assert len(result.skipped) == 6
+
+
+def test_batch_deadline_counts_from_start():
+    backend = SimulatedBackend(batch=True, call_latency=0.15)
+    windows = backend.add_grid("Client", 4)
+    # Lệnh batch mất 0.15s: quá timeout 0.1s nên bị coi là treo dù chưa tới 2×timeout
+    applier = ConcurrentApplier(max_workers=2, timeout=0.1, retry_base=5)
+    result = applier.apply(backend, _moves(windows))
+    assert not result.batched
+    assert len(result.timed_out) == 4
+
+
+def test_wall_time_grows_with_windows_per_worker():
+    latency = 0.1
+    backend = SimulatedBackend(call_latency=latency)
+    applier = ConcurrentApplier(max_workers=8, timeout=2.0)
+    # Số cửa sổ không quá số worker: một lượt mất khoảng một lệnh, không phải 8 lệnh nối tiếp
+    windows = backend.add_grid("Client", 8)
+    start = time.monotonic()
+    result = applier.apply(backend, _moves(windows))
+    elapsed = time.monotonic() - start
+    assert len(result.applied) == 8
+    assert latency <= elapsed < 3 * latency
+
+    # Gấp đôi số worker: hai đợt lệnh, thời gian tăng theo n / max_workers
+    windows = backend.add_grid("Game", 16)
+    start = time.monotonic()
+    result = applier.apply(backend, _moves(windows))
+    elapsed = time.monotonic() - start
+    assert len(result.applied) == 16
+    assert 2 * latency <= elapsed < 4 * latency
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from window_async import AsyncWindowManager
+from window_backends import SimulatedBackend
+
+
+def _captured(make_manager, count: int = 4):
+    backend = SimulatedBackend(seed=18)
+    tabs = backend.add_grid("Client", count)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    return manager, backend, tabs
+
+
+def test_monitor_starts_and_stops_under_asyncio_run(make_manager):
+    manager, backend, tabs = _captured(make_manager)
+    slot = (tabs[1].left, tabs[1].top)
+
+    async def main():
+        async with AsyncWindowManager(manager) as wm:
+            monitor = wm.monitor("Client", interval=0.01)
+            assert wm.monitors == {"Client": monitor}
+            tabs[1].left += 50
+            changes = monitor.__aiter__()
+            first = await asyncio.wait_for(changes.__anext__(), 2)  # Lần gán slot đầu tiên
+            if first.result is not None and not first.result.applied:
+                first = await asyncio.wait_for(changes.__anext__(), 2)
+            assert first.pattern == "Client"
+            assert [move.slot for move in first.result.applied] == [1]
+
+            await wm.stop_monitor("Client")
+            assert not monitor.running
+            assert wm.monitors == {}
+            # Iterator kết thúc khi monitor dừng
+            assert [change async for change in monitor] == []
+        return {task for task in asyncio.all_tasks() if task is not asyncio.current_task()}
+
+    assert asyncio.run(main()) == set()
+    assert (tabs[1].left, tabs[1].top) == slot
+
+
+def test_cancel_propagates_to_monitor_stop(make_manager):
+    manager, backend, tabs = _captured(make_manager)
+    checks = []
+    check_windows = manager._check_windows
+
+    def counting(*args, **kwargs):
+        checks.append(time.monotonic())
+        return check_windows(*args, **kwargs)
+
+    manager._check_windows = counting
+
+    async def main():
+        wm = AsyncWindowManager(manager)
+        monitor = wm.monitor("Client", interval=0.01)
+        received = []
+
+        async def consume():
+            async for change in monitor:
+                received.append(change)
+
+        consumer = asyncio.ensure_future(consume())
+        # Orchestrator hết thời gian chờ: wait_for hủy task monitor
+        try:
+            await asyncio.wait_for(monitor.task, 0.2)
+        except asyncio.TimeoutError:
+            pass
+        assert monitor.task.cancelled()
+        assert not monitor.running
+        assert wm.monitors == {}
+        await asyncio.wait_for(consumer, 1)  # Iterator của consumer kết thúc theo
+        assert len(checks) > 3
+
+        await wm.close()
+
+        # Hủy task bao ngoài `async with`: close() dừng mọi monitor
+        started = asyncio.Event()
+        inner = []
+
+        async def supervise():
+            async with AsyncWindowManager(manager) as owner:
+                inner.append(owner.monitor("Client", interval=0.01))
+                started.set()
+                await asyncio.Event().wait()
+
+        outer = asyncio.ensure_future(supervise())
+        await started.wait()
+        await asyncio.sleep(0.05)
+        outer.cancel()
+        try:
+            await outer
+        except asyncio.CancelledError:
+            pass
+        assert inner[0].task.cancelled()
+        assert inner[0].owner.monitors == {}
+
+    asyncio.run(main())
+    stopped = len(checks)
+    time.sleep(0.1)
+    assert len(checks) == stopped  # Không còn lượt kiểm tra nào sau khi dừng
@@ -0,0 +1,138 @@
+import random
+from dataclasses import asdict
+
+import pytest
+
+import layout_columns
+from layout_columns import ColumnarLayout, Drift
+from window_backends import SimulatedBackend
+from window_manager import WindowInfo
+from window_supervisor import MonitorSupervisor
+
+
+def _slots(count: int):
+    return [((i % 10) * 472, (i // 10) * 262, 480, 270) for i in range(count)]
+
+
+def test_json_round_trip(tmp_path):
+    windows_data = {
+        "Game A": [WindowInfo("Game A - tab", i, x, y, w, h, 1700000000.5 + i)
+                   for i, (x, y, w, h) in enumerate(_slots(12))],
+        "Game B": [WindowInfo("Game B", 0, -8, -8, 1936, 1056, 1700000100.0)],
+        "Trống": [],
+    }
+    layout = ColumnarLayout.from_windows(windows_data)
+    expected = {pattern: [asdict(w) for w in windows] for pattern, windows in windows_data.items()}
+    assert layout.to_dict() == expected
+
+    path = str(tmp_path / "columns.json")
+    layout.save_json(path)
+    loaded = ColumnarLayout.load_json(path)
+    assert loaded.to_dict() == expected
+    assert loaded.slots("Game B") == [(-8, -8, 1936, 1056)]
+
+
+def test_drift_beyond_tolerance_only():
+    slots = _slots(6)
+    layout = ColumnarLayout.from_slots("Client", slots)
+    current = list(slots)
+    current[1] = (slots[1][0] + 10, slots[1][1], 480, 270)  # Đúng bằng sai số
+    current[2] = (slots[2][0], slots[2][1] - 11, 480, 270)
+    current[4] = (slots[4][0], slots[4][1], 480, 300)
+    current[5] = None  # Slot trống không bao giờ lệch
+    frame = layout.frame()
+    frame.put("Client", current, tolerance=10)
+    magnitudes = {}
+    assert frame.drift(magnitudes) == [Drift("Client", 2, (0, -11, 0, 0)), Drift("Client", 4, (0, 0, 0, 30))]
+    assert magnitudes == {"Client": [0, 10, 11, 0, 30]}
+
+    # Khung giữ qua các lượt: chỉ slot đổi được tính lại
+    current[2] = slots[2]
+    current[3] = (slots[3][0] + 40, slots[3][1], 480, 270)
+    frame.put("Client", current, tolerance=10)
+    assert frame.drift() == [Drift("Client", 3, (40, 0, 0, 0)), Drift("Client", 4, (0, 0, 0, 30))]
+    frame.put("Client", current, tolerance=50)
+    assert frame.drift() == []
+
+
+def _random_ticks(layout, rng, ticks: int):
+    """Các lượt hình học ngẫu nhiên: mỗi lượt vài cửa sổ bị kéo, trả về hoặc đóng"""
+    observed = {p: layout.slots(p) for p in layout.patterns}
+    result = []
+    for _ in range(ticks):
+        for pattern, current in observed.items():
+            for slot in rng.sample(range(len(current)), 8):
+                if rng.random() < 0.1:
+                    current[slot] = None
+                else:
+                    x, y, w, h = layout.slots(pattern)[slot]
+                    current[slot] = (x + rng.randint(-30, 30), y + rng.randint(-30, 30),
+                                     w + rng.randint(-15, 15), h)
+        result.append({p: list(current) for p, current in observed.items()})
+    return result
+
+
+def _run(layout, ticks, tolerance):
+    """Kết quả từng lượt trên một khung giữ qua các lượt và trên khung dựng mới"""
+    kept = layout.frame()
+    results = []
+    for observed in ticks:
+        for pattern, current in observed.items():
+            kept.put(pattern, current, tolerance)
+        kept_magnitudes, fresh_magnitudes = {}, {}
+        kept_drift = kept.drift(kept_magnitudes)
+        fresh_drift = layout.drift(observed, tolerance, fresh_magnitudes)
+        assert kept_drift == fresh_drift
+        assert kept_magnitudes == fresh_magnitudes
+        results.append((kept_drift, kept_magnitudes))
+    return results
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    layout = ColumnarLayout.from_dict({
+        f"Client {p}": [dict(title="", index=i, x=x, y=y, width=w, height=h, timestamp=0.0)
+                        for i, (x, y, w, h) in enumerate(_slots(200))]
+        for p in range(4)
+    })
+    assert len(layout) * 4 >= layout_columns.ACCEL_MIN_CELLS
+    ticks = _random_ticks(layout, random.Random(15), ticks=5)
+
+    vectorized = _run(layout, ticks, tolerance=10)
+    monkeypatch.setattr(layout_columns, "_accelerators", lambda: (None, None))
+    assert _run(layout, ticks, tolerance=10) == vectorized
+    assert any(drift for drift, _ in vectorized)
+
+
+def test_supervisor_checks_only_drifted_patterns(make_manager):
+    backend = SimulatedBackend(seed=15)
+    tabs = {p: backend.add_grid(p, 6, columns=3) for p in ("Alpha", "Beta", "Gamma")}
+    manager = make_manager(backend)
+    for pattern in tabs:
+        manager.capture_windows(pattern)
+    supervisor = MonitorSupervisor(manager, list(tabs))
+    supervisor.tick(now=0.0)  # Lượt đầu: gán slot cho mọi pattern
+
+    checked = []
+    check_windows = manager._check_windows
+
+    def spy(pattern, tolerance, state, current_windows=None, scheduler=None, drift=None):
+        checked.append((pattern, drift))
+        return check_windows(pattern, tolerance, state, current_windows, scheduler, drift)
+
+    manager._check_windows = spy
+    window = tabs["Beta"][4]
+    slot = supervisor.patterns["Beta"].state["tracker"].slot_of(window.handle)
+    position = (window.left, window.top)
+    window.left += 40
+    tabs["Gamma"][1].top += 5  # Trong sai số
+    assert supervisor.tick(now=10.0) == ["Alpha", "Beta", "Gamma"]
+
+    assert checked == [("Beta", [Drift("Beta", slot, (40, 0, 0, 0))])]
+    assert (window.left, window.top) == position
+    assert tabs["Gamma"][1].top == 5
+
+    checked.clear()
+    backend.close_window(tabs["Alpha"][0].handle)  # Tập cửa sổ đổi: kiểm tra đầy đủ, tự tính độ lệch
+    supervisor.tick(now=20.0)
+    assert checked == [("Alpha", None)]
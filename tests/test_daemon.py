@@ -0,0 +1,65 @@
+import functools
+import json
+import socket
+import threading
+
+import window_daemon
+import window_manager
+
+
+def _write_discovery(tmp_path, port):
+    with open(tmp_path / "window_positions.daemon.json", "w", encoding="utf-8") as f:
+        json.dump({"host": "127.0.0.1", "port": port, "token": "t", "pid": 0}, f)
+
+
+def _silent_server(close_after_read: bool):
+    """Server nhận lệnh nhưng không trả lời (treo hoặc đóng kết nối)"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    received = []
+
+    def serve():
+        conn, _ = server.accept()
+        received.append(conn.recv(65536))
+        if close_after_read:
+            conn.close()
+        else:
+            threading.Event().wait(2.0)
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, received
+
+
+def test_no_daemon_returns_none(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()  # Cổng không có ai nghe
+    _write_discovery(tmp_path, port)
+    assert window_daemon.send_request("restore", "Client") is None
+
+
+def test_timeout_after_send_is_reported_not_run_locally(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    server, received = _silent_server(close_after_read=False)
+    _write_discovery(tmp_path, server.getsockname()[1])
+    send = window_daemon.send_request
+    monkeypatch.setattr(window_daemon, "send_request", functools.partial(send, timeout=0.2))
+
+    assert window_manager._forward_to_daemon("restore", ["Client"]) is True
+    assert received and b'"restore"' in received[0]
+    assert "✗ Daemon" in capsys.readouterr().out
+    server.close()
+
+
+def test_connection_closed_after_send_is_an_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server, received = _silent_server(close_after_read=True)
+    _write_discovery(tmp_path, server.getsockname()[1])
+    response = window_daemon.send_request("rearrange", "Client", timeout=2.0)
+    assert response is not None and not response["ok"]
+    assert received
+    server.close()
@@ -0,0 +1,74 @@
+import contextlib
+import io
+
+import pytest
+
+from window_backends import SimulatedBackend
+from window_layout import LayoutPlanner, plan_assignment
+
+
+def _sorted_pairing_moves(windows, slots):
+    """Số cửa sổ phải di chuyển khi ghép theo thứ tự (left, top) như cách cũ"""
+    ordered = sorted((w.left, w.top, w.width, w.height) for w in windows)
+    return sum(1 for rect, slot in zip(ordered, slots) if rect != tuple(slot))
+
+
+def _quiet(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+@pytest.fixture
+def grid(make_manager):
+    """Manager đã capture 8 cửa sổ 'Client' xếp lưới 4 cột"""
+    backend = SimulatedBackend(seed=1)
+    windows = backend.add_grid("Client", 8)
+    manager = make_manager(backend)
+    _quiet(manager.capture_windows, "Client")
+    slots = manager._saved_layout("Client")[0]
+    return manager, backend, windows, slots
+
+
+def test_drag_moves_only_dragged_window(grid):
+    manager, backend, windows, slots = grid
+    windows[1].left, windows[1].top = 1900, 700
+    assert _sorted_pairing_moves(windows, slots) == 6
+
+    calls = backend.calls
+    result = _quiet(manager.rearrange_windows, "Client")
+    assert [move.slot for move in result.applied] == [slots.index((472, 0, 480, 270))]
+    assert backend.calls - calls == 1
+    assert (windows[1].left, windows[1].top) == (472, 0)
+
+
+def test_shrink_keeps_remaining_windows(grid):
+    manager, backend, windows, slots = grid
+    backend.close_window(windows[1].handle)
+    assert _sorted_pairing_moves(backend.windows.values(), slots) == 5
+
+    calls = backend.calls
+    result = _quiet(manager.restore_windows, "Client")
+    assert result.applied == []
+    assert backend.calls == calls
+
+
+def test_grow_leaves_existing_windows_in_place(grid):
+    manager, backend, windows, slots = grid
+    extra = backend.add_window("Client #8", 100, 100, 480, 270)
+    assert _sorted_pairing_moves(backend.windows.values(), slots) == 6
+
+    calls = backend.calls
+    result = _quiet(manager.restore_windows, "Client")
+    assert result.applied == []
+    assert backend.calls == calls
+    assert (extra.left, extra.top) == (100, 100)
+
+
+def test_planner_caches_plan():
+    slots = [(i * 100, 0, 100, 100) for i in range(4)]
+    current = [(5, 0, 100, 100), (300, 0, 100, 100), (100, 0, 100, 100)]
+    planner = LayoutPlanner()
+    first = planner.plan(current, slots)
+    assert first == plan_assignment(current, slots) == (0, 3, 1)
+    assert planner.plan(current, slots) is first
+    assert (planner.hits, planner.misses) == (1, 1)
@@ -0,0 +1,44 @@
+from layout_store import LayoutStore
+
+
+def _slot(index, x):
+    return {"title": f"Client #{index}", "index": index, "x": x, "y": 0,
+            "width": 480, "height": 270, "timestamp": 0.0}
+
+
+def test_own_write_does_not_hide_other_process_write(tmp_path):
+    path = str(tmp_path / "layouts.db")
+    a = LayoutStore(path)
+    c = LayoutStore(path)
+    a.load_all()
+    c.load_all()
+
+    c.save_pattern("P", [_slot(0, 0)])  # Tiến trình khác ghi trước
+    a.save_pattern("Q", [_slot(0, 100)])
+
+    assert a.changed()
+    assert sorted(a.load_all()) == ["P", "Q"]
+    assert not a.changed()
+
+
+def test_own_write_alone_is_not_reported_as_change(tmp_path):
+    store = LayoutStore(str(tmp_path / "layouts.db"))
+    store.load_all()
+    store.save_pattern("Q", [_slot(0, 0)])
+    store.delete_pattern("Q")
+    assert not store.changed()
+
+
+def test_two_managers_see_each_others_captures(make_manager):
+    a = make_manager()
+    c = make_manager()
+    a.backend.add_grid("Q", 2)
+    c.backend.add_grid("P", 2)
+
+    c.capture_windows("P")
+    a.capture_windows("Q")
+
+    assert a.reload_if_changed() == ["P"]
+    assert sorted(a.windows_data) == ["P", "Q"]
+    assert c.reload_if_changed() == ["Q"]
+    assert sorted(c.windows_data) == ["P", "Q"]
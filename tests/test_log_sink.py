@@ -0,0 +1,49 @@
+import threading
+
+from log_sink import QueueLogSink
+
+
+def test_overflow_is_counted_and_reported_once():
+    sink = QueueLogSink(max_pending=5)
+    for i in range(8):
+        sink.write(f"dòng {i}\n")
+    assert sink.dropped == 3
+
+    text = sink.drain()
+    assert text == "".join(f"dòng {i}\n" for i in range(5)) + "⚠ Đã bỏ 3 dòng log do ghi quá nhanh\n"
+    assert sink.dropped == 0
+    assert sink.drain() == ""
+
+
+def test_mirror_file_keeps_dropped_lines(tmp_path):
+    path = tmp_path / "window_manager.log"
+    sink = QueueLogSink(max_pending=10, mirror_file=str(path))
+    lines = [f"dòng {i}\n" for i in range(100)]
+    for line in lines:
+        sink.write(line)
+    assert sink.dropped == 90
+
+    assert sink.drain().count("\n") == 11  # 10 dòng trong queue + thông báo bỏ dòng
+    sink.close()
+    assert path.read_text(encoding="utf-8") == "".join(lines)
+
+
+def test_concurrent_writers_lose_nothing_to_file(tmp_path):
+    path = tmp_path / "window_manager.log"
+    sink = QueueLogSink(max_pending=500, mirror_file=str(path))
+
+    def writer(name):
+        for i in range(1000):
+            sink.write(f"{name} {i}\n")
+
+    threads = [threading.Thread(target=writer, args=(f"w{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    shown = sink.drain(max_items=10000)
+    sink.close()
+
+    assert shown.count("\n") == 501
+    logged = path.read_text(encoding="utf-8").splitlines()
+    assert sorted(logged) == sorted(f"w{n} {i}" for n in range(4) for i in range(1000))
@@ -0,0 +1,182 @@
+import threading
+import time
+
+from window_backends import SimulatedBackend
+from window_events import FakeEventSource
+from window_scheduler import AdaptiveScheduler
+
+
+def _wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def test_event_monitor_corrects_after_event_and_idles(make_manager):
+    backend = SimulatedBackend(seed=1)
+    windows = backend.add_grid("Client", 4)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    source = FakeEventSource()
+    scans = backend.enumerations + 1  # Lần kiểm tra lúc bắt đầu giám sát
+
+    manager.start_monitoring("Client", interval=0.02, tolerance=10, event_source=source)
+    assert _wait_until(lambda: backend.enumerations == scans)
+    # Không có sự kiện: hết timeout chỉ kiểm tra kho layout, không liệt kê lại cửa sổ
+    time.sleep(0.2)
+    assert backend.enumerations == scans
+    assert backend.calls == 0
+
+    window = windows[2]
+    slot = (window.left, window.top)
+    window.left += 50
+    source.emit("move", window.handle)
+    assert _wait_until(lambda: (window.left, window.top) == slot)
+    assert backend.enumerations == scans + 1
+    assert backend.calls == 1
+
+    time.sleep(0.1)
+    assert backend.enumerations == scans + 1
+    assert source.wakeups == 1
+
+
+def _monitor_threads():
+    return [t for t in threading.enumerate() if t.name == "window-monitor" and t.is_alive()]
+
+
+def test_start_stop_keeps_single_monitor_thread(make_manager):
+    backend = SimulatedBackend(seed=19)
+    backend.add_grid("Client", 20, columns=10)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+
+    slowest = 0.0
+    for _ in range(50):
+        manager.start_monitoring("Client", interval=2.0)
+        assert len(_monitor_threads()) <= 1
+        start = time.monotonic()
+        manager.stop_monitoring()
+        slowest = max(slowest, time.monotonic() - start)
+        assert _monitor_threads() == []
+    # Dừng không phải chờ hết khoảng quét 2s
+    assert slowest < 0.5
+
+    manager.start_monitoring("Client", interval=2.0)
+    manager.start_monitoring("Client", interval=2.0)  # Đang giám sát rồi: không tạo thread mới
+    assert len(_monitor_threads()) == 1
+    manager.stop_monitoring()
+    assert _monitor_threads() == []
+
+
+def test_capture_and_rearrange_while_monitoring(make_manager, capsys):
+    backend = SimulatedBackend(seed=19, drift_rate=0.05)
+    backend.add_grid("Client", 20, columns=10)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    manager.start_monitoring("Client", interval=0.001)
+    errors = []
+
+    def hammer(action):
+        try:
+            for _ in range(50):
+                action("Client")
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=hammer, args=(action,))
+               for action in (manager.capture_windows, manager.rearrange_windows)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    manager.stop_monitoring()
+
+    assert errors == []
+    assert manager.metrics.ticks > 0
+    assert "Lỗi trong quá trình giám sát" not in capsys.readouterr().out
+    assert _monitor_threads() == []
+
+
+class _TimedBackend(SimulatedBackend):
+    """Ghi lại thời điểm (đồng hồ giả lập) của mỗi lệnh đặt hình học"""
+
+    def __init__(self, clock):
+        super().__init__(seed=6)
+        self.clock = clock
+        self.set_times = []
+
+    def set_geometry(self, window, x, y, width, height):
+        self.set_times.append(self.clock[0])
+        return super().set_geometry(window, x, y, width, height)
+
+
+def test_adaptive_scheduler_drives_monitor_loop(make_manager):
+    clock = [0.0]
+    backend = _TimedBackend(clock)
+    tabs = backend.add_grid("Client", 4)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    scheduler = AdaptiveScheduler(min_interval=0.25, max_interval=8.0, settle_time=0.5,
+                                  clock=lambda: clock[0])
+    game = tabs[1]
+    bursts = (600.0, 1800.0, 3000.0)
+    resize_time = 2.0
+    finished = set()
+    changed_at = {}  # Mốc resize → lần cuối game đổi kích thước
+    sleeps = []
+
+    def sleep(seconds):
+        # Game tự resize trong `resize_time` giây sau mỗi mốc, rồi giữ kích thước lệch
+        sleeps.append(seconds)
+        clock[0] += seconds
+        now = clock[0]
+        for burst in bursts:
+            if burst <= now and burst not in finished:
+                width = 500 + int(min(now - burst, resize_time) * 40)
+                if width != game.width:
+                    game.width = width
+                    changed_at[burst] = now
+                if now >= burst + resize_time:
+                    finished.add(burst)
+        if now >= 3600:
+            manager.monitoring = False
+
+    manager.monitoring = True
+    manager.monitor_windows("Client", tolerance=10, scheduler=scheduler, sleep=sleep)
+
+    # Quét cố định 2s là 1800 lượt/giờ; rảnh thì giãn đến 8s
+    assert len(sleeps) < 700
+    assert max(sleeps) == 8.0
+    # Mỗi lần resize chỉ sửa một lần, ngay khi game đã ngừng resize đủ `settle_time`
+    assert len(backend.set_times) == len(bursts)
+    for burst, fixed_at in zip(bursts, backend.set_times):
+        settled_at = changed_at[burst] + scheduler.settle_time
+        assert settled_at <= fixed_at <= settled_at + scheduler.min_interval
+    assert game.width == 480
+
+
+def test_event_source_wakes_adaptive_scheduler(make_manager):
+    backend = SimulatedBackend(seed=6)
+    tabs = backend.add_grid("Client", 4)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    source = FakeEventSource()
+    scheduler = AdaptiveScheduler(min_interval=0.01, max_interval=0.05, settle_time=0.1, fast_period=0.5)
+    # Khoảng kiểm tra kho dài: chỉ sự kiện và scheduler mới làm monitor quét lại
+    manager.start_monitoring("Client", interval=30.0, event_source=source, scheduler=scheduler)
+    assert _wait_until(lambda: scheduler.wakeups == 1)
+
+    game = tabs[1]
+    for width in range(500, 600, 20):  # Game tự resize, mỗi bước một sự kiện
+        game.width = width
+        source.emit("resize", game.handle)
+        time.sleep(0.02)
+    resized = time.monotonic()
+    assert backend.calls == 0  # Chưa ổn định: không sửa giữa chừng
+    # Sự kiện cuối không báo lúc game ngừng resize: scheduler quét nhanh đến khi sửa xong
+    assert _wait_until(lambda: game.width == 480)
+    assert time.monotonic() - resized < 1.0
+    assert backend.calls == 1
@@ -0,0 +1,76 @@
+from window_apply import PlannedMove, apply_layout, verify_applied
+from window_backends import SimulatedBackend
+from window_oscillation import OscillationPolicy
+
+
+def _fighting_manager(make_manager, policy):
+    backend = SimulatedBackend(seed=20)
+    tabs = backend.add_grid("Client", 6, columns=3)
+    manager = make_manager(backend)
+    manager.oscillation = policy
+    clock = [0.0]
+    manager.clock = lambda: clock[0]
+    manager.capture_windows("Client")
+    # Một tab tự đổi lại ở lượt liệt kê sau, một tab từ chối ngay khi bị đặt
+    backend.fight(tabs[0], (100, 100, 800, 600))
+    backend.fight(tabs[1], (200, 150, 640, 480), immediate=True)
+    return manager, backend, tabs, clock
+
+
+def _run(manager, clock, ticks: int, interval: float = 2.0) -> dict:
+    state = {"last_count": 0}
+    for _ in range(ticks):
+        manager._check_windows("Client", 10, state)
+        clock[0] += interval
+    return state
+
+
+def test_verify_applied_flags_window_that_reverts():
+    backend = SimulatedBackend()
+    steady = backend.add_window("Client #0", 0, 0, 480, 270)
+    fighter = backend.add_window("Client #1", 500, 0, 480, 270)
+    backend.fight(fighter, immediate=True)
+    moves = [PlannedMove(w, (w.left, w.top, w.width, w.height), (w.left, 300, 480, 270), i, i)
+             for i, w in enumerate((steady, fighter))]
+
+    result = apply_layout(backend, moves)
+    assert len(result.applied) == 2
+    assert verify_applied(result, tolerance=10, backend=backend) == [moves[1]]
+    assert result.summary().endswith("1 không giữ vị trí")
+
+
+def test_guard_exempts_fighting_windows(make_manager, capsys):
+    manager, backend, tabs, clock = _fighting_manager(make_manager, OscillationPolicy())
+    calls = backend.calls
+    state = _run(manager, clock, ticks=300)  # 10 phút
+
+    guard = state["guard"]
+    assert set(guard.exempted()) == {tabs[0].handle, tabs[1].handle}
+    snap = manager.stats()
+    assert snap["oscillations"] >= 2
+    assert snap["unconverged_moves"] >= 1  # Tab đổi lại ngay bị phát hiện khi đọc lại
+    # Không có miễn sửa: hai tab bị sửa ở gần như mọi lượt
+    assert backend.calls - calls < 60
+    assert "🔁" in capsys.readouterr().out
+
+
+def test_disabled_guard_keeps_correcting(make_manager):
+    manager, backend, tabs, clock = _fighting_manager(make_manager, OscillationPolicy(threshold=0))
+    calls = backend.calls
+    state = _run(manager, clock, ticks=30)
+
+    assert state["guard"].exempted() == []
+    assert manager.stats()["oscillations"] == 0
+    assert backend.calls - calls >= 30
+
+
+def test_normal_tabs_still_corrected_while_others_exempt(make_manager):
+    manager, backend, tabs, clock = _fighting_manager(make_manager, OscillationPolicy())
+    state = _run(manager, clock, ticks=10)
+    assert state["guard"].exempt(tabs[0].handle)
+
+    slot = (tabs[4].left, tabs[4].top)
+    tabs[4].left += 40
+    manager._check_windows("Client", 10, state)
+    assert (tabs[4].left, tabs[4].top) == slot
+    assert (tabs[0].left, tabs[0].top) == (100, 100)
@@ -0,0 +1,75 @@
+from window_backends import SimulatedBackend
+from window_stats import PHASES, format_stats
+
+
+def _monitor_ticks(manager, windows, ticks: int = 3):
+    """Chạy `ticks` lượt kiểm tra, tab thứ hai bị kéo lệch 40px trước lượt cuối"""
+    state = {"last_count": 0}
+    for tick in range(ticks):
+        if tick == ticks - 1:
+            windows[1].left += 40
+        manager._check_windows("Client", 10, state)
+    return state
+
+
+def test_counters_and_timings(make_manager):
+    backend = SimulatedBackend(seed=8)
+    windows = backend.add_grid("Client", 4)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    manager.metrics.reset()
+    _monitor_ticks(manager, windows)
+
+    snap = manager.stats()
+    assert snap["enabled"]
+    assert snap["ticks"] == 3
+    # Lượt đầu chỉ gán slot (cửa sổ đã đúng chỗ); lượt cuối sửa tab bị kéo
+    assert snap["corrections"] == 2
+    assert snap["windows_moved"] == 1
+    assert snap["windows_skipped"] == 4
+    assert snap["failed_moves"] == snap["timed_out_moves"] == 0
+    phases = snap["phases"]
+    assert phases["enumerate"]["count"] == phases["match"]["count"] == phases["drift"]["count"] == 3
+    assert phases["correct"]["count"] == 2
+    for phase in phases.values():
+        assert 0.0 <= phase["avg_ms"] <= phase["max_ms"] <= phase["total_ms"]
+    # Mỗi lượt ghi độ lệch của cả 4 tab; chỉ tab bị kéo lệch quá 20px
+    assert sum(snap["drift_histogram"].values()) == 12
+    assert snap["drift_histogram"]["50"] == 1
+    assert snap["drift_avg_px"] == 40 / 12
+
+    text = manager.metrics.to_prometheus()
+    assert "window_manager_ticks_total 3" in text
+    assert 'window_manager_drift_pixels_bucket{le="+Inf"} 12' in text
+
+
+def test_reset_clears_everything(make_manager):
+    backend = SimulatedBackend(seed=8)
+    windows = backend.add_grid("Client", 4)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    _monitor_ticks(manager, windows)
+    assert manager.stats()["ticks"] > 0
+
+    manager.metrics.reset()
+    snap = manager.stats()
+    assert snap["ticks"] == snap["corrections"] == snap["windows_moved"] == 0
+    assert all(p["count"] == 0 and p["max_ms"] == 0.0 for p in snap["phases"].values())
+    assert not any(snap["drift_histogram"].values())
+    assert snap["drift_avg_px"] == 0.0
+
+
+def test_stats_when_collection_is_off(make_manager):
+    backend = SimulatedBackend(seed=8)
+    windows = backend.add_grid("Client", 4)
+    manager = make_manager(backend, collect_stats=False)
+    manager.capture_windows("Client")
+    _monitor_ticks(manager, windows)
+    assert (windows[1].left, windows[1].top) == (472, 0)  # Vẫn sửa bình thường
+
+    snap = manager.stats()
+    assert not snap["enabled"]
+    assert snap["ticks"] == snap["corrections"] == snap["windows_moved"] == 0
+    assert [snap["phases"][p]["count"] for p in PHASES] == [0] * len(PHASES)
+    assert not any(snap["drift_histogram"].values())
+    assert format_stats(snap).startswith("Lượt kiểm tra: 0  |  Lần sửa: 0")
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from task_executor import DONE, FAILED, PENDING, CoalescingExecutor
+
+
+class _Gate:
+    """Tác vụ chặn đến khi được mở, để giữ worker bận trong lúc gửi thêm"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.started.set()
+        assert self.release.wait(5)
+        return "gate"
+
+
+def test_same_key_coalesces_to_latest_submission():
+    executor = CoalescingExecutor()
+    gate = _Gate()
+    runs = []
+    executor.submit("busy", "busy", gate)
+    assert gate.started.wait(2)
+
+    tasks = [executor.submit(("rearrange", "Client"), "Sắp xếp", runs.append, i) for i in range(10)]
+    assert all(task is tasks[0] for task in tasks)
+    assert tasks[0].coalesced == 9
+    assert executor.pending() == [tasks[0]]
+
+    gate.release.set()
+    assert executor.join(2)
+    assert runs == [9]
+    assert tasks[0].status == DONE
+    assert executor.completed == 2
+    executor.shutdown(wait=True)
+
+
+def test_different_keys_queue_without_coalescing():
+    executor = CoalescingExecutor()
+    gate = _Gate()
+    order = []
+    executor.submit("busy", "busy", gate)
+    assert gate.started.wait(2)
+
+    tasks = [executor.submit((action, "Client"), action, order.append, action)
+             for action in ("capture", "restore", "rearrange")]
+    tasks.append(executor.submit(("rearrange", "Other"), "rearrange", order.append, "other"))
+    assert executor.pending() == tasks
+    # Một worker: các key khác nhau chạy lần lượt theo thứ tự gửi, không tác vụ nào bị bỏ
+    gate.release.set()
+    assert executor.join(2)
+    assert order == ["capture", "restore", "rearrange", "other"]
+    assert all(task.status == DONE and task.coalesced == 0 for task in tasks)
+    executor.shutdown(wait=True)
+
+
+def test_resubmit_while_running_queues_one_more_pass():
+    executor = CoalescingExecutor()
+    gate = _Gate()
+    first = executor.submit("key", "pass", gate)
+    assert gate.started.wait(2)
+    second = executor.submit("key", "pass", lambda: "again")
+    assert second is not first
+    gate.release.set()
+    assert executor.join(2)
+    assert (first.result, second.result) == ("gate", "again")
+    executor.shutdown(wait=True)
+
+
+def test_failed_task_does_not_stop_worker():
+    executor = CoalescingExecutor()
+    failed = executor.submit("a", "lỗi", lambda: 1 / 0)
+    ok = executor.submit("b", "ok", lambda: 42)
+    assert executor.join(2)
+    assert failed.status == FAILED and isinstance(failed.error, ZeroDivisionError)
+    assert ok.result == 42
+    executor.shutdown(wait=True)
+
+
+def test_shutdown_drains_cleanly():
+    updates = []
+    executor = CoalescingExecutor(on_update=lambda task: updates.append((task.label, task.status)))
+    gate = _Gate()
+    running = executor.submit("busy", "busy", gate)
+    assert gate.started.wait(2)
+    dropped = executor.submit("later", "later", lambda: "never")
+
+    threading.Timer(0.05, gate.release.set).start()
+    start = time.monotonic()
+    assert executor.shutdown(wait=True, timeout=2)
+    assert time.monotonic() - start < 1.0
+    # Tác vụ đang chạy kết thúc bình thường, tác vụ đang chờ bị bỏ, worker đã thoát
+    assert running.status == DONE
+    assert dropped.status == PENDING and dropped.result is None
+    assert executor.pending() == []
+    assert ("later", "running") not in updates
+    assert not [t for t in threading.enumerate() if t.name == executor.name]
+    with pytest.raises(RuntimeError):
+        executor.submit("after", "after", lambda: None)
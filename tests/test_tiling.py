@@ -0,0 +1,46 @@
+import sys
+
+import pytest
+
+import window_manager
+from window_tiling import TilingTemplate, generate_tiling, parse_template
+
+
+def test_tiles_are_spaced_by_tile_size_and_centred():
+    # Lưới 3x2 ô 16:9 trong 1920x1080: ô bị giới hạn theo chiều rộng nên thấp hơn ô lưới
+    slots = generate_tiling(TilingTemplate(columns=3, aspect_ratio=16 / 9, overlap=8), 6)
+    xs = sorted({x for x, _, _, _ in slots})
+    ys = sorted({y for _, y, _, _ in slots})
+    _, _, width, height = slots[0]
+    assert height < 1080 / 2
+    # Các ô liền kề chồng `overlap` pixel (sai số làm tròn 1px), không có khe hở
+    assert all(abs(b - a - (width - 8)) <= 1 for a, b in zip(xs, xs[1:]))
+    assert all(abs(b - a - (height - 8)) <= 1 for a, b in zip(ys, ys[1:]))
+    # Lưới căn giữa vùng làm việc
+    assert abs(xs[0] - (1920 - (xs[-1] + width))) <= 1
+    assert abs(ys[0] - (1080 - (ys[-1] + height))) <= 1
+
+
+def test_filled_grid_covers_work_area():
+    slots = generate_tiling(TilingTemplate(work_area=(100, 50, 1600, 900), columns=2, rows=2), 4)
+    assert slots[0][:2] == (100, 50)
+    x, y, w, h = slots[-1]
+    assert (x + w, y + h) == (1700, 950)
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"columns": True}, "--columns cần một giá trị"),
+    ({"aspect": "wide"}, "--aspect không hợp lệ: wide"),
+    ({"work-area": "0,0,1920"}, "--work-area cần dạng x,y,width,height"),
+    ({"work-area": True}, "--work-area cần dạng x,y,width,height"),
+])
+def test_parse_template_rejects_bad_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        parse_template(options)
+
+
+def test_cli_reports_bad_template_without_traceback(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["window_manager.py", "rearrange", "Client", "--columns", "--rows", "2"])
+    window_manager.main()
+    assert "✗ Mẫu lưới không hợp lệ: --columns cần một giá trị" in capsys.readouterr().out
@@ -0,0 +1,29 @@
+from window_backends import SimulatedBackend
+from window_trace import TraceReader, TraceRecorder, TraceReplay
+
+
+def _record(path, backend, samples: int = 20, interval: float = 0.5):
+    clock = [0.0]
+    with TraceRecorder(str(path), interval, clock=lambda: clock[0]) as recorder:
+        for _ in range(samples):
+            recorder.sample(backend.get_all_windows())
+            clock[0] += interval
+
+
+def test_replay_restores_manager_backend_and_clock(tmp_path, make_manager):
+    backend = SimulatedBackend(drift_rate=0.05, seed=16)
+    backend.add_grid("Client", 6, columns=3)
+    manager = make_manager(backend)
+    manager.capture_windows("Client")
+    path = tmp_path / "session.wmt"
+    _record(path, backend)
+    clock = manager.clock
+
+    with TraceReader(str(path)) as trace:
+        replay = TraceReplay(trace)
+        report = replay.run(manager, "Client", interval=0.5)
+
+    assert report.ticks > 0
+    assert manager.backend is backend
+    assert manager.clock is clock
+    assert not manager.monitoring
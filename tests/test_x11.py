@@ -0,0 +1,198 @@
+import os
+import select
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("Xlib")
+
+from Xlib import X, Xatom, display  # noqa: E402
+
+from window_backends import X11Backend  # noqa: E402
+
+FRAME = (2, 2, 20, 2)  # Viền giả lập (trái, phải, trên, dưới) được báo qua _NET_FRAME_EXTENTS
+
+
+@pytest.fixture(scope="module")
+def xvfb():
+    """Display của một Xvfb riêng cho module test; bỏ qua nếu máy không có Xvfb"""
+    binary = shutil.which("Xvfb")
+    if binary is None:
+        pytest.skip("cần Xvfb")
+    number = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X11-unix/X{n}"))
+    process = subprocess.Popen([binary, f":{number}", "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            pytest.skip("Xvfb không khởi động được")
+        time.sleep(0.05)
+    yield f":{number}"
+    process.terminate()
+    process.wait()
+
+
+class _MiniWM(threading.Thread):
+    """
+    Window manager EWMH tối thiểu: duy trì _NET_CLIENT_LIST, báo viền khung
+    qua _NET_FRAME_EXTENTS và xử lý _NET_MOVERESIZE_WINDOW như một WM thật
+    (vị trí là góc khung ngoài, kích thước là của vùng client)
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name="mini-wm", daemon=True)
+        self.display = display.Display(name)
+        self.root = self.display.screen().root
+        self.atoms = {a: self.display.intern_atom(a) for a in
+                      ("_NET_CLIENT_LIST", "_NET_FRAME_EXTENTS", "_NET_MOVERESIZE_WINDOW")}
+        self.clients = []
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.root.change_attributes(event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
+        self._publish()
+        self.display.sync()
+        self.ready.set()
+        while not self.stopped.is_set():
+            while self.display.pending_events():
+                self._handle(self.display.next_event())
+            select.select([self.display.fileno()], [], [], 0.05)
+        self.display.close()
+
+    def _publish(self):
+        self.root.change_property(self.atoms["_NET_CLIENT_LIST"], Xatom.WINDOW, 32,
+                                  [w.id for w in self.clients])
+
+    def _handle(self, event):
+        if event.type == X.MapRequest:
+            window = event.window
+            window.change_property(self.atoms["_NET_FRAME_EXTENTS"], Xatom.CARDINAL, 32, list(FRAME))
+            window.map()
+            self.clients.append(window)
+            self._publish()
+        elif event.type == X.ConfigureRequest:
+            event.window.configure(x=event.x, y=event.y, width=event.width, height=event.height)
+        elif event.type == X.ClientMessage and event.client_type == self.atoms["_NET_MOVERESIZE_WINDOW"]:
+            _, x, y, width, height = event.data[1]
+            left, _, top, _ = FRAME
+            event.window.configure(x=x + left, y=y + top, width=width, height=height)
+        self.display.flush()
+
+    def stop(self):
+        self.stopped.set()
+        self.join(2)
+
+
+@pytest.fixture
+def ewmh(xvfb):
+    """(display client để tạo cửa sổ, hàm tạo cửa sổ) trên Xvfb có _MiniWM chạy"""
+    wm = _MiniWM(xvfb)
+    wm.start()
+    assert wm.ready.wait(5)
+    client = display.Display(xvfb)
+    root = client.screen().root
+    utf8 = client.intern_atom("UTF8_STRING")
+    net_wm_name = client.intern_atom("_NET_WM_NAME")
+    created = []
+
+    def create(title, x, y, width, height):
+        window = root.create_window(x, y, width, height, 0, X.CopyFromParent)
+        window.change_property(net_wm_name, utf8, 8, title.encode("utf-8"))
+        window.map()
+        created.append(window)
+        client.sync()
+        return window
+
+    yield client, create
+    for window in created:
+        window.destroy()
+    client.close()
+    wm.stop()
+
+
+def _wait_until(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def _frame_rect(x, y, width, height):
+    left, right, top, bottom = FRAME
+    return (x - left, y - top, width + left + right, height + top + bottom)
+
+
+def test_enumerate_move_and_resize_through_ewmh(xvfb, ewmh):
+    client, create = ewmh
+    backend = X11Backend(xvfb)
+    try:
+        for i in range(3):
+            create(f"Client #{i} — thử", 100 + i * 400, 100, 320, 240)
+
+        def clients():
+            return [w for w in backend.get_all_windows() if w.title.startswith("Client #")]
+
+        assert _wait_until(lambda: len(clients()) == 3)
+        assert backend.ewmh
+        windows = sorted(clients(), key=lambda w: w.title)
+        assert [w.title for w in windows] == [f"Client #{i} — thử" for i in range(3)]
+        assert all(w.visible for w in windows)
+        assert [(w.left, w.top, w.width, w.height) for w in windows] == \
+            [_frame_rect(100 + i * 400, 100, 320, 240) for i in range(3)]
+
+        # Di chuyển: hình học đích là của khung ngoài
+        window = windows[1]
+        backend.set_geometry(window, 600, 300, window.width, window.height)
+
+        def moved():
+            backend.refresh([window])
+            return (window.left, window.top) == (600, 300)
+
+        assert _wait_until(moved)
+        assert (window.width, window.height) == _frame_rect(0, 0, 320, 240)[2:]
+
+        # Đổi kích thước cùng lúc với di chuyển, qua một batch
+        batch = backend.begin_batch(2)
+        batch.add(windows[0], 0, 0, 644, 502)
+        batch.add(windows[2], 700, 600, 404, 322)
+        batch.commit()
+        targets = {windows[0].handle: (0, 0, 644, 502), windows[2].handle: (700, 600, 404, 322)}
+
+        def placed():
+            current = {w.handle: (w.left, w.top, w.width, w.height) for w in clients()}
+            return all(current[h] == rect for h, rect in targets.items())
+
+        assert _wait_until(placed)
+        geometry = client.create_resource_object("window", windows[0].handle).get_geometry()
+        assert (geometry.width, geometry.height) == (640, 480)  # Vùng client không gồm viền
+    finally:
+        backend.close()
+
+
+def test_capture_and_restore_through_manager(xvfb, ewmh, make_manager):
+    client, create = ewmh
+    windows = [create(f"Game #{i}", 50 + i * 500, 50, 480, 270) for i in range(2)]
+    backend = X11Backend(xvfb)
+    try:
+        manager = make_manager(backend)
+        assert _wait_until(lambda: len(manager.get_windows_by_title("Game #")) == 2)
+        manager.capture_windows("Game #")
+        saved = [(w.x, w.y, w.width, w.height) for w in manager.windows_data["Game #"]]
+
+        windows[0].configure(x=900, y=500, width=200, height=150)  # Qua WM (ConfigureRequest)
+        client.sync()
+        assert _wait_until(lambda: windows[0].get_geometry().width == 200)
+        result = manager.restore_windows("Game #")
+        assert len(result.applied) == 1
+        assert result.unconverged == []
+        current = sorted((w.left, w.top, w.width, w.height) for w in manager.get_windows_by_title("Game #"))
+        assert current == sorted(saved)
+    finally:
+        backend.close()
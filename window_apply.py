@@ -0,0 +1,342 @@
+"""
+Áp dụng kế hoạch layout (vị trí/kích thước) cho nhiều cửa sổ
+Bỏ qua cửa sổ đã nằm trong sai số, đặt vị trí + kích thước bằng một lệnh
+và commit tất cả trong một batch nếu backend hỗ trợ
+
+ConcurrentApplier chạy các lệnh trên pool worker có giới hạn với hạn chót
+cho từng cửa sổ, nên một cửa sổ bị treo không chặn cả lượt áp dụng
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from window_backends import WindowBackend, window_handle
+
+Rect = Tuple[int, int, int, int]  # (x, y, width, height)
+
+
+@dataclass
+class PlannedMove:
+    """Một cửa sổ cần đưa về slot"""
+    window: object
+    current: Rect
+    target: Rect
+    index: int = 0  # Vị trí của cửa sổ trong danh sách hiện tại
+    slot: int = 0   # Slot đích trong layout đã lưu
+
+    def within(self, tolerance: int) -> bool:
+        """Cửa sổ đã nằm trong sai số cho phép so với slot đích chưa"""
+        return all(abs(c - t) <= tolerance for c, t in zip(self.current, self.target))
+
+
+@dataclass
+class ApplyResult:
+    """Kết quả một lần áp dụng layout"""
+    applied: List[PlannedMove] = field(default_factory=list)
+    skipped: List[PlannedMove] = field(default_factory=list)
+    failed: List[Tuple[PlannedMove, Exception]] = field(default_factory=list)
+    timed_out: List[PlannedMove] = field(default_factory=list)    # Quá hạn chót, bị cách ly
+    quarantined: List[PlannedMove] = field(default_factory=list)  # Đang cách ly, chưa đến lượt thử lại
+    unconverged: List[PlannedMove] = field(default_factory=list)  # Đã áp dụng nhưng đọc lại không đúng slot
+    calls: int = 0          # Số lệnh gọi sang hệ thống đã thực hiện
+    batched: bool = False   # Đã commit bằng một batch hay chưa
+
+    def summary(self) -> str:
+        mode = " (batch)" if self.batched else ""
+        text = (f"{len(self.applied)} đã áp dụng, {len(self.skipped)} bỏ qua, "
+                f"{len(self.timed_out)} quá hạn, {len(self.failed)} lỗi - {self.calls} lệnh gọi{mode}")
+        if self.quarantined:
+            text += f", {len(self.quarantined)} đang cách ly"
+        if self.unconverged:
+            text += f", {len(self.unconverged)} không giữ vị trí"
+        return text
+
+
+def verify_applied(result: ApplyResult, tolerance: int = 0, backend=None) -> List[PlannedMove]:
+    """
+    Đọc lại hình học các cửa sổ đã áp dụng; cửa sổ không nằm trong slot
+    (sai số `tolerance`) được thêm vào `result.unconverged`. Có `backend` thì
+    gọi `backend.refresh()` trước để đọc giá trị thật từ hệ thống
+    """
+    if backend is not None and result.applied:
+        backend.refresh([move.window for move in result.applied])
+    for move in result.applied:
+        window = move.window
+        try:
+            current = (window.left, window.top, window.width, window.height)
+        except Exception:
+            continue  # Cửa sổ vừa đóng
+        if any(abs(a - b) > tolerance for a, b in zip(current, move.target)):
+            result.unconverged.append(move)
+    return result.unconverged
+
+
+def _at_target(move: PlannedMove) -> bool:
+    """Cửa sổ đã nằm đúng slot đích chưa (đọc hình học hiện tại)"""
+    window = move.window
+    try:
+        return (window.left, window.top, window.width, window.height) == tuple(move.target)
+    except Exception:
+        return False
+
+
+def _commit_batch(backend: WindowBackend, moves: List[PlannedMove]) -> int:
+    """Áp dụng tất cả trong một batch, trả về số lệnh gọi"""
+    geometry_batch = backend.begin_batch(len(moves))
+    for move in moves:
+        geometry_batch.add(move.window, *move.target)
+    return geometry_batch.commit()
+
+
+def apply_layout(backend: WindowBackend, moves: List[PlannedMove], tolerance: int = 0,
+                 batch: bool = True, result: Optional[ApplyResult] = None) -> ApplyResult:
+    """
+    Áp dụng kế hoạch layout
+
+    Args:
+        backend: Backend dùng để đặt hình học cửa sổ
+        moves: Các cửa sổ và slot đích
+        tolerance: Cửa sổ lệch không quá giá trị này (pixel) sẽ được bỏ qua
+        batch: Cho phép commit tất cả trong một batch nếu backend hỗ trợ
+    """
+    if result is None:
+        result = ApplyResult()
+    pending = []
+    for move in moves:
+        if move.within(tolerance):
+            result.skipped.append(move)
+        else:
+            pending.append(move)
+    if not pending:
+        return result
+
+    if batch and backend.supports_batch and len(pending) > 1:
+        try:
+            result.calls += _commit_batch(backend, pending)
+            result.applied.extend(pending)
+            result.batched = True
+            return result
+        except Exception:
+            # Batch lỗi (vd: một cửa sổ vừa đóng) → áp dụng từng cửa sổ
+            pass
+
+    for move in pending:
+        try:
+            result.calls += backend.set_geometry(move.window, *move.target)
+            result.applied.append(move)
+        except Exception as e:
+            result.failed.append((move, e))
+    return result
+
+
+class _WorkerPool:
+    """
+    Pool thread daemon có giới hạn
+
+    Thread bị treo trong một lệnh gọi không chặn tiến trình thoát. Mỗi thread
+    bị coi là treo được thay bằng một thread mới; khi lệnh treo cuối cùng trả
+    về, thread dư sẽ tự thoát để số thread làm việc luôn là `max_workers`.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._excess = 0
+
+    def _spawn(self):
+        self._threads += 1
+        threading.Thread(target=self._worker, daemon=True, name="apply-worker").start()
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        with self._lock:
+            if self._threads - self._excess < self.max_workers:
+                self._spawn()
+        return future
+
+    def replace_hung(self):
+        """Một thread đang treo: thêm thread thay thế"""
+        with self._lock:
+            self._excess += 1
+            self._spawn()
+
+    def _worker(self):
+        while True:
+            future, fn, args = self._queue.get()
+            if future.set_running_or_notify_cancel():
+                future.started = time.monotonic()
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._lock:
+                if self._excess > 0:
+                    self._excess -= 1
+                    self._threads -= 1
+                    return
+
+
+@dataclass
+class _Quarantine:
+    failures: int
+    retry_at: float
+    future: Future  # Lệnh gọi quá hạn gần nhất (có thể vẫn đang treo)
+    shared: bool = False  # Lệnh là một batch nhiều cửa sổ: thử lại khi hết hạn dù batch còn treo
+
+
+class ConcurrentApplier:
+    """
+    Áp dụng layout song song với hạn chót cho từng cửa sổ
+
+    - Các lệnh gọi chạy trên pool `max_workers` thread; khi mỗi lệnh chậm
+      (game đang bận), một lượt mất khoảng ceil(n / max_workers) lần thời gian
+      một lệnh thay vì n lần: gần như không đổi khi n <= max_workers
+    - Cửa sổ không trả về trong `timeout` giây bị cách ly: các lượt sau bỏ
+      qua nó, thử lại sau `retry_base`, `2 * retry_base`, ... (tối đa
+      `retry_max`) giây, và không bao giờ gửi thêm lệnh khi lệnh trước còn treo
+    - Backend hỗ trợ batch: thử commit một batch trước (cũng có hạn chót),
+      lỗi thì áp dụng từng cửa sổ. Batch quá hạn thì chưa biết cửa sổ nào
+      treo: các cửa sổ batch chưa đặt xong cùng bị cách ly, hết hạn cách ly
+      thì được thử lại riêng từng cửa sổ (ngoài batch) để tìm ra cửa sổ treo
+    """
+
+    def __init__(self, max_workers: int = 16, timeout: float = 2.0,
+                 retry_base: float = 5.0, retry_max: float = 120.0):
+        """
+        Args:
+            max_workers: Số lệnh gọi chạy đồng thời tối đa
+            timeout: Hạn chót cho mỗi cửa sổ, tính từ lúc lệnh bắt đầu chạy (giây)
+            retry_base: Thời gian cách ly sau lần quá hạn đầu tiên (giây)
+            retry_max: Thời gian cách ly tối đa (giây)
+        """
+        if max_workers < 1 or timeout <= 0:
+            raise ValueError("Cần max_workers >= 1 và timeout > 0")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.quarantine: Dict[object, _Quarantine] = {}
+        self._pool = _WorkerPool(max_workers)
+
+    def apply(self, backend: WindowBackend, moves: List[PlannedMove], tolerance: int = 0,
+              batch: bool = True, result: Optional[ApplyResult] = None) -> ApplyResult:
+        """Giống `apply_layout`, thêm hạn chót và cách ly cửa sổ bị treo"""
+        if result is None:
+            result = ApplyResult()
+        now = time.monotonic()
+        pending = []
+        for move in moves:
+            if move.within(tolerance):
+                result.skipped.append(move)
+                continue
+            q = self.quarantine.get(window_handle(move.window))
+            if q is not None and (now < q.retry_at or not (q.shared or q.future.done())):
+                result.quarantined.append(move)
+                continue
+            pending.append(move)
+        if not pending:
+            return result
+
+        # Cửa sổ đang bị cách ly không vào batch: nếu nó vẫn treo, cả batch treo theo
+        batched = [move for move in pending if window_handle(move.window) not in self.quarantine]
+        if batch and backend.supports_batch and len(batched) > 1:
+            solo = [move for move in pending if window_handle(move.window) in self.quarantine]
+            future = self._pool.submit(_commit_batch, backend, batched)
+            if self._wait_started(future, time.monotonic() + self.timeout * 2):
+                if future.exception() is None:
+                    result.calls += future.result()
+                    result.applied.extend(batched)
+                    result.batched = True
+                    pending = solo
+                # Batch lỗi (vd: một cửa sổ vừa đóng) → áp dụng từng cửa sổ
+            elif not future.cancel():
+                # Batch bị treo bởi một cửa sổ chưa biết là cửa sổ nào: không gửi lại
+                # ngay cho các cửa sổ của batch, lệnh thứ hai tới cửa sổ treo cũng sẽ treo
+                self._pool.replace_hung()
+                now = time.monotonic()
+                for move in batched:
+                    if _at_target(move):
+                        result.applied.append(move)  # Batch đã đặt xong trước khi treo
+                    else:
+                        self._quarantine(move, future, now, shared=True)
+                        result.timed_out.append(move)
+                pending = solo
+
+        tasks = [(move, self._pool.submit(backend.set_geometry, move.window, *move.target))
+                 for move in pending]
+        # Lệnh chưa được bắt đầu khi pool bị các cửa sổ treo chiếm hết cũng có giới hạn
+        give_up = time.monotonic() + self.timeout * (math.ceil(len(tasks) / self.max_workers) + 1)
+        while tasks:
+            now = time.monotonic()
+            waiting = []
+            next_deadline = give_up
+            for move, future in tasks:
+                started = getattr(future, "started", None)
+                if future.done():
+                    self._finish(move, future, result)
+                elif started is not None and now - started >= self.timeout:
+                    self._time_out(move, future, result, now)
+                elif now >= give_up:
+                    if future.cancel():
+                        result.timed_out.append(move)
+                    else:
+                        self._time_out(move, future, result, now)
+                else:
+                    if started is not None:
+                        next_deadline = min(next_deadline, started + self.timeout)
+                    waiting.append((move, future))
+            tasks = waiting
+            if tasks:
+                wait([f for _, f in tasks], timeout=max(next_deadline - now, 0.001),
+                     return_when=FIRST_COMPLETED)
+        return result
+
+    def _wait_started(self, future: Future, give_up: float) -> bool:
+        """
+        Chờ lệnh xong trong `timeout` giây kể từ lúc nó bắt đầu chạy (hoặc
+        đến `give_up` nếu chưa được chạy). Trả về True nếu đã xong
+        """
+        while not future.done():
+            started = getattr(future, "started", None)
+            deadline = started + self.timeout if started is not None else give_up
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            wait([future], timeout=remaining)
+        return True
+
+    def _finish(self, move: PlannedMove, future: Future, result: ApplyResult):
+        error = future.exception()
+        if error is not None:
+            result.failed.append((move, error))
+            return
+        result.calls += future.result()
+        result.applied.append(move)
+        self.quarantine.pop(window_handle(move.window), None)
+
+    def _time_out(self, move: PlannedMove, future: Future, result: ApplyResult, now: float):
+        result.timed_out.append(move)
+        self._pool.replace_hung()
+        self._quarantine(move, future, now)
+
+    def _quarantine(self, move: PlannedMove, future: Future, now: float, shared: bool = False):
+        handle = window_handle(move.window)
+        previous = self.quarantine.get(handle)
+        failures = previous.failures + 1 if previous else 1
+        delay = min(self.retry_base * 2 ** (failures - 1), self.retry_max)
+        self.quarantine[handle] = _Quarantine(failures, now + delay, future, shared)
+
+    def retry_in(self, window) -> Optional[float]:
+        """Số giây còn lại trước khi cửa sổ được thử lại (None nếu không bị cách ly)"""
+        q = self.quarantine.get(window_handle(window))
+        if q is None:
+            return None
+        return max(q.retry_at - time.monotonic(), 0.0)
@@ -0,0 +1,225 @@
+"""
+API asyncio cho WindowManager
+Các lệnh capture/restore/rearrange là coroutine, monitor là task có thể hủy
+thay vì thread riêng; lệnh gọi sang backend (chặn) chạy trong executor. Nhiều
+monitor dùng chung một event loop, thay đổi được gửi qua async iterator
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from window_apply import ApplyResult
+from window_manager import WindowManager
+from window_oscillation import OscillationEvent
+from window_scheduler import AdaptiveScheduler
+from window_tiling import TilingTemplate
+
+
+@dataclass(frozen=True)
+class WindowChange:
+    """Một lần monitor phát hiện thay đổi và sắp xếp lại"""
+    pattern: str
+    time: float  # time.time() lúc sắp xếp xong
+    reason: str
+    count: int  # Số tab hiện tại
+    result: Optional[ApplyResult]
+    oscillations: Tuple[OscillationEvent, ...] = ()  # Cửa sổ vừa bị tạm miễn sửa vì dao động
+
+
+class _ChangeQueue:
+    """Hàng đợi thay đổi có giới hạn: khi đầy, bỏ thay đổi cũ nhất để không chặn monitor"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+
+
+class AsyncMonitor:
+    """
+    Monitor một pattern chạy như asyncio task
+
+    Duyệt bằng `async for change in monitor` để nhận các thay đổi; vòng lặp
+    kết thúc khi monitor bị dừng.
+    """
+
+    _DONE = object()
+
+    def __init__(self, owner: "AsyncWindowManager", pattern: str, interval: float, tolerance: int,
+                 scheduler: Optional[AdaptiveScheduler], max_pending: int):
+        self.owner = owner
+        self.pattern = pattern
+        self.interval = interval
+        self.tolerance = tolerance
+        self.scheduler = scheduler
+        self.checks = 0
+        self._changes = _ChangeQueue(max_pending)
+        self.task: asyncio.Task = asyncio.ensure_future(self._run())
+        self.task.add_done_callback(lambda _: self._changes.put(self._DONE))
+
+    @property
+    def running(self) -> bool:
+        return not self.task.done()
+
+    @property
+    def dropped(self) -> int:
+        """Số thay đổi bị bỏ vì không ai đọc kịp"""
+        return self._changes.dropped
+
+    async def _run(self):
+        owner = self.owner
+        state: Dict = {"last_count": 0}
+        while True:
+            try:
+                changed = await owner._call(owner._check, self.pattern, self.tolerance, state, self.scheduler)
+            except Exception as e:
+                print(f"✗ Lỗi trong quá trình giám sát: {e}")
+                changed = False
+            self.checks += 1
+            if changed:
+                change = WindowChange(self.pattern, time.time(), state.pop("reason", ""),
+                                      state["last_count"], state.pop("result", None),
+                                      tuple(state.pop("oscillations", ())))
+                self._changes.put(change)
+                owner._publish(change)
+            await asyncio.sleep(self.scheduler.next_interval() if self.scheduler is not None else self.interval)
+
+    async def stop(self):
+        """Hủy task monitor và chờ nó kết thúc"""
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> WindowChange:
+        item = await self._changes.queue.get()
+        if item is self._DONE:
+            self._changes.put(self._DONE)  # Cho các lần đọc sau cũng kết thúc
+            raise StopAsyncIteration
+        return item
+
+
+class AsyncWindowManager:
+    """
+    Bọc WindowManager cho asyncio
+
+    Mọi lệnh gọi tới WindowManager chạy lần lượt trong một executor riêng
+    (mặc định một thread), nên không cần khóa và event loop không bao giờ bị
+    chặn. Dùng `async with AsyncWindowManager() as wm:` để dừng monitor và
+    executor khi xong.
+    """
+
+    def __init__(self, manager: Optional[WindowManager] = None, executor: Optional[Executor] = None,
+                 max_pending: int = 100, **manager_options):
+        """
+        Args:
+            manager: WindowManager có sẵn (mặc định tạo mới với `manager_options`)
+            executor: Executor cho các lệnh gọi chặn. Mặc định một thread riêng;
+                executor nhiều thread thì WindowManager có thể bị gọi đồng thời
+            max_pending: Số thay đổi tối đa chờ đọc ở mỗi iterator
+        """
+        self.manager = manager or WindowManager(**manager_options)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="window-manager")
+        self.max_pending = max_pending
+        self.monitors: Dict[str, AsyncMonitor] = {}
+        self._subscribers: Set[_ChangeQueue] = set()
+
+    async def _call(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    def _check(self, pattern: str, tolerance: int, state: Dict,
+               scheduler: Optional[AdaptiveScheduler]) -> bool:
+        manager = self.manager
+        manager.reload_if_changed()
+        changed = manager._check_windows(pattern, tolerance, state, scheduler=scheduler)
+        manager.metrics.maybe_export()
+        return changed
+
+    def _publish(self, change: WindowChange):
+        for subscriber in self._subscribers:
+            subscriber.put(change)
+
+    async def windows(self, pattern: str) -> List:
+        """Các cửa sổ đang hiển thị khớp pattern"""
+        return await self._call(self.manager.get_windows_by_title, pattern)
+
+    async def capture(self, pattern: str):
+        await self._call(self.manager.capture_windows, pattern)
+
+    async def restore(self, pattern: str) -> Optional[ApplyResult]:
+        return await self._call(self.manager.restore_windows, pattern)
+
+    async def rearrange(self, pattern: str, tolerance: int = 0,
+                        template: Optional[TilingTemplate] = None) -> Optional[ApplyResult]:
+        return await self._call(self.manager.rearrange_windows, pattern, tolerance=tolerance, template=template)
+
+    def monitor(self, pattern: str, interval: float = 2.0, tolerance: int = 10,
+                scheduler: Optional[AdaptiveScheduler] = None) -> AsyncMonitor:
+        """
+        Bắt đầu giám sát pattern trong event loop đang chạy (thay monitor cũ của pattern nếu có)
+
+        Args:
+            interval: Khoảng thời gian giữa các lần kiểm tra (giây)
+            tolerance: Sai số cho phép cho vị trí/kích thước (pixel)
+            scheduler: Bộ lập lịch thích ứng thay cho `interval` cố định
+        """
+        previous = self.monitors.get(pattern)
+        if previous is not None:
+            previous.task.cancel()
+        monitor = AsyncMonitor(self, pattern, interval, tolerance, scheduler, self.max_pending)
+        self.monitors[pattern] = monitor
+        monitor.task.add_done_callback(
+            lambda _: self.monitors.pop(pattern, None) if self.monitors.get(pattern) is monitor else None
+        )
+        return monitor
+
+    async def stop_monitor(self, pattern: str):
+        monitor = self.monitors.get(pattern)
+        if monitor is not None:
+            await monitor.stop()
+
+    async def changes(self):
+        """Async iterator các thay đổi của tất cả monitor (kể cả monitor bắt đầu sau)"""
+        subscriber = _ChangeQueue(self.max_pending)
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                yield await subscriber.queue.get()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def stats(self) -> Dict:
+        return self.manager.stats()
+
+    async def close(self):
+        """Dừng tất cả monitor và executor riêng"""
+        monitors = list(self.monitors.values())
+        for monitor in monitors:
+            monitor.task.cancel()
+        await asyncio.gather(*(m.task for m in monitors), return_exceptions=True)
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,646 @@
+"""
+Backend truy cập cửa sổ của hệ điều hành
+WindowManager chỉ làm việc qua giao diện WindowBackend nên có thể thay
+pygetwindow bằng backend khác (giả lập, Linux/X11, ...)
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def window_handle(window):
+    """Định danh ổn định của cửa sổ giữa các lần liệt kê (HWND trên Windows)"""
+    handle = getattr(window, "handle", None)
+    if handle is None:
+        handle = getattr(window, "_hWnd", None)
+    return handle if handle is not None else id(window)
+
+
+class WindowBackend:
+    """
+    Giao diện chung cho các backend cửa sổ
+
+    Mỗi cửa sổ trả về cần có các thuộc tính `title`, `visible`, `left`, `top`,
+    `width`, `height` và các phương thức `moveTo(x, y)`, `resizeTo(w, h)`
+    giống pygetwindow.
+    """
+
+    name = "base"
+    supports_batch = False  # Có hỗ trợ áp dụng nhiều cửa sổ trong một lần commit không
+
+    def get_all_windows(self) -> List:
+        """Liệt kê tất cả cửa sổ top-level"""
+        raise NotImplementedError
+
+    def set_geometry(self, window, x: int, y: int, width: int, height: int) -> int:
+        """
+        Đặt vị trí và kích thước cửa sổ
+        Trả về số lệnh gọi sang hệ thống đã thực hiện
+        """
+        window.moveTo(x, y)
+        window.resizeTo(width, height)
+        return 2
+
+    def begin_batch(self, count: int) -> "GeometryBatch":
+        """Bắt đầu một batch thay đổi hình học (chỉ khi supports_batch)"""
+        raise NotImplementedError
+
+    def refresh(self, windows: List):
+        """
+        Đọc lại hình học thật của các cửa sổ từ hệ thống (trước khi kiểm tra
+        vị trí sau khi áp dụng). Mặc định không làm gì: thuộc tính của cửa sổ
+        pygetwindow/giả lập luôn là giá trị hiện tại
+        """
+
+    def process_name(self, window) -> Optional[str]:
+        """Tên file thực thi của tiến trình sở hữu cửa sổ (vd: chrome.exe), None nếu không biết"""
+        return getattr(window, "process_name", None)
+
+    def window_class(self, window) -> Optional[str]:
+        """Lớp cửa sổ (vd: Chrome_WidgetWin_1), None nếu không biết"""
+        return getattr(window, "window_class", None)
+
+
+class GeometryBatch:
+    """Một batch thay đổi hình học được commit cùng lúc"""
+
+    def add(self, window, x: int, y: int, width: int, height: int):
+        raise NotImplementedError
+
+    def commit(self) -> int:
+        """Áp dụng batch, trả về số lệnh gọi sang hệ thống"""
+        raise NotImplementedError
+
+
+class _DeferWindowPosBatch(GeometryBatch):
+    """Batch trên Windows dùng BeginDeferWindowPos/DeferWindowPos/EndDeferWindowPos"""
+
+    SWP_NOZORDER = 0x0004
+    SWP_NOACTIVATE = 0x0010
+
+    def __init__(self, user32, count: int):
+        self._user32 = user32
+        self._hdwp = user32.BeginDeferWindowPos(count)
+        if not self._hdwp:
+            raise OSError("BeginDeferWindowPos thất bại")
+
+    def add(self, window, x: int, y: int, width: int, height: int):
+        hdwp = self._user32.DeferWindowPos(
+            self._hdwp, window._hWnd, None, x, y, width, height,
+            self.SWP_NOZORDER | self.SWP_NOACTIVATE
+        )
+        if not hdwp:
+            raise OSError("DeferWindowPos thất bại")
+        self._hdwp = hdwp
+
+    def commit(self) -> int:
+        if not self._user32.EndDeferWindowPos(self._hdwp):
+            raise OSError("EndDeferWindowPos thất bại")
+        return 1
+
+
+class PyGetWindowBackend(WindowBackend):
+    """Backend mặc định trên Windows dùng pygetwindow"""
+
+    name = "pygetwindow"
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        import pygetwindow as gw
+        self._gw = gw
+        self._user32 = None
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.windll.user32
+            user32.BeginDeferWindowPos.restype = wintypes.HANDLE
+            user32.DeferWindowPos.restype = wintypes.HANDLE
+            user32.DeferWindowPos.argtypes = [
+                wintypes.HANDLE, wintypes.HWND, wintypes.HWND,
+                ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.UINT
+            ]
+            user32.EndDeferWindowPos.argtypes = [wintypes.HANDLE]
+            self._user32 = user32
+            self.supports_batch = True
+
+    def get_all_windows(self) -> List:
+        return self._gw.getAllWindows()
+
+    def set_geometry(self, window, x: int, y: int, width: int, height: int) -> int:
+        hwnd = getattr(window, "_hWnd", None)
+        if self._user32 is None or hwnd is None:
+            return super().set_geometry(window, x, y, width, height)
+        # Một lệnh MoveWindow thay cho moveTo + resizeTo
+        if not self._user32.MoveWindow(hwnd, x, y, width, height, True):
+            raise OSError(f"MoveWindow thất bại cho cửa sổ {hwnd}")
+        return 1
+
+    def begin_batch(self, count: int) -> GeometryBatch:
+        if self._user32 is None:
+            raise NotImplementedError
+        return _DeferWindowPosBatch(self._user32, count)
+
+    def process_name(self, window) -> Optional[str]:
+        hwnd = getattr(window, "_hWnd", None)
+        if self._user32 is None or hwnd is None:
+            return None
+        import ctypes
+        from ctypes import wintypes
+
+        pid = wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        kernel32 = ctypes.windll.kernel32
+        process = kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+        if not process:
+            return None
+        try:
+            size = wintypes.DWORD(260)
+            buffer = ctypes.create_unicode_buffer(size.value)
+            if not kernel32.QueryFullProcessImageNameW(process, 0, buffer, ctypes.byref(size)):
+                return None
+            return buffer.value.rsplit("\\", 1)[-1]
+        finally:
+            kernel32.CloseHandle(process)
+
+    def window_class(self, window) -> Optional[str]:
+        hwnd = getattr(window, "_hWnd", None)
+        if self._user32 is None or hwnd is None:
+            return None
+        import ctypes
+
+        buffer = ctypes.create_unicode_buffer(256)
+        if not self._user32.GetClassNameW(hwnd, buffer, len(buffer)):
+            return None
+        return buffer.value
+
+
+class X11Window:
+    """Cửa sổ X11 (hình học chụp ở lần liệt kê), cùng giao diện với cửa sổ pygetwindow"""
+
+    __slots__ = ("handle", "title", "visible", "left", "top", "width", "height", "frame", "_backend")
+
+    def __init__(self, backend: "X11Backend", handle: int, title: str, visible: bool,
+                 left: int, top: int, width: int, height: int, frame: tuple):
+        self._backend = backend
+        self.handle = handle
+        self.title = title
+        self.visible = visible
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.frame = frame  # Viền khung của window manager: (trái, phải, trên, dưới)
+
+    def moveTo(self, x: int, y: int):
+        self._backend.set_geometry(self, x, y, self.width, self.height)
+
+    def resizeTo(self, width: int, height: int):
+        self._backend.set_geometry(self, self.left, self.top, width, height)
+
+
+class _X11Batch(GeometryBatch):
+    """Gửi tất cả lệnh đặt hình học rồi flush một lần"""
+
+    def __init__(self, backend: "X11Backend"):
+        self._backend = backend
+        self._pending = []
+
+    def add(self, window, x: int, y: int, width: int, height: int):
+        self._pending.append((window, x, y, width, height))
+
+    def commit(self) -> int:
+        backend = self._backend
+        with backend._lock:
+            for move in self._pending:
+                backend._send_geometry(*move)
+            backend.display.flush()
+        return 1
+
+
+class X11Backend(WindowBackend):
+    """
+    Backend Linux/X11 theo chuẩn EWMH, dùng python-xlib
+
+    Giữ một kết nối display suốt vòng đời backend. Mỗi lần liệt kê gửi truy
+    vấn (tiêu đề, hình học, trạng thái, viền khung) của mọi cửa sổ trước rồi
+    mới đọc các trả lời, nên chỉ tốn hai lượt khứ hồi tới X server thay vì
+    vài lượt cho mỗi cửa sổ. Hình học là của khung ngoài (kể cả viền do window
+    manager vẽ) như pygetwindow. Không có window manager EWMH (vd: Xvfb trần)
+    thì dùng các cửa sổ con của root và ConfigureWindow.
+
+    Lệnh đặt hình học là bất đồng bộ: cửa sổ giữ hình học của lần đọc gần nhất
+    cho đến khi liệt kê lại hoặc `refresh()` (đọc lại sau `settle` giây để
+    window manager kịp áp dụng, pipeline như khi liệt kê).
+    """
+
+    name = "x11"
+    supports_batch = True
+    _ATOMS = ("_NET_CLIENT_LIST", "_NET_WM_NAME", "UTF8_STRING", "_NET_WM_STATE",
+              "_NET_WM_STATE_HIDDEN", "_NET_FRAME_EXTENTS", "_NET_MOVERESIZE_WINDOW", "_NET_WM_PID")
+    # _NET_MOVERESIZE_WINDOW: gravity NorthWest, có x/y/rộng/cao, nguồn là pager (2)
+    _MOVERESIZE_FLAGS = 1 | 0xF00 | (2 << 12)
+    _TITLE_LENGTH = 256  # Số từ 32-bit tối đa đọc cho tiêu đề (1 KB)
+
+    def __init__(self, display_name: Optional[str] = None, pipeline: bool = True,
+                 settle: float = 0.05):
+        """
+        Args:
+            display_name: Display X cần kết nối (mặc định biến môi trường DISPLAY)
+            pipeline: Gửi truy vấn của mọi cửa sổ trước khi đọc trả lời. False =
+                chờ trả lời từng truy vấn (chỉ để so sánh hiệu năng)
+            settle: Thời gian (giây) chờ window manager xử lý lệnh di chuyển trước
+                khi `refresh()` đọc lại hình học
+        """
+        import Xlib.threaded  # noqa: F401  Khóa thật cho kết nối dùng chung giữa các thread
+        from Xlib import X, Xatom, display, error
+        from Xlib.protocol import event, request
+
+        self._X = X
+        self._Xatom = Xatom
+        self._error = error
+        self._event = event
+        self._request = request
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.pipeline = pipeline
+        self.settle = settle
+        self.ewmh = True
+        self._lock = threading.Lock()
+        self._atoms = {name: self.display.intern_atom(name) for name in self._ATOMS}
+
+    def close(self):
+        self.display.close()
+
+    def _client_list(self) -> List[int]:
+        """Các cửa sổ top-level: _NET_CLIENT_LIST, hoặc cửa sổ con của root nếu không có WM EWMH"""
+        prop = self.root.get_full_property(self._atoms["_NET_CLIENT_LIST"], self._Xatom.WINDOW, sizehint=4096)
+        self.ewmh = prop is not None
+        if prop is not None:
+            return list(prop.value)
+        return [child.id for child in self.root.query_tree().children]
+
+    def _property(self, handle: int, atom: int, kind: int, length: int = 4):
+        return self._request.GetProperty(display=self.display.display, defer=self.pipeline, delete=False,
+                                         window=handle, property=atom, type=kind,
+                                         long_offset=0, long_length=length)
+
+    def _send_geometry_queries(self, handle: int) -> tuple:
+        request = self._request
+        display = self.display.display
+        defer = self.pipeline
+        return (
+            request.GetGeometry(display=display, defer=defer, drawable=handle),
+            request.TranslateCoords(display=display, defer=defer, src_wid=handle,
+                                    dst_wid=self.root.id, src_x=0, src_y=0),
+            self._property(handle, self._atoms["_NET_FRAME_EXTENTS"], self._Xatom.CARDINAL),
+        )
+
+    def _send_queries(self, handle: int) -> tuple:
+        request = self._request
+        display = self.display.display
+        atoms = self._atoms
+        defer = self.pipeline
+        return self._send_geometry_queries(handle) + (
+            request.GetWindowAttributes(display=display, defer=defer, window=handle),
+            self._property(handle, atoms["_NET_WM_NAME"], atoms["UTF8_STRING"], self._TITLE_LENGTH),
+            self._property(handle, self._Xatom.WM_NAME, self._X.AnyPropertyType, self._TITLE_LENGTH),
+            self._property(handle, atoms["_NET_WM_STATE"], self._Xatom.ATOM, 32),
+        )
+
+    @staticmethod
+    def _frame_geometry(geometry, coords, extents) -> tuple:
+        """(left, top, width, height) của khung ngoài và viền (left, right, top, bottom)"""
+        extents = _property_value(extents, 32)
+        frame = tuple(extents) if extents and len(extents) == 4 else (0, 0, 0, 0)
+        left, right, top, bottom = frame
+        return (coords.x - left, coords.y - top,
+                geometry.width + left + right, geometry.height + top + bottom), frame
+
+    def _window(self, handle: int, replies: tuple) -> X11Window:
+        for reply in replies:
+            reply.reply()
+        geometry, coords, extents, attributes, net_name, name, state = replies
+        net_title = _property_value(net_name, 8)
+        if net_title:
+            title = net_title.decode("utf-8", "replace")
+        elif _property_value(name, 8):
+            encoding = "utf-8" if name.property_type == self._atoms["UTF8_STRING"] else "latin-1"
+            title = _property_value(name, 8).decode(encoding, "replace")
+        else:
+            title = ""
+        visible = (attributes.map_state == self._X.IsViewable
+                   and self._atoms["_NET_WM_STATE_HIDDEN"] not in (_property_value(state, 32) or ()))
+        rect, frame = self._frame_geometry(geometry, coords, extents)
+        return X11Window(self, handle, title, visible, *rect, frame)
+
+    def get_all_windows(self) -> List:
+        XError = self._error.XError
+        windows = []
+        with self._lock:
+            handles = self._client_list()
+            queries = []
+            for handle in handles:
+                try:
+                    queries.append((handle, self._send_queries(handle)))
+                except XError:
+                    continue  # Chỉ xảy ra khi không pipeline: cửa sổ vừa đóng
+            # Trả lời đầu tiên flush toàn bộ truy vấn; các trả lời sau thường đã về
+            for handle, replies in queries:
+                try:
+                    windows.append(self._window(handle, replies))
+                except XError:
+                    continue  # Cửa sổ đóng giữa lúc liệt kê và truy vấn
+        return windows
+
+    def _send_geometry(self, window: X11Window, x: int, y: int, width: int, height: int):
+        left, right, top, bottom = window.frame
+        # Kích thước gửi đi là của vùng client, vị trí là góc trên trái của khung ngoài
+        client_width = max(width - left - right, 1)
+        client_height = max(height - top - bottom, 1)
+        X = self._X
+        if self.ewmh:
+            message = self._event.ClientMessage(
+                window=window.handle, client_type=self._atoms["_NET_MOVERESIZE_WINDOW"],
+                data=(32, [self._MOVERESIZE_FLAGS, x, y, client_width, client_height])
+            )
+            self.root.send_event(message, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask,
+                                 onerror=_ignore_x_error)
+        else:
+            self._request.ConfigureWindow(display=self.display.display, onerror=_ignore_x_error,
+                                          window=window.handle,
+                                          attrs={"x": x + left, "y": y + top,
+                                                 "width": client_width, "height": client_height})
+
+    def set_geometry(self, window, x: int, y: int, width: int, height: int) -> int:
+        with self._lock:
+            self._send_geometry(window, x, y, width, height)
+            self.display.flush()
+        return 1
+
+    def begin_batch(self, count: int) -> GeometryBatch:
+        return _X11Batch(self)
+
+    def refresh(self, windows: List):
+        """Đọc lại hình học khung của `windows` (một lượt khứ hồi cho tất cả)"""
+        if not windows:
+            return
+        if self.ewmh and self.settle > 0:
+            time.sleep(self.settle)  # Window manager xử lý _NET_MOVERESIZE_WINDOW bất đồng bộ
+        XError = self._error.XError
+        with self._lock:
+            queries = []
+            for window in windows:
+                try:
+                    queries.append((window, self._send_geometry_queries(window.handle)))
+                except XError:
+                    continue
+            for window, replies in queries:
+                try:
+                    for reply in replies:
+                        reply.reply()
+                except XError:
+                    continue  # Cửa sổ vừa đóng: giữ hình học cũ
+                rect, window.frame = self._frame_geometry(*replies)
+                window.left, window.top, window.width, window.height = rect
+
+    def process_name(self, window) -> Optional[str]:
+        """Tên tiến trình từ _NET_WM_PID (chỉ với client chạy trên cùng máy)"""
+        try:
+            with self._lock:
+                prop = self._property(window.handle, self._atoms["_NET_WM_PID"], self._Xatom.CARDINAL, 1)
+                prop.reply()
+            pid = _property_value(prop, 32)
+            if not pid:
+                return None
+            with open(f"/proc/{pid[0]}/comm", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except (OSError, self._error.XError):
+            return None
+
+    def window_class(self, window) -> Optional[str]:
+        """Lớp cửa sổ (phần class của WM_CLASS, vd: "firefox")"""
+        try:
+            with self._lock:
+                prop = self._property(window.handle, self._Xatom.WM_CLASS, self._Xatom.STRING, 64)
+                prop.reply()
+        except self._error.XError:
+            return None
+        value = _property_value(prop, 8)
+        if not value:
+            return None
+        parts = value.decode("latin-1").split("\0")
+        return parts[1] if len(parts) > 1 and parts[1] else None
+
+
+def _property_value(reply, format: int):
+    """Giá trị của trả lời GetProperty, None nếu thuộc tính không có hoặc khác định dạng"""
+    if not reply.property_type:
+        return None
+    value_format, value = reply.value
+    return value if value_format == format else None
+
+
+def _ignore_x_error(*args):
+    """Lỗi bất đồng bộ (vd: cửa sổ đóng trước khi lệnh di chuyển tới server) được bỏ qua"""
+
+
+def create_default_backend() -> WindowBackend:
+    """Backend phù hợp với hệ điều hành: X11 trên Linux có DISPLAY, còn lại pygetwindow"""
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        return X11Backend()
+    return PyGetWindowBackend()
+
+
+def _spend(seconds: float):
+    """Mô phỏng độ trễ một lệnh gọi (busy-wait cho độ trễ nhỏ để đo chính xác)"""
+    if seconds <= 0:
+        return
+    if seconds >= 0.002:
+        time.sleep(seconds)
+        return
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SimulatedWindow:
+    """Cửa sổ giả lập trong bộ nhớ, cùng giao diện với cửa sổ pygetwindow"""
+
+    __slots__ = ("handle", "title", "visible", "left", "top", "width", "height",
+                 "process_name", "window_class", "_backend")
+
+    def __init__(self, backend: "SimulatedBackend", handle: int, title: str,
+                 left: int, top: int, width: int, height: int):
+        self._backend = backend
+        self.handle = handle
+        self.title = title
+        self.visible = True
+        self.process_name: Optional[str] = None
+        self.window_class: Optional[str] = None
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    def moveTo(self, x: int, y: int):
+        self._backend._call(self)
+        self.left, self.top = x, y
+        self._backend._push_back(self, immediate=True)
+
+    def resizeTo(self, width: int, height: int):
+        self._backend._call(self)
+        self.width, self.height = width, height
+        self._backend._push_back(self, immediate=True)
+
+
+class _SimulatedBatch(GeometryBatch):
+    def __init__(self, backend: "SimulatedBackend"):
+        self._backend = backend
+        self._pending = []
+
+    def add(self, window, x: int, y: int, width: int, height: int):
+        self._pending.append((window, x, y, width, height))
+
+    def commit(self) -> int:
+        self._backend._call()
+        for window, x, y, width, height in self._pending:
+            self._backend._block(window)
+            window.left, window.top, window.width, window.height = x, y, width, height
+            self._backend._push_back(window, immediate=True)
+        return 1
+
+
+class SimulatedBackend(WindowBackend):
+    """
+    Backend giả lập trong bộ nhớ, chạy được trên Linux không có desktop
+
+    Mô phỏng được hàng nghìn cửa sổ, độ trễ cho mỗi lệnh gọi và cửa sổ tự
+    lệch vị trí (vd: game tự scale) để đo hiệu năng và test monitor.
+    Cửa sổ bị `hang()` chặn mọi lệnh gọi tới nó cho đến khi `release()`,
+    cửa sổ bị `fight()` luôn tự đổi lại hình học của nó sau khi bị đặt.
+    """
+
+    name = "simulated"
+
+    def __init__(self, call_latency: float = 0.0, enumerate_latency: float = 0.0,
+                 drift_rate: float = 0.0, drift_pixels: int = 20,
+                 batch: bool = False, seed: Optional[int] = None):
+        """
+        Args:
+            call_latency: Độ trễ mỗi lệnh di chuyển/resize (giây)
+            enumerate_latency: Độ trễ liệt kê cho mỗi cửa sổ (giây)
+            drift_rate: Xác suất mỗi cửa sổ tự lệch ở mỗi lần liệt kê
+            drift_pixels: Độ lệch tối đa khi tự lệch (pixel)
+            batch: Hỗ trợ commit nhiều cửa sổ trong một batch
+            seed: Seed cho bộ sinh ngẫu nhiên (để kết quả lặp lại được)
+        """
+        self.call_latency = call_latency
+        self.enumerate_latency = enumerate_latency
+        self.drift_rate = drift_rate
+        self.drift_pixels = drift_pixels
+        self.supports_batch = batch
+        self.random = random.Random(seed)
+        self.windows: Dict[int, SimulatedWindow] = {}
+        self._next_handle = 0x10000
+        self.hung = set()
+        self._released = threading.Event()
+        self.fighting: Dict[int, tuple] = {}  # handle → (hình học tự đổi về, đổi ngay hay không)
+        # Bộ đếm
+        self.enumerations = 0
+        self.calls = 0
+
+    def _block(self, window):
+        if self.hung and window.handle in self.hung:
+            self._released.wait()
+
+    def _call(self, window: Optional[SimulatedWindow] = None):
+        self.calls += 1
+        if window is not None:
+            self._block(window)
+        _spend(self.call_latency)
+
+    def hang(self, window: SimulatedWindow):
+        """Giả lập cửa sổ bị treo: lệnh gọi tới nó không trả về cho đến khi `release()`"""
+        self._released.clear()
+        self.hung.add(window.handle)
+
+    def release(self):
+        """Bỏ treo tất cả cửa sổ, các lệnh gọi đang chờ trả về"""
+        self.hung.clear()
+        self._released.set()
+
+    def fight(self, window: SimulatedWindow, rect: Optional[tuple] = None, immediate: bool = False):
+        """
+        Giả lập cửa sổ chống lại việc sửa (vd: game tự scale về kích thước của nó)
+
+        Cửa sổ đổi về `rect` (mặc định hình học hiện tại) ngay bây giờ, sau đó tự
+        đổi lại ngay sau mỗi lần bị đặt (`immediate`) hoặc ở lần liệt kê tiếp theo.
+        """
+        if rect is None:
+            rect = (window.left, window.top, window.width, window.height)
+        window.left, window.top, window.width, window.height = rect
+        self.fighting[window.handle] = (tuple(rect), immediate)
+
+    def _push_back(self, window, immediate: bool):
+        fight = self.fighting.get(window.handle) if self.fighting else None
+        if fight is not None and fight[1] == immediate:
+            window.left, window.top, window.width, window.height = fight[0]
+
+    def add_window(self, title: str, x: int, y: int, width: int, height: int,
+                   handle: Optional[int] = None) -> SimulatedWindow:
+        """Mở một cửa sổ mới (handle chỉ định khi phát lại trace)"""
+        if handle is None:
+            self._next_handle += 4
+            handle = self._next_handle
+        window = SimulatedWindow(self, handle, title, x, y, width, height)
+        self.windows[window.handle] = window
+        return window
+
+    def add_grid(self, title: str, count: int, columns: int = 4, width: int = 480,
+                 height: int = 270, overlap: int = 8) -> List[SimulatedWindow]:
+        """Mở `count` cửa sổ xếp dạng lưới, tiêu đề `<title> #i`"""
+        return [
+            self.add_window(f"{title} #{i}", (i % columns) * (width - overlap),
+                            (i // columns) * (height - overlap), width, height)
+            for i in range(count)
+        ]
+
+    def close_window(self, handle: int):
+        """Đóng một cửa sổ"""
+        self.windows.pop(handle, None)
+        self.fighting.pop(handle, None)
+
+    def drift(self, window: SimulatedWindow, pixels: Optional[int] = None):
+        """Làm lệch một cửa sổ"""
+        pixels = pixels or self.drift_pixels
+        window.left += self.random.randint(-pixels, pixels) or 1
+        window.top += self.random.randint(-pixels, pixels)
+
+    def get_all_windows(self) -> List:
+        self.enumerations += 1
+        _spend(self.enumerate_latency * len(self.windows))
+        if self.drift_rate > 0:
+            for window in self.windows.values():
+                if self.random.random() < self.drift_rate:
+                    self.drift(window)
+        for handle in self.fighting:
+            window = self.windows.get(handle)
+            if window is not None:
+                self._push_back(window, immediate=False)
+        return list(self.windows.values())
+
+    def set_geometry(self, window, x: int, y: int, width: int, height: int) -> int:
+        self._call(window)
+        window.left, window.top, window.width, window.height = x, y, width, height
+        self._push_back(window, immediate=True)
+        return 1
+
+    def begin_batch(self, count: int) -> GeometryBatch:
+        if not self.supports_batch:
+            raise NotImplementedError
+        return _SimulatedBatch(self)
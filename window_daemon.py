@@ -0,0 +1,230 @@
+"""
+Daemon giữ một WindowManager chạy sẵn (layout, backend, monitor)
+Nhận lệnh qua socket cục bộ bằng giao thức JSON một dòng cho mỗi yêu cầu/phản hồi,
+nên các lệnh CLI không phải khởi động lại từ đầu
+
+Yêu cầu:  {"token": "...", "command": "restore", "pattern": "MetaBomb 2.0", "options": {}}
+Phản hồi: {"ok": true, "output": "<những gì lệnh in ra>", "result": ...}
+"""
+
+import io
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+from typing import Dict, Optional
+
+from window_supervisor import MonitorSupervisor, PatternSettings
+
+COMMANDS = ("ping", "capture", "restore", "rearrange", "monitor_start", "monitor_stop",
+            "list", "stats", "shutdown")
+
+
+def discovery_file(config_file: str = "window_positions.json") -> str:
+    """File chứa địa chỉ và token của daemon, nằm cạnh file cấu hình"""
+    return os.path.splitext(config_file)[0] + ".daemon.json"
+
+
+class _ThreadLocalStdout:
+    """Chuyển output của từng thread xử lý yêu cầu vào buffer riêng của nó"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self._local = threading.local()
+
+    def capture(self, buffer: Optional[io.StringIO]):
+        self._local.buffer = buffer
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self.fallback.write(text)
+
+    def flush(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            self.fallback.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: "WindowManagerDaemon" = self.server.daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = daemon.handle_request(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+            self.wfile.flush()
+            if response.get("shutdown"):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class WindowManagerDaemon:
+    """Daemon phục vụ một WindowManager qua socket TCP cục bộ (127.0.0.1)"""
+
+    def __init__(self, manager, port: int = 0, discovery: Optional[str] = None):
+        """
+        Args:
+            manager: WindowManager dùng chung cho mọi yêu cầu
+            port: Cổng lắng nghe (0 = tự chọn)
+            discovery: File ghi địa chỉ + token cho client (mặc định cạnh file cấu hình)
+        """
+        self.manager = manager
+        self.discovery = discovery or discovery_file(manager.config_file)
+        self.token = secrets.token_hex(16)
+        self.server = _Server(("127.0.0.1", port), _RequestHandler)
+        self.server.daemon = self
+        # Các lệnh thay đổi layout/cửa sổ được thực hiện lần lượt
+        self._lock = threading.Lock()
+        self.supervisor = MonitorSupervisor(manager, patterns=[])
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def _write_discovery(self):
+        host, port = self.address
+        fd = os.open(self.discovery, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"host": host, "port": port, "token": self.token, "pid": os.getpid()}, f)
+
+    def _remove_discovery(self):
+        try:
+            with open(self.discovery, 'r', encoding='utf-8') as f:
+                if json.load(f).get("token") != self.token:
+                    return  # File của daemon khác
+            os.remove(self.discovery)
+        except (OSError, ValueError):
+            pass
+
+    def serve_forever(self):
+        """Chạy daemon cho đến khi nhận lệnh shutdown hoặc Ctrl+C"""
+        stdout = _ThreadLocalStdout(sys.stdout)
+        sys.stdout = stdout
+        self._write_discovery()
+        host, port = self.address
+        print(f"🟢 Daemon đang chạy tại {host}:{port} (file: {self.discovery})")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.supervisor.stop()
+            self.server.server_close()
+            self._remove_discovery()
+            sys.stdout = stdout.fallback
+            print("✓ Đã dừng daemon")
+
+    def handle_request(self, request: Dict) -> Dict:
+        if request.get("token") != self.token:
+            return {"ok": False, "error": "Token không hợp lệ"}
+        command = request.get("command")
+        if command not in COMMANDS:
+            return {"ok": False, "error": f"Lệnh không hợp lệ: {command}"}
+
+        buffer = io.StringIO()
+        capture = getattr(sys.stdout, "capture", None)
+        if capture:
+            capture(buffer)
+        try:
+            with self._lock:
+                result = self._dispatch(command, request.get("pattern"), request.get("options") or {})
+        finally:
+            if capture:
+                capture(None)
+        return {"ok": True, "output": buffer.getvalue(), "result": result,
+                "shutdown": command == "shutdown"}
+
+    def _dispatch(self, command: str, pattern: Optional[str], options: Dict):
+        manager = self.manager
+        if command in ("capture", "restore", "rearrange", "monitor_start", "monitor_stop") and not pattern:
+            raise ValueError("Thiếu tên tab (pattern)")
+
+        if command == "ping":
+            return {"pid": os.getpid()}
+        if command == "capture":
+            manager.reload_if_changed()
+            manager.capture_windows(pattern)
+        elif command == "restore":
+            manager.reload_if_changed()
+            result = manager.restore_windows(pattern)
+            return result.summary() if result else None
+        elif command == "rearrange":
+            manager.reload_if_changed()
+            result = manager.rearrange_windows(pattern)
+            return result.summary() if result else None
+        elif command == "monitor_start":
+            settings = PatternSettings(
+                interval=float(options.get("interval", 2.0)),
+                tolerance=int(options.get("tolerance", 10))
+            )
+            self.supervisor.add_pattern(pattern, settings)
+            if not self.supervisor.running:
+                self.supervisor.start()
+            print(f"🔍 Daemon đang giám sát: {', '.join(self.supervisor.patterns)}")
+        elif command == "monitor_stop":
+            if pattern not in self.supervisor.patterns:
+                print(f"ℹ Daemon không giám sát '{pattern}'")
+                return None
+            self.supervisor.remove_pattern(pattern)
+            print(f"✓ Đã dừng giám sát '{pattern}'")
+            if not self.supervisor.patterns:
+                self.supervisor.stop()
+        elif command == "list":
+            manager.reload_if_changed()
+            manager.list_saved_patterns()
+        elif command == "stats":
+            return manager.stats()
+        return None
+
+
+def send_request(command: str, pattern: Optional[str] = None, options: Optional[Dict] = None,
+                 config_file: str = "window_positions.json",
+                 timeout: float = 30.0) -> Optional[Dict]:
+    """
+    Gửi lệnh tới daemon đang chạy
+
+    Trả về phản hồi, hoặc None nếu không kết nối được daemon (để CLI tự chạy
+    lệnh). Lỗi sau khi đã gửi lệnh (quá hạn, mất kết nối) trả về phản hồi lỗi
+    thay vì None: daemon có thể vẫn đang chạy lệnh, chạy lại tại chỗ sẽ bị trùng.
+    """
+    try:
+        with open(discovery_file(config_file), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    request = {"token": info["token"], "command": command, "pattern": pattern, "options": options or {}}
+    try:
+        # Kết nối cục bộ: nếu daemon đã chết thì bị từ chối ngay
+        sock = socket.create_connection((info["host"], info["port"]), timeout=0.5)
+    except OSError:
+        return None
+    try:
+        with sock:
+            sock.settimeout(timeout)
+            sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode('utf-8'))
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except socket.timeout:
+        return {"ok": False, "error": f"không phản hồi sau {timeout:g}s (lệnh có thể vẫn đang chạy)"}
+    except OSError as e:
+        return {"ok": False, "error": f"mất kết nối: {e}"}
+    if not line:
+        return {"ok": False, "error": "daemon đóng kết nối trước khi trả lời"}
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {"ok": False, "error": "phản hồi không hợp lệ"}
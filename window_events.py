@@ -0,0 +1,234 @@
+"""
+Nguồn sự kiện cửa sổ cho chế độ giám sát hướng sự kiện (event-driven)
+Thay vì quét toàn bộ cửa sổ mỗi vài giây, monitor chỉ kiểm tra lại khi có
+sự kiện tạo/đóng/di chuyển/resize cửa sổ
+"""
+
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# Các loại sự kiện
+EVENT_CREATE = "create"
+EVENT_DESTROY = "destroy"
+EVENT_MOVE = "move"
+EVENT_RESIZE = "resize"
+
+
+@dataclass
+class WindowEvent:
+    """Một sự kiện thay đổi cửa sổ"""
+    kind: str
+    handle: int = 0
+    timestamp: float = 0.0
+
+
+class WindowEventSource:
+    """
+    Giao diện chung cho các nguồn sự kiện cửa sổ
+
+    Lớp con chỉ cần gọi `_post()` khi có sự kiện; việc chờ, gom sự kiện
+    và đánh thức khi dừng được xử lý ở đây.
+    """
+
+    def __init__(self, coalesce: float = 0.05):
+        """
+        Args:
+            coalesce: Thời gian gom các sự kiện liên tiếp thành một lần kiểm tra (giây)
+        """
+        self.coalesce = coalesce
+        self.wakeups = 0  # Số lần monitor bị đánh thức (dùng để đo CPU lúc rảnh)
+        self._queue: "queue.Queue[Optional[WindowEvent]]" = queue.Queue()
+        self._closed = False
+
+    def start(self):
+        """Bắt đầu nhận sự kiện. Raise exception nếu không khả dụng"""
+        self._closed = False
+
+    def stop(self):
+        """Dừng nhận sự kiện và đánh thức `wait()` đang chờ"""
+        self._closed = True
+        self._queue.put(None)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _post(self, event: WindowEvent):
+        if not event.timestamp:
+            event.timestamp = time.monotonic()
+        self._queue.put(event)
+
+    def wait(self, timeout: Optional[float] = None) -> List[WindowEvent]:
+        """
+        Chờ đến khi có sự kiện, trả về danh sách sự kiện đã gom
+
+        Trả về list rỗng khi hết timeout hoặc khi nguồn đã bị dừng.
+        """
+        try:
+            first = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        self.wakeups += 1
+        if first is None:
+            return []
+
+        events = [first]
+        # Gom các sự kiện đến sát nhau (vd: khi kéo cửa sổ) thành một lần
+        deadline = time.monotonic() + self.coalesce
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                event = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is None:
+                break
+            events.append(event)
+        return events
+
+
+class FakeEventSource(WindowEventSource):
+    """
+    Nguồn sự kiện giả lập, điều khiển bằng script
+
+    Dùng để đo độ trễ phản ứng và số lần thức dậy khi không có thay đổi
+    trên máy Linux/CI không có desktop Windows.
+    """
+
+    def __init__(self, coalesce: float = 0.0):
+        super().__init__(coalesce=coalesce)
+        self.emitted = 0
+
+    def emit(self, kind: str, handle: int = 0):
+        """Phát một sự kiện"""
+        self.emitted += 1
+        self._post(WindowEvent(kind=kind, handle=handle))
+
+    def emit_many(self, events):
+        """Phát nhiều sự kiện (kind, handle) liên tiếp"""
+        for kind, handle in events:
+            self.emit(kind, handle)
+
+
+class WinEventHookSource(WindowEventSource):
+    """
+    Nguồn sự kiện thật trên Windows dùng SetWinEventHook
+
+    Hook chạy trên thread riêng có message loop, callback chỉ đẩy sự kiện
+    vào queue nên không chặn hệ thống.
+    """
+
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_SHOW = 0x8002
+    EVENT_OBJECT_HIDE = 0x8003
+    EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    WM_QUIT = 0x0012
+
+    _KINDS = {
+        EVENT_OBJECT_CREATE: EVENT_CREATE,
+        EVENT_OBJECT_SHOW: EVENT_CREATE,
+        EVENT_OBJECT_DESTROY: EVENT_DESTROY,
+        EVENT_OBJECT_HIDE: EVENT_DESTROY,
+        EVENT_OBJECT_LOCATIONCHANGE: EVENT_MOVE,
+    }
+
+    def __init__(self, coalesce: float = 0.05):
+        if sys.platform != "win32":
+            raise OSError("WinEventHookSource chỉ hỗ trợ Windows")
+        super().__init__(coalesce=coalesce)
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+
+    def start(self):
+        super().start()
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._error:
+            raise self._error
+
+    def stop(self):
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._thread_id = None
+        super().stop()
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, event_time):
+            if id_object != self.OBJID_WINDOW or id_child != self.CHILDID_SELF or not hwnd:
+                return
+            kind = self._KINDS.get(event)
+            if kind:
+                self._post(WindowEvent(kind=kind, handle=hwnd))
+
+        # Giữ tham chiếu để callback không bị garbage collect
+        self._callback = WinEventProc(callback)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+
+        hooks = []
+        try:
+            for event_min, event_max in (
+                (self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_HIDE),
+                (self.EVENT_OBJECT_LOCATIONCHANGE, self.EVENT_OBJECT_LOCATIONCHANGE),
+            ):
+                hook = user32.SetWinEventHook(
+                    event_min, event_max, 0, self._callback, 0, 0,
+                    self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+                )
+                if not hook:
+                    raise OSError("SetWinEventHook thất bại")
+                hooks.append(hook)
+            self._thread_id = kernel32.GetCurrentThreadId()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+
+
+def create_default_event_source() -> Optional[WindowEventSource]:
+    """Tạo nguồn sự kiện phù hợp với hệ điều hành, None nếu không hỗ trợ"""
+    if sys.platform == "win32":
+        try:
+            return WinEventHookSource()
+        except Exception:
+            return None
+    return None
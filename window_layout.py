@@ -0,0 +1,259 @@
+"""
+Ghép cửa sổ vào các vị trí đã lưu (slot) với tổng độ dịch chuyển nhỏ nhất
+Dùng thuật toán Hungarian trên ma trận chi phí, kế hoạch được ghi nhớ theo
+chữ ký (các cửa sổ hiện tại, layout) để không phải tính lại
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+Rect = Tuple[int, int, int, int]  # (x, y, width, height)
+
+# Ma trận nhỏ hơn ngưỡng này giải bằng Python thuần: nhanh hơn cả thời gian import numpy/scipy
+ACCEL_MIN_CELLS = 1024
+
+_accel = None
+
+
+def _accelerators():
+    """
+    (numpy, scipy linear_sum_assignment), mỗi thứ None nếu chưa cài
+    Chỉ import ở lần đầu gặp ma trận lớn, để khởi động không phải trả giá import
+    """
+    global _accel
+    if _accel is None:
+        try:
+            import numpy as np
+        except ImportError:  # numpy là tùy chọn, có sẵn thì tính ma trận chi phí dạng vector
+            np = None
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:
+            linear_sum_assignment = None
+        _accel = (np, linear_sum_assignment)
+    return _accel
+
+
+def cost_matrix(current: Sequence[Rect], slots: Sequence[Rect]):
+    """
+    Ma trận chi phí: tổng sai lệch |dx| + |dy| + |dw| + |dh| giữa mỗi cửa sổ và mỗi slot
+    """
+    np = _accelerators()[0] if len(current) * len(slots) >= ACCEL_MIN_CELLS else None
+    if np is not None:
+        cur = np.asarray(current, dtype=np.int64).reshape(-1, 4)
+        sl = np.asarray(slots, dtype=np.int64).reshape(-1, 4)
+        return np.abs(cur[:, None, :] - sl[None, :, :]).sum(axis=2)
+    return [
+        [abs(x - sx) + abs(y - sy) + abs(w - sw) + abs(h - sh) for sx, sy, sw, sh in slots]
+        for x, y, w, h in current
+    ]
+
+
+def _hungarian(cost: List[List[int]]) -> List[int]:
+    """
+    Hungarian O(n²·m) cho ma trận n x m với n <= m
+    Trả về cột được gán cho mỗi hàng
+    """
+    n = len(cost)
+    m = len(cost[0])
+    inf = float("inf")
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    result = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def solve_assignment(cost) -> List[Tuple[int, int]]:
+    """
+    Ghép hàng (cửa sổ) với cột (slot) sao cho tổng chi phí nhỏ nhất
+    Ma trận có thể không vuông; trả về các cặp (hàng, cột)
+    """
+    if not isinstance(cost, list):
+        # Ma trận numpy chỉ xuất hiện khi đã vượt ngưỡng ở cost_matrix
+        linear_sum_assignment = _accelerators()[1]
+        if linear_sum_assignment is not None:
+            rows, cols = linear_sum_assignment(cost)
+            return [(int(r), int(c)) for r, c in zip(rows, cols)]
+        cost = cost.tolist()
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n == 0 or m == 0:
+        return []
+    if n <= m:
+        return [(i, j) for i, j in enumerate(_hungarian(cost))]
+    transposed = [list(col) for col in zip(*cost)]
+    return [(i, j) for j, i in enumerate(_hungarian(transposed))]
+
+
+def plan_assignment(current: Sequence[Rect], slots: Sequence[Rect]) -> Tuple[Optional[int], ...]:
+    """
+    Tính slot cho từng cửa sổ (None nếu thừa cửa sổ) với tổng dịch chuyển nhỏ nhất
+
+    Cửa sổ đang nằm đúng một slot luôn được giữ nguyên (theo bất đẳng thức
+    tam giác, việc này không làm tăng tổng chi phí), nên chỉ phải giải bài
+    toán ghép cho các cửa sổ bị lệch.
+    """
+    assignment: List[Optional[int]] = [None] * len(current)
+    free_slots = {}
+    for j, slot in enumerate(slots):
+        free_slots.setdefault(tuple(slot), []).append(j)
+
+    pending = []
+    for i, rect in enumerate(current):
+        exact = free_slots.get(tuple(rect))
+        if exact:
+            assignment[i] = exact.pop(0)
+        else:
+            pending.append(i)
+
+    remaining = sorted(j for js in free_slots.values() for j in js)
+    if pending and remaining:
+        cost = cost_matrix([current[i] for i in pending], [slots[j] for j in remaining])
+        for r, c in solve_assignment(cost):
+            assignment[pending[r]] = remaining[c]
+    return tuple(assignment)
+
+
+class LayoutPlanner:
+    """Tính và ghi nhớ (LRU) kế hoạch ghép cửa sổ → slot"""
+
+    def __init__(self, cache_size: int = 128):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, Tuple[Optional[int], ...]]" = OrderedDict()
+
+    def plan(self, current: Sequence[Rect], slots: Sequence[Rect]) -> Tuple[Optional[int], ...]:
+        """
+        Args:
+            current: Hình học hiện tại của các cửa sổ
+            slots: Hình học các slot trong layout
+        Returns:
+            Slot được gán cho từng cửa sổ (None nếu không còn slot)
+        """
+        key = (tuple(map(tuple, current)), tuple(map(tuple, slots)))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        result = plan_assignment(current, slots)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._cache.clear()
+
+
+class SlotTracker:
+    """
+    Ánh xạ bền vững handle cửa sổ → slot giữa các lượt giám sát
+
+    Cửa sổ mới nhận slot trống gần nhất, cửa sổ đóng trả lại slot của nó.
+    Mỗi cửa sổ được so với slot của chính nó nên việc kéo một cửa sổ đè
+    lên cửa sổ khác không làm đảo thứ tự của các cửa sổ còn lại.
+    """
+
+    def __init__(self, slots: Sequence[Rect] = ()):
+        self.slots: List[Rect] = []
+        self.assigned: dict = {}  # handle → slot
+        self.free: List[int] = []
+        self._by_slot: Optional[List] = None
+        self.reset(slots)
+
+    def reset(self, slots: Sequence[Rect]):
+        """Đặt lại layout (vd: sau khi capture lại), xóa toàn bộ ánh xạ"""
+        self.slots = [tuple(s) for s in slots]
+        self.assigned = {}
+        self.free = list(range(len(self.slots)))
+        self._by_slot = None
+
+    def update(self, rects: dict) -> Tuple[List, List]:
+        """
+        Cập nhật ánh xạ theo các cửa sổ hiện tại
+
+        Args:
+            rects: handle → hình học hiện tại của cửa sổ
+        Returns:
+            (handle mới được gán slot, handle đã đóng và trả slot)
+        """
+        if rects.keys() == self.assigned.keys():
+            return [], []
+
+        closed = [h for h in self.assigned if h not in rects]
+        for handle in closed:
+            self.free.append(self.assigned.pop(handle))
+
+        new = [h for h in rects if h not in self.assigned]
+        added = []
+        if new and self.free:
+            self.free.sort()
+            plan = plan_assignment([rects[h] for h in new], [self.slots[j] for j in self.free])
+            taken = set()
+            for handle, k in zip(new, plan):
+                if k is not None:
+                    self.assigned[handle] = self.free[k]
+                    taken.add(k)
+                    added.append(handle)
+            self.free = [j for k, j in enumerate(self.free) if k not in taken]
+        if added or closed:
+            self._by_slot = None
+        return added, closed
+
+    def slot_of(self, handle) -> Optional[int]:
+        return self.assigned.get(handle)
+
+    def by_slot(self) -> List:
+        """Handle của cửa sổ ở mỗi slot (None = slot trống), dựng lại khi ánh xạ đổi"""
+        if self._by_slot is None:
+            handles = [None] * len(self.slots)
+            for handle, slot in self.assigned.items():
+                handles[slot] = handle
+            self._by_slot = handles
+        return self._by_slot
@@ -3,14 +3,27 @@ Window Manager Tool - Quản lý vị trí và kích thước các tab trình du
 Tự động lưu, restore và sắp xếp lại vị trí các cửa sổ
 """
 
-import pygetwindow as gw
-import json
 import time
 import os
-from typing import List, Dict, Optional
+import re
+from types import MappingProxyType
+from typing import Callable, List, Dict, Mapping, Optional
 from dataclasses import dataclass, asdict
+from functools import cached_property
 import threading
 
+from window_backends import WindowBackend, window_handle
+from window_events import WindowEventSource, create_default_event_source
+from layout_columns import ColumnarLayout, Drift
+from layout_store import LayoutStore
+from window_apply import ApplyResult, ConcurrentApplier, PlannedMove, apply_layout, verify_applied
+from window_layout import LayoutPlanner, Rect, SlotTracker
+from window_oscillation import OscillationGuard, OscillationPolicy
+from window_scheduler import AdaptiveScheduler
+from window_selectors import CompiledSelector, Selector
+from window_stats import DEFAULT_METRICS_FILE, MonitorStats, format_stats
+from window_tiling import TilingCache, TilingTemplate
+
 
 @dataclass
 class WindowInfo:
@@ -24,53 +37,226 @@ class WindowInfo:
     timestamp: float
 
 
+@dataclass(frozen=True)
+class LayoutSnapshot:
+    """
+    Bản chụp bất biến của các layout đã lưu
+
+    Mỗi thay đổi (capture, tải lại từ kho) dựng bản chụp mới rồi thay bằng một
+    phép gán (copy-on-write), nên monitor đọc không cần khóa và không bao giờ
+    thấy layout đang sửa dở.
+    """
+    windows: Mapping[str, List[WindowInfo]]
+
+    @classmethod
+    def build(cls, windows: Dict[str, List[WindowInfo]]) -> "LayoutSnapshot":
+        return cls(MappingProxyType(windows))
+
+    @cached_property
+    def columns(self) -> ColumnarLayout:
+        """Bản dạng cột của `windows` cho kiểm tra lệch, chỉ dựng khi monitor cần đến"""
+        return ColumnarLayout.from_windows(self.windows)
+
+
+_STOPPED = threading.Event()
+_STOPPED.set()
+
+
 class WindowManager:
     """Quản lý vị trí và kích thước các cửa sổ trình duyệt"""
     
-    def __init__(self, config_file: str = "window_positions.json"):
+    def __init__(self, config_file: str = "window_positions.json",
+                 backend: Optional[WindowBackend] = None,
+                 store_file: Optional[str] = None,
+                 collect_stats: bool = True,
+                 verbose: bool = True,
+                 apply_workers: int = 16,
+                 apply_timeout: float = 2.0,
+                 oscillation: Optional[OscillationPolicy] = None):
+        """
+        Args:
+            config_file: File JSON cấu hình cũ, được nhập vào kho layout ở lần chạy đầu
+            backend: Backend cửa sổ (mặc định: pygetwindow, X11 trên Linux; chỉ được tải khi cần đến cửa sổ)
+            store_file: File SQLite lưu layout (mặc định: cùng tên với config_file, đuôi .db)
+            collect_stats: Đo thời gian/bộ đếm của vòng lặp giám sát (xem `stats()`)
+            verbose: In thông báo khi tải cấu hình
+            apply_workers: Số cửa sổ được đặt vị trí đồng thời (0 = lần lượt, không có hạn chót)
+            apply_timeout: Hạn chót cho mỗi cửa sổ; cửa sổ quá hạn bị cách ly và thử lại sau (giây)
+            oscillation: Ngưỡng phát hiện cửa sổ tự đổi lại sau khi bị sửa (mặc định OscillationPolicy())
+        """
         self.config_file = config_file
-        self.windows_data: Dict[str, List[WindowInfo]] = {}
-        self.monitoring = False
+        self.store_file = store_file or os.path.splitext(config_file)[0] + ".db"
+        self._backend = backend
+        self.verbose = verbose
+        # Layout đã lưu (copy-on-write); chỉ thay dưới _layout_lock
+        self.layout = LayoutSnapshot.build({})
+        self._layout_lock = threading.Lock()
+        # Mỗi phiên giám sát có Event dừng riêng; start/stop được thực hiện lần lượt
+        self._monitor_stop: Optional[threading.Event] = None
+        self._lifecycle_lock = threading.Lock()
         self.monitor_thread = None
+        # Các lần áp dụng layout (monitor, nút GUI, daemon) không xen kẽ nhau
+        self._apply_lock = threading.Lock()
+        self.event_source: Optional[WindowEventSource] = None
+        self.planner = LayoutPlanner()
+        self.applier = ConcurrentApplier(apply_workers, apply_timeout) if apply_workers > 0 else None
+        self.tiling = TilingCache()
+        self.oscillation = oscillation or OscillationPolicy()
+        # Đồng hồ cho lịch sử sửa (replay thay bằng đồng hồ mô phỏng)
+        self.clock: Callable[[], float] = time.monotonic
+        # Mẫu lưới riêng cho từng pattern; pattern không có mẫu dùng layout đã capture
+        self.templates: Dict[str, TilingTemplate] = {}
+        self._saved_slots: Dict[str, tuple] = {}
+        # Bộ chọn riêng cho từng pattern (tiến trình, lớp cửa sổ, ...); pattern không có
+        # bộ chọn được hiểu theo tiền tố (exact:, re:, glob:) hoặc là chuỗi con của tiêu đề
+        self.selectors: Dict[str, Selector] = {}
+        self._compiled: Dict[str, CompiledSelector] = {}
+        self.metrics = MonitorStats(enabled=collect_stats)
+        self.store = LayoutStore(self.store_file)
         self.load_config()
     
+    @property
+    def backend(self) -> WindowBackend:
+        """Backend cửa sổ, tạo ở lần dùng đầu (lệnh chỉ đọc như `list` không phải import pygetwindow/Xlib)"""
+        if self._backend is None:
+            from window_backends import create_default_backend
+            self._backend = create_default_backend()
+        return self._backend
+    
+    @backend.setter
+    def backend(self, backend: WindowBackend):
+        self._backend = backend
+    
+    @property
+    def windows_data(self) -> Mapping[str, List[WindowInfo]]:
+        """Layout đã lưu theo pattern (chỉ đọc, xem `layout`)"""
+        return self.layout.windows
+    
+    @property
+    def columns(self) -> ColumnarLayout:
+        """Bản dạng cột của windows_data (kiểm tra lệch dạng vector)"""
+        return self.layout.columns
+    
+    @property
+    def monitoring(self) -> bool:
+        stop = self._monitor_stop
+        return stop is not None and not stop.is_set()
+    
+    @monitoring.setter
+    def monitoring(self, value: bool):
+        """True mở một phiên giám sát mới (nếu chưa có), False yêu cầu phiên hiện tại dừng"""
+        if value:
+            if not self.monitoring:
+                self._monitor_stop = threading.Event()
+        elif self._monitor_stop is not None:
+            self._monitor_stop.set()
+    
+    def set_layout(self, title_pattern: str, window_infos: List[WindowInfo]):
+        """Thay layout của một pattern trong bộ nhớ (không ghi vào kho)"""
+        with self._layout_lock:
+            windows = dict(self.layout.windows)
+            windows[title_pattern] = window_infos
+            self.layout = LayoutSnapshot.build(windows)
+    
     def load_config(self):
-        """Tải cấu hình từ file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for title, windows in data.items():
-                        self.windows_data[title] = [
-                            WindowInfo(**w) for w in windows
-                        ]
-                print(f"✓ Đã tải cấu hình từ {self.config_file}")
-            except Exception as e:
-                print(f"✗ Lỗi khi tải cấu hình: {e}")
-                self.windows_data = {}
-        else:
-            print(f"ℹ Chưa có file cấu hình, sẽ tạo mới")
+        """Tải cấu hình từ kho layout (nhập file JSON cũ nếu kho còn trống)"""
+        try:
+            if self.store.is_empty() and os.path.exists(self.config_file):
+                count = self.store.import_json(self.config_file)
+                print(f"✓ Đã nhập {count} pattern từ {self.config_file}")
+            self._apply_store_data(self.store.load_all())
+            if self.verbose:
+                if self.windows_data:
+                    print(f"✓ Đã tải cấu hình từ {self.store_file}")
+                else:
+                    print(f"ℹ Chưa có file cấu hình, sẽ tạo mới")
+        except Exception as e:
+            print(f"✗ Lỗi khi tải cấu hình: {e}")
+            self.layout = LayoutSnapshot.build({})
     
-    def save_config(self):
-        """Lưu cấu hình vào file"""
+    def _apply_store_data(self, data: Dict[str, List[dict]]) -> List[str]:
+        """
+        Cập nhật windows_data từ dữ liệu trong kho
+        Pattern không đổi giữ nguyên list cũ (monitor dựa vào đó để không gán lại slot)
+        Trả về các pattern đã thay đổi
+        """
+        with self._layout_lock:
+            current = self.layout.windows
+            changed = []
+            windows_data: Dict[str, List[WindowInfo]] = {}
+            for title, windows in data.items():
+                infos = [WindowInfo(**w) for w in windows]
+                old = current.get(title)
+                if old == infos:
+                    windows_data[title] = old
+                else:
+                    windows_data[title] = infos
+                    changed.append(title)
+            changed.extend(t for t in current if t not in data)
+            if changed:
+                self.layout = LayoutSnapshot.build(windows_data)
+        return changed
+    
+    def reload_if_changed(self) -> List[str]:
+        """
+        Tải lại layout nếu tiến trình khác đã ghi vào kho (chỉ tốn một lệnh stat khi không đổi)
+        Trả về các pattern đã thay đổi
+        """
+        if not self.store.changed():
+            return []
         try:
-            data = {}
-            for title, windows in self.windows_data.items():
-                data[title] = [asdict(w) for w in windows]
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            print(f"✓ Đã lưu cấu hình vào {self.config_file}")
+            changed = self._apply_store_data(self.store.load_all())
+        except Exception as e:
+            print(f"✗ Lỗi khi tải lại cấu hình: {e}")
+            return []
+        if changed:
+            print(f"ℹ Đã tải lại layout: {', '.join(changed)}")
+        return changed
+    
+    def save_config(self, title_pattern: Optional[str] = None):
+        """
+        Lưu cấu hình vào kho layout
+
+        Args:
+            title_pattern: Chỉ ghi pattern này. Nếu None sẽ ghi tất cả
+        """
+        try:
+            patterns = [title_pattern] if title_pattern is not None else list(self.windows_data)
+            for title in patterns:
+                self.store.save_pattern(title, [asdict(w) for w in self.windows_data[title]])
+            print(f"✓ Đã lưu cấu hình vào {self.store_file}")
         except Exception as e:
             print(f"✗ Lỗi khi lưu cấu hình: {e}")
     
-    def get_windows_by_title(self, title_pattern: str) -> List[gw.Win32Window]:
-        """Lấy tất cả các cửa sổ có tiêu đề chứa pattern"""
-        all_windows = gw.getAllWindows()
-        matching_windows = [
-            w for w in all_windows 
-            if title_pattern.lower() in w.title.lower() and w.visible
-        ]
+    def selector(self, title_pattern: str) -> CompiledSelector:
+        """Bộ chọn đã biên dịch của pattern (biên dịch lại khi `selectors[pattern]` đổi)"""
+        selector = self.selectors.get(title_pattern) or Selector.parse(title_pattern)
+        compiled = self._compiled.get(title_pattern)
+        if compiled is None or compiled.selector != selector:
+            compiled = selector.compile()
+            self._compiled[title_pattern] = compiled
+        return compiled
+    
+    def get_windows_by_title(self, title_pattern: str, all_windows: Optional[List] = None) -> List:
+        """
+        Lấy tất cả các cửa sổ đang hiển thị khớp pattern (xem `selector`)
+
+        Args:
+            all_windows: Danh sách cửa sổ đã liệt kê sẵn (snapshot). Nếu None sẽ liệt kê lại
+        """
+        metrics = self.metrics if self.metrics.enabled else None
+        if all_windows is None:
+            if metrics:
+                start = time.perf_counter()
+                all_windows = self.backend.get_all_windows()
+                metrics.add_time("enumerate", time.perf_counter() - start)
+            else:
+                all_windows = self.backend.get_all_windows()
+        if metrics:
+            start = time.perf_counter()
+        matching_windows = self.selector(title_pattern).select(all_windows, self.backend)
+        if metrics:
+            metrics.add_time("match", time.perf_counter() - start)
         return matching_windows
     
     def capture_windows(self, title_pattern: str):
@@ -100,149 +286,426 @@ class WindowManager:
             window_infos.append(info)
             print(f"✓ Đã capture tab #{idx}: {window.title[:50]}... tại ({info.x}, {info.y}) - {info.width}x{info.height}")
         
-        self.windows_data[title_pattern] = window_infos
-        self.save_config()
+        self.set_layout(title_pattern, window_infos)
+        # Layout vừa capture thay cho mẫu lưới đang dùng (nếu có)
+        self.templates.pop(title_pattern, None)
+        self.save_config(title_pattern)
         print(f"\n✓ Đã capture {len(window_infos)} tab với tiêu đề '{title_pattern}'")
     
-    def restore_windows(self, title_pattern: str):
+    def _saved_layout(self, title_pattern: str, layout: Optional[LayoutSnapshot] = None):
+        """
+        (slot đã capture, mẫu suy ra từ chúng), chỉ tính lại khi layout đổi
+        `layout`: bản chụp cần đọc (mặc định bản hiện tại)
+        """
+        saved_windows = (layout or self.layout).windows[title_pattern]
+        cached = self._saved_slots.get(title_pattern)
+        if cached is None or cached[0] is not saved_windows:
+            slots = [(s.x, s.y, s.width, s.height) for s in saved_windows]
+            cached = (saved_windows, slots, TilingTemplate.from_slots(slots))
+            self._saved_slots[title_pattern] = cached
+        return cached[1], cached[2]
+    
+    def layout_slots(self, title_pattern: str, count: int) -> Optional[List[Rect]]:
+        """
+        Các slot đích cho `count` cửa sổ
+        
+        - Pattern có mẫu riêng (`templates`): lưới sinh từ mẫu
+        - Ngược lại: layout đã capture; nếu số cửa sổ nhiều hơn số slot thì
+          dùng lưới sinh từ mẫu suy ra từ layout đó (cùng vùng, tỉ lệ, độ chồng)
+        
+        Layout sinh ra được ghi nhớ theo (mẫu, số cửa sổ) và trả về cùng một
+        list cho đến khi layout đổi. Trả về None nếu chưa có layout lẫn mẫu.
+        """
+        layout = self.layout
+        template = self.templates.get(title_pattern)
+        if template is None:
+            if not layout.windows.get(title_pattern):
+                return None
+            slots, template = self._saved_layout(title_pattern, layout)
+            if count <= len(slots):
+                return slots
+        try:
+            return self.tiling.generate(template, count)
+        except ValueError as e:
+            print(f"✗ Không sinh được lưới cho '{title_pattern}': {e}")
+            if title_pattern in layout.windows:
+                return self._saved_layout(title_pattern, layout)[0]
+            return None
+    
+    def _plan_moves(self, current_windows: List, targets: List[Rect]):
+        """
+        Ghép các cửa sổ hiện tại vào slot đã lưu với tổng dịch chuyển nhỏ nhất
+        Trả về (kế hoạch di chuyển, chỉ số các cửa sổ thừa không có slot)
+        """
+        # Đọc hình học mỗi cửa sổ một lần, sắp xếp theo vị trí hiện tại
+        current = [(w.left, w.top, w.width, w.height) for w in current_windows]
+        order = sorted(range(len(current_windows)), key=lambda i: (current[i][0], current[i][1]))
+        current_windows[:] = [current_windows[i] for i in order]
+        current = [current[i] for i in order]
+        
+        slots = self.planner.plan(current, targets)
+        
+        moves = []
+        extras = []
+        for idx, window in enumerate(current_windows):
+            slot = slots[idx]
+            if slot is None:
+                extras.append(idx)
+            else:
+                moves.append(PlannedMove(window, current[idx], targets[slot], idx, slot))
+        return moves, extras
+    
+    def _apply(self, moves: List[PlannedMove], tolerance: int = 0) -> ApplyResult:
+        """Áp dụng kế hoạch di chuyển (song song, có hạn chót nếu bật `apply_workers`)"""
+        with self._apply_lock:
+            if self.applier is None:
+                result = apply_layout(self.backend, moves, tolerance=tolerance)
+            else:
+                result = self.applier.apply(self.backend, moves, tolerance=tolerance)
+            # Đọc lại vị trí: cửa sổ tự đổi lại ngay (vd: game tự scale) không được tính là đã sửa xong
+            verify_applied(result, tolerance, self.backend)
+            return result
+    
+    def _print_apply_errors(self, result: ApplyResult, action: str, label=lambda move: f"tab #{move.index}"):
+        for move, e in result.failed:
+            print(f"✗ Lỗi khi {action} {label(move)}: {e}")
+        for move in result.timed_out:
+            retry = self.applier.retry_in(move.window) if self.applier else None
+            later = f", thử lại sau {retry:.0f}s" if retry is not None else ""
+            print(f"⏱ {label(move).capitalize()} không phản hồi, tạm cách ly{later}")
+        for move in result.unconverged:
+            print(f"⚠ {label(move).capitalize()} không giữ vị trí mới")
+    
+    def restore_windows(self, title_pattern: str) -> Optional[ApplyResult]:
         """
         Restore vị trí và kích thước của các tab
         """
         if title_pattern not in self.windows_data:
             print(f"✗ Không có dữ liệu đã lưu cho '{title_pattern}'")
-            return
+            return None
         
-        saved_windows = self.windows_data[title_pattern]
         current_windows = self.get_windows_by_title(title_pattern)
         
         if not current_windows:
             print(f"✗ Không tìm thấy cửa sổ nào với tiêu đề chứa '{title_pattern}'")
-            return
+            return None
         
-        # Sắp xếp theo vị trí hiện tại
-        current_windows.sort(key=lambda w: (w.left, w.top))
+        moves, extras = self._plan_moves(current_windows, self._saved_layout(title_pattern)[0])
         
         print(f"\nRestoring {len(current_windows)} tab(s)...")
         
-        for idx, window in enumerate(current_windows):
-            if idx < len(saved_windows):
-                saved_info = saved_windows[idx]
-                try:
-                    # Restore vị trí và kích thước
-                    window.moveTo(saved_info.x, saved_info.y)
-                    window.resizeTo(saved_info.width, saved_info.height)
-                    print(f"✓ Đã restore tab #{idx} về ({saved_info.x}, {saved_info.y}) - {saved_info.width}x{saved_info.height}")
-                except Exception as e:
-                    print(f"✗ Lỗi khi restore tab #{idx}: {e}")
-            else:
-                print(f"⚠ Tab #{idx} không có dữ liệu đã lưu")
+        result = self._apply(moves)
+        for move in result.applied:
+            x, y, w, h = move.target
+            print(f"✓ Đã restore tab #{move.index} về ({x}, {y}) - {w}x{h}")
+        self._print_apply_errors(result, "restore")
+        for idx in extras:
+            print(f"⚠ Tab #{idx} không có dữ liệu đã lưu (dùng rearrange để xếp vào lưới tự sinh)")
         
-        print(f"\n✓ Hoàn tất restore cho '{title_pattern}'")
+        print(f"\n✓ Hoàn tất restore cho '{title_pattern}': {result.summary()}")
+        return result
     
-    def rearrange_windows(self, title_pattern: str):
+    def rearrange_windows(self, title_pattern: str, current_windows: Optional[List] = None,
+                          tolerance: int = 0,
+                          template: Optional[TilingTemplate] = None) -> Optional[ApplyResult]:
         """
         Sắp xếp lại các tab khi có tab bị đóng
-        Tự động lấp đầy vị trí trống
+        Tự động lấp đầy vị trí trống; tab thừa so với layout đã lưu được xếp
+        vào lưới tự sinh (xem `layout_slots`)
+
+        Args:
+            current_windows: Các cửa sổ khớp pattern đã lấy sẵn. Nếu None sẽ liệt kê lại
+            tolerance: Bỏ qua các tab lệch không quá giá trị này so với slot (pixel)
+            template: Mẫu lưới cho pattern này (được ghi nhớ cho các lần sắp xếp/giám sát sau)
         """
-        if title_pattern not in self.windows_data:
+        if template is not None:
+            self.templates[title_pattern] = template
+        if title_pattern not in self.windows_data and title_pattern not in self.templates:
             print(f"✗ Không có dữ liệu đã lưu cho '{title_pattern}'")
-            return
+            return None
         
-        saved_windows = self.windows_data[title_pattern]
-        current_windows = self.get_windows_by_title(title_pattern)
+        if current_windows is None:
+            current_windows = self.get_windows_by_title(title_pattern)
         
         if not current_windows:
             print(f"✗ Không tìm thấy cửa sổ nào với tiêu đề chứa '{title_pattern}'")
-            return
+            return None
         
-        # Sắp xếp theo vị trí hiện tại
-        current_windows.sort(key=lambda w: (w.left, w.top))
+        targets = self.layout_slots(title_pattern, len(current_windows))
+        if targets is None:
+            return None
+        moves, _ = self._plan_moves(current_windows, targets)
         
-        print(f"\nSắp xếp lại {len(current_windows)} tab(s) vào {len(saved_windows)} vị trí đã lưu...")
+        saved_count = len(self.windows_data.get(title_pattern, ()))
+        if title_pattern in self.templates or len(targets) > saved_count:
+            print(f"\nSắp xếp lại {len(current_windows)} tab(s) vào lưới {len(targets)} vị trí tự sinh...")
+        else:
+            print(f"\nSắp xếp lại {len(current_windows)} tab(s) vào {len(targets)} vị trí đã lưu...")
         
-        # Ánh xạ các tab hiện tại vào các vị trí đã lưu
-        for idx, window in enumerate(current_windows):
-            if idx < len(saved_windows):
-                saved_info = saved_windows[idx]
-                try:
-                    window.moveTo(saved_info.x, saved_info.y)
-                    window.resizeTo(saved_info.width, saved_info.height)
-                    print(f"✓ Đã di chuyển tab #{idx} về vị trí đã lưu #{idx}: ({saved_info.x}, {saved_info.y})")
-                except Exception as e:
-                    print(f"✗ Lỗi khi di chuyển tab #{idx}: {e}")
+        # Ánh xạ các tab hiện tại vào các vị trí đã lưu (tổng dịch chuyển nhỏ nhất)
+        result = self._apply(moves, tolerance=tolerance)
+        for move in result.applied:
+            print(f"✓ Đã di chuyển tab #{move.index} về vị trí đã lưu #{move.slot}: ({move.target[0]}, {move.target[1]})")
+        self._print_apply_errors(result, "di chuyển")
+        
+        print(f"\n✓ Hoàn tất sắp xếp lại cho '{title_pattern}': {result.summary()}")
+        return result
+    
+    def _check_windows(self, title_pattern: str, tolerance: int, state: Dict,
+                       current_windows: Optional[List] = None,
+                       scheduler: Optional[AdaptiveScheduler] = None,
+                       drift: Optional[List[Drift]] = None) -> bool:
+        """
+        Kiểm tra một lần số lượng, vị trí và kích thước các tab,
+        sắp xếp lại nếu cần. Trả về True nếu đã sắp xếp lại
+
+        Mỗi cửa sổ giữ slot của nó qua các lượt (theo handle), nên chỉ các
+        cửa sổ mới hoặc bị lệch khỏi slot của chính nó mới bị di chuyển.
+
+        Args:
+            state: Trạng thái giữa các lần kiểm tra (tracker, layout, frame, last_count, guard);
+                sau mỗi lần sắp xếp lại chứa lý do (reason), kết quả (result) và
+                các cửa sổ vừa bị phát hiện dao động (oscillations)
+            current_windows: Các cửa sổ khớp pattern đã lấy sẵn. Nếu None sẽ liệt kê lại
+            scheduler: Bộ lập lịch thích ứng; nếu có, chỉ sửa khi hình học đã ổn định
+            drift: Độ lệch đã tính sẵn cho `current_windows` (MonitorSupervisor tính chung
+                cho nhiều pattern); chỉ dùng khi tập cửa sổ không đổi so với lượt trước.
+                Nếu None sẽ tự tính (xem `_detect_drift`)
+        """
+        metrics = self.metrics if self.metrics.enabled else None
+        if metrics:
+            metrics.ticks += 1
+        if current_windows is None:
+            current_windows = self.get_windows_by_title(title_pattern)
+        current_count = len(current_windows)
+        last_count = state.get("last_count", 0)
+        
+        slots = self.layout_slots(title_pattern, current_count)
+        if not slots:
+            if scheduler is not None:
+                scheduler.observe(current_count)
+            if current_count != last_count and current_count > 0:
+                print(f"\n⚡ Phát hiện thay đổi: Số lượng tab: {last_count} → {current_count}")
+                print(f"✗ Không có dữ liệu đã lưu cho '{title_pattern}'")
+            state["last_count"] = current_count
+            return False
+        
+        # Layout thay đổi (capture lại, hoặc số tab vượt layout đã lưu → lưới khác) → gán lại toàn bộ
+        tracker = state.get("tracker")
+        if tracker is None or state.get("layout") is not slots:
+            tracker = SlotTracker(slots)
+            state["tracker"] = tracker
+            state["layout"] = slots
+        
+        if metrics:
+            start = time.perf_counter()
+        
+        # Đọc hình học mỗi cửa sổ một lần
+        windows = {}
+        rects = {}
+        for w in current_windows:
+            handle = window_handle(w)
+            windows[handle] = w
+            rects[handle] = (w.left, w.top, w.width, w.height)
         
-        print(f"\n✓ Hoàn tất sắp xếp lại cho '{title_pattern}'")
+        if scheduler is not None:
+            scheduler.observe(frozenset(rects.items()))
+        
+        added, closed = tracker.update(rects)
+        magnitudes = None
+        if drift is None or added or closed:
+            magnitudes = {} if metrics else None
+            drift = self._detect_drift(title_pattern, tracker, rects, tolerance, state, magnitudes)
+        handles = tracker.by_slot()
+        drifted = [(handles[d.slot], d.slot) for d in drift]
+        
+        # Cửa sổ đang dao động (tự đổi lại mỗi lần bị sửa) được để yên đến hết thời gian miễn
+        guard = state.get("guard")
+        if guard is None:
+            guard = state["guard"] = OscillationGuard(self.oscillation, self.clock)
+        if closed:
+            guard.forget(closed)
+        if drifted:
+            drifted = [(handle, slot) for handle, slot in drifted if not guard.exempt(handle)]
+        
+        if metrics:
+            metrics.add_time("drift", time.perf_counter() - start)
+            # Độ lệch tính sẵn đã được bên tính ghi vào histogram
+            for size in (magnitudes or {}).get(title_pattern, ()):
+                metrics.add_drift(size)
+        
+        if not added and not closed and not drifted:
+            state["last_count"] = current_count
+            return False
+        
+        # Debounce: đợi cửa sổ ngừng thay đổi (vd: game đang tự resize) rồi mới sửa
+        if scheduler is not None and not scheduler.settled():
+            return False
+        state["last_count"] = current_count
+        
+        if added or closed:
+            reason = f"Số lượng tab: {last_count} → {current_count}"
+        else:
+            handle, slot = drifted[0]
+            x, y, w, h = rects[handle]
+            sx, sy, sw, sh = tracker.slots[slot]
+            reason = f"Tab slot #{slot} bị di chuyển/resize: ({x},{y}) {w}x{h} → ({sx},{sy}) {sw}x{sh}"
+            if len(drifted) > 1:
+                reason += f" (+{len(drifted) - 1} tab khác)"
+        print(f"\n⚡ Phát hiện thay đổi: {reason}")
+        state["reason"] = reason
+        
+        # Chỉ đưa các cửa sổ mới hoặc bị lệch về slot của chính nó
+        targets = {handle: slot for handle, slot in drifted}
+        for handle in added:
+            targets[handle] = tracker.slot_of(handle)
+        moves = [
+            PlannedMove(windows[handle], rects[handle], tracker.slots[slot], idx, slot)
+            for idx, (handle, slot) in enumerate(sorted(targets.items(), key=lambda item: item[1]))
+        ]
+        if metrics:
+            start = time.perf_counter()
+        result = self._apply(moves, tolerance=tolerance)
+        if metrics:
+            metrics.add_time("correct", time.perf_counter() - start)
+            metrics.add_correction(result)
+        for move in result.applied:
+            print(f"✓ Đã di chuyển tab về vị trí đã lưu #{move.slot}: ({move.target[0]}, {move.target[1]})")
+        self._print_apply_errors(result, "di chuyển", lambda move: f"tab về vị trí #{move.slot}")
+        
+        # Chỉ tính các lần sửa cửa sổ bị lệch; cửa sổ mới mở được đặt vào slot lần đầu
+        corrected = {handle for handle, _ in drifted}
+        oscillations = []
+        for move in result.applied:
+            handle = window_handle(move.window)
+            if handle not in corrected:
+                continue
+            event = guard.record(handle, move.slot)
+            if event is not None:
+                oscillations.append(event)
+                print(f"🔁 Tab slot #{event.slot} tự đổi lại {event.corrections} lần trong "
+                      f"{event.period:.0f}s, tạm ngừng sửa {event.exempt_for:.0f}s")
+        if metrics:
+            metrics.oscillations += len(oscillations)
+        print(f"✓ Hoàn tất sắp xếp lại cho '{title_pattern}': {result.summary()}")
+        state["result"] = result
+        state["oscillations"] = oscillations
+        return True
     
-    def monitor_windows(self, title_pattern: str, interval: float = 2.0, tolerance: int = 10):
+    def _detect_drift(self, title_pattern: str, tracker: SlotTracker, rects: Dict, tolerance: int,
+                      state: Dict, magnitudes: Optional[Dict[str, List[int]]] = None) -> List[Drift]:
+        """
+        Các slot có cửa sổ lệch quá `tolerance` so với slot của nó
+
+        Hình học được ghi vào DriftFrame giữ trong `state` qua các lượt, nên chỉ
+        các cửa sổ đã đổi hình học mới phải tính lại. Layout đã capture dùng
+        khung trên `layout.columns` (MonitorSupervisor dùng chung một khung cho
+        mọi pattern), lưới tự sinh dùng khung riêng dựng từ các slot của nó.
+        """
+        layout = self.layout
+        if title_pattern in layout.windows and \
+                state.get("layout") is self._saved_layout(title_pattern, layout)[0]:
+            columns = layout.columns
+            frame = state.get("frame")
+            if frame is None or frame.layout is not columns:
+                frame = state["frame"] = columns.frame()
+        else:
+            cached = state.get("grid_frame")
+            if cached is None or cached[0] is not tracker:
+                frame = ColumnarLayout.from_slots(title_pattern, tracker.slots).frame()
+                cached = state["grid_frame"] = (tracker, frame)
+            frame = cached[1]
+        frame.put(title_pattern, list(map(rects.get, tracker.by_slot())), tolerance)
+        return frame.drift(magnitudes)
+    
+    def monitor_windows(self, title_pattern: str, interval: float = 2.0, tolerance: int = 10,
+                        event_source: Optional[WindowEventSource] = None,
+                        scheduler: Optional[AdaptiveScheduler] = None,
+                        sleep: Optional[Callable[[float], None]] = None):
         """
         Giám sát và tự động sắp xếp lại các tab
-        Giám sát cả số lượng, vị trí và kích thước
+        Giám sát cả số lượng, vị trí và kích thước. Chạy cho đến khi
+        `monitoring` về False (đặt `monitoring = True` trước khi gọi trực tiếp)
         
         Args:
             title_pattern: Pattern tên tab cần giám sát
             interval: Khoảng thời gian giữa các lần kiểm tra (giây)
             tolerance: Sai số cho phép cho vị trí/kích thước (pixel)
+            event_source: Nguồn sự kiện cửa sổ. Nếu có, chỉ kiểm tra lại khi
+                có sự kiện thay vì quét mỗi `interval` giây
+            scheduler: Bộ lập lịch thích ứng thay cho `interval` cố định khi quét định kỳ;
+                dùng kèm `event_source` thì quét nhanh sau sự kiện đến khi hình học ổn định
+            sleep: Hàm chờ giữa các lượt quét (phát lại trace thay bằng đồng hồ giả lập).
+                Mặc định chờ trên Event dừng, nên `stop_monitoring` có tác dụng ngay
         """
-        print(f"\n🔍 Bắt đầu giám sát tab '{title_pattern}' (mỗi {interval}s)")
+        self._monitor_loop(title_pattern, interval, tolerance, event_source, scheduler,
+                           self._monitor_stop or _STOPPED, sleep)
+    
+    def _monitor_loop(self, title_pattern: str, interval: float, tolerance: int,
+                      event_source: Optional[WindowEventSource],
+                      scheduler: Optional[AdaptiveScheduler],
+                      stop: threading.Event,
+                      sleep: Optional[Callable[[float], None]] = None):
+        """Vòng lặp của `monitor_windows`, dừng khi `stop` được set (Event riêng của phiên)"""
+        if event_source is not None:
+            try:
+                event_source.start()
+            except Exception as e:
+                print(f"⚠ Không dùng được nguồn sự kiện ({e}), chuyển sang quét định kỳ")
+                event_source = None
+        
+        if event_source is not None:
+            settle = f", chờ ổn định {scheduler.settle_time}s" if scheduler is not None else ""
+            print(f"\n🔍 Bắt đầu giám sát tab '{title_pattern}' (theo sự kiện{settle})")
+        elif scheduler is not None:
+            print(f"\n🔍 Bắt đầu giám sát tab '{title_pattern}' "
+                  f"(thích ứng {scheduler.min_interval}s - {scheduler.max_interval}s, "
+                  f"chờ ổn định {scheduler.settle_time}s)")
+        else:
+            print(f"\n🔍 Bắt đầu giám sát tab '{title_pattern}' (mỗi {interval}s)")
         print(f"📏 Sai số cho phép: ±{tolerance}px")
         print("Nhấn Ctrl+C để dừng giám sát\n")
         
-        last_count = 0
-        last_positions = []  # Lưu vị trí lần kiểm tra trước
+        state: Dict = {"last_count": 0}
         
-        while self.monitoring:
+        if event_source is not None:
+            # Kiểm tra một lần lúc bắt đầu, sau đó chỉ khi có sự kiện
             try:
-                current_windows = self.get_windows_by_title(title_pattern)
-                current_count = len(current_windows)
-                
-                # Lấy vị trí hiện tại của các tab
-                current_windows.sort(key=lambda w: (w.left, w.top))
-                current_positions = [
-                    (w.left, w.top, w.width, w.height) 
-                    for w in current_windows
-                ]
-                
-                needs_rearrange = False
-                reason = ""
-                
-                # Kiểm tra số lượng tab thay đổi
-                if current_count != last_count and current_count > 0:
-                    needs_rearrange = True
-                    reason = f"Số lượng tab: {last_count} → {current_count}"
-                
-                # Kiểm tra vị trí/kích thước thay đổi (chỉ khi có dữ liệu đã lưu)
-                elif current_count > 0 and title_pattern in self.windows_data:
-                    saved_windows = self.windows_data[title_pattern]
-                    
-                    for idx, (x, y, w, h) in enumerate(current_positions):
-                        if idx < len(saved_windows):
-                            saved = saved_windows[idx]
-                            
-                            # Kiểm tra sai lệch vị trí
-                            x_diff = abs(x - saved.x)
-                            y_diff = abs(y - saved.y)
-                            w_diff = abs(w - saved.width)
-                            h_diff = abs(h - saved.height)
-                            
-                            if x_diff > tolerance or y_diff > tolerance or \
-                               w_diff > tolerance or h_diff > tolerance:
-                                needs_rearrange = True
-                                reason = f"Tab #{idx} bị di chuyển/resize: ({x},{y}) {w}x{h} → ({saved.x},{saved.y}) {saved.width}x{saved.height}"
-                                break
-                
-                # Thực hiện sắp xếp lại nếu cần
-                if needs_rearrange:
-                    print(f"\n⚡ Phát hiện thay đổi: {reason}")
-                    self.rearrange_windows(title_pattern)
-                    last_count = current_count
-                    last_positions = current_positions
-                
-                time.sleep(interval)
+                self._check_windows(title_pattern, tolerance, state, scheduler=scheduler)
             except Exception as e:
                 print(f"✗ Lỗi trong quá trình giám sát: {e}")
-                time.sleep(interval)
+            while not stop.is_set():
+                # Sự kiện đánh thức scheduler ngay; sau thay đổi thì quét nhanh đến khi
+                # hình học ổn định và được sửa (sự kiện cuối không báo lúc game ngừng resize)
+                pending = scheduler is not None and scheduler.active()
+                events = event_source.wait(timeout=scheduler.next_interval() if pending else interval)
+                if stop.is_set():
+                    break
+                # Hết timeout mà không có sự kiện: chỉ kiểm tra kho layout (một lệnh stat)
+                changed = self.reload_if_changed()
+                self.metrics.maybe_export()
+                if not events and not pending and title_pattern not in changed:
+                    continue
+                try:
+                    self._check_windows(title_pattern, tolerance, state, scheduler=scheduler)
+                except Exception as e:
+                    print(f"✗ Lỗi trong quá trình giám sát: {e}")
+            return
+        
+        wait = sleep or stop.wait
+        while not stop.is_set():
+            try:
+                self.reload_if_changed()
+                self._check_windows(title_pattern, tolerance, state, scheduler=scheduler)
+                self.metrics.maybe_export()
+            except Exception as e:
+                print(f"✗ Lỗi trong quá trình giám sát: {e}")
+            wait(scheduler.next_interval() if scheduler is not None else interval)
     
-    def start_monitoring(self, title_pattern: str, interval: float = 2.0, tolerance: int = 10):
+    def start_monitoring(self, title_pattern: str, interval: float = 2.0, tolerance: int = 10,
+                         use_events: bool = False,
+                         event_source: Optional[WindowEventSource] = None,
+                         scheduler: Optional[AdaptiveScheduler] = None):
         """
         Bắt đầu giám sát trong thread riêng
         
@@ -250,27 +713,73 @@ class WindowManager:
             title_pattern: Pattern tên tab cần giám sát
             interval: Khoảng thời gian giữa các lần kiểm tra (giây)
             tolerance: Sai số cho phép cho vị trí/kích thước (pixel)
+            use_events: Giám sát theo sự kiện nếu hệ điều hành hỗ trợ
+            event_source: Nguồn sự kiện tùy chỉnh (vd: FakeEventSource khi test)
+            scheduler: Bộ lập lịch thích ứng (AdaptiveScheduler) thay cho `interval` cố định
         """
-        if self.monitoring:
-            print("⚠ Đang giám sát rồi!")
-            return
-        
-        self.monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self.monitor_windows,
-            args=(title_pattern, interval, tolerance),
-            daemon=True
-        )
-        self.monitor_thread.start()
-    
-    def stop_monitoring(self):
-        """Dừng giám sát"""
-        if self.monitoring:
-            self.monitoring = False
-            if self.monitor_thread:
-                self.monitor_thread.join(timeout=5)
+        with self._lifecycle_lock:
+            if self.monitoring:
+                print("⚠ Đang giám sát rồi!")
+                return
+            
+            if event_source is None and use_events:
+                event_source = create_default_event_source()
+                if event_source is None:
+                    print("ℹ Hệ điều hành không hỗ trợ theo dõi sự kiện, dùng quét định kỳ")
+            
+            # Thread của phiên trước (nếu chưa kịp thoát) giữ Event đã set của nó nên không chạy tiếp
+            stop = threading.Event()
+            self._monitor_stop = stop
+            self.event_source = event_source
+            self.monitor_thread = threading.Thread(
+                target=self._monitor_loop,
+                args=(title_pattern, interval, tolerance, event_source, scheduler, stop),
+                name="window-monitor",
+                daemon=True
+            )
+            self.monitor_thread.start()
+    
+    def stop_monitoring(self, timeout: float = 5.0):
+        """
+        Dừng giám sát và chờ thread monitor thoát (thường trong vài ms; lâu hơn
+        chỉ khi đang chờ một cửa sổ không phản hồi, tối đa `timeout` giây)
+        """
+        with self._lifecycle_lock:
+            stop = self._monitor_stop
+            if stop is None or stop.is_set():
+                return
+            stop.set()
+            if self.event_source is not None:
+                # Đánh thức monitor đang chờ sự kiện
+                self.event_source.stop()
+                self.event_source = None
+            thread = self.monitor_thread
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+                if thread.is_alive():
+                    print("⚠ Monitor đang chờ một cửa sổ không phản hồi, sẽ tự thoát khi lệnh gọi trả về")
+            if self.metrics.export_path:
+                try:
+                    self.metrics.write_prometheus(self.metrics.export_path)
+                except Exception as e:
+                    print(f"✗ Lỗi khi ghi file thống kê: {e}")
             print("\n✓ Đã dừng giám sát")
     
+    def stats(self) -> Dict:
+        """Thống kê của vòng lặp giám sát: thời gian từng pha, bộ đếm, histogram độ lệch"""
+        return self.metrics.snapshot()
+    
+    def export_stats(self, path: Optional[str] = DEFAULT_METRICS_FILE, period: float = 15.0):
+        """
+        Ghi định kỳ thống kê ra file text Prometheus trong lúc giám sát
+
+        Args:
+            path: File đích, None để tắt
+            period: Chu kỳ ghi lại (giây)
+        """
+        self.metrics.export_path = path
+        self.metrics.export_period = period
+    
     def list_saved_patterns(self):
         """Liệt kê tất cả các pattern đã lưu"""
         if not self.windows_data:
@@ -286,12 +795,115 @@ class WindowManager:
         print("=" * 60)
 
 
+def _parse_options(args: List[str]):
+    """
+    Tách tham số dòng lệnh thành (danh sách vị trí, dict tùy chọn)
+    `--key value` → {"key": "value"}, `--flag` (không có giá trị) → {"flag": True}
+    """
+    positional: List[str] = []
+    options: Dict[str, object] = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            key = arg[2:]
+            if i + 1 < len(args) and not args[i + 1].startswith("--"):
+                options[key] = args[i + 1]
+                i += 2
+                continue
+            options[key] = True
+        else:
+            positional.append(arg)
+        i += 1
+    return positional, options
+
+
+TILING_OPTIONS = {"tile", "columns", "rows", "aspect", "margin", "overlap", "work-area"}
+
+
+def _tiling_template(manager: WindowManager, title_pattern: str, options: Dict) -> Optional[TilingTemplate]:
+    """Mẫu lưới từ tùy chọn dòng lệnh (None nếu không có tùy chọn lưới)"""
+    from window_tiling import parse_template
+    
+    if not options.keys() & TILING_OPTIONS:
+        return None
+    # Tùy chọn không chỉ định lấy theo layout đã capture (vùng, tỉ lệ, độ chồng)
+    base = None
+    if manager.windows_data.get(title_pattern):
+        base = manager._saved_layout(title_pattern)[1]
+    return parse_template(options, base)
+
+
+SELECTOR_OPTIONS = {"match", "process", "class", "case-sensitive"}
+
+
+def _apply_selector_options(manager: WindowManager, title_pattern: str, options: Dict):
+    """Đặt bộ chọn cho pattern từ tùy chọn dòng lệnh (--match, --process, --class, --case-sensitive)"""
+    if not options.keys() & SELECTOR_OPTIONS:
+        return
+    selector = Selector.parse(title_pattern)
+    mode = options.get("match")
+    manager.selectors[title_pattern] = Selector(
+        selector.pattern,
+        mode=mode if isinstance(mode, str) else selector.mode,
+        case_sensitive=bool(options.get("case-sensitive")),
+        process=options.get("process") if isinstance(options.get("process"), str) else None,
+        window_class=options.get("class") if isinstance(options.get("class"), str) else None,
+    )
+
+
+def _enable_metrics_export(manager: WindowManager, options: Dict):
+    """Bật ghi file Prometheus nếu có tùy chọn --metrics-file"""
+    metrics_file = options.get("metrics-file")
+    if metrics_file:
+        path = metrics_file if isinstance(metrics_file, str) else DEFAULT_METRICS_FILE
+        manager.export_stats(path)
+        print(f"📊 Ghi thống kê vào {path}")
+
+
+def _forward_to_daemon(command: str, args: List[str]) -> bool:
+    """
+    Chuyển lệnh CLI cho daemon nếu đang chạy (không phải tải backend/layout)
+    Trả về False nếu không có daemon hoặc lệnh phải chạy tại chỗ
+    """
+    from window_daemon import send_request
+    
+    positional, options = _parse_options(args)
+    if options.get("local"):
+        return False
+    pattern = positional[0] if positional else None
+    request_options: Dict = {}
+    if command == "monitor":
+        # Daemon giám sát bằng một vòng lặp chung; các chế độ khác chạy tại chỗ
+        if options.keys() - {"interval", "tolerance"}:
+            return False
+        request_options = {k: options[k] for k in ("interval", "tolerance") if k in options}
+        command = "monitor_start"
+    elif command == "unmonitor":
+        command = "monitor_stop"
+    elif command == "stats" and positional:
+        return False  # Đọc file thống kê chỉ định
+    elif command not in ("list", "stats", "capture", "restore", "rearrange"):
+        return False
+    elif options.keys() - {"local"}:
+        return False  # Tùy chọn (vd: mẫu lưới) chỉ được xử lý tại chỗ
+    
+    response = send_request(command, pattern, request_options)
+    if response is None:
+        return False  # Không kết nối được: chưa gửi gì, chạy tại chỗ
+    if not response.get("ok"):
+        print(f"✗ Daemon: {response.get('error')}")
+        return True
+    print(response.get("output", ""), end="")
+    if command == "stats":
+        print(format_stats(response["result"]))
+    return True
+
+
 def main():
     """Hàm main để chạy tool"""
     import sys
     
-    manager = WindowManager()
-    
     if len(sys.argv) < 2:
         print("""
 ╔══════════════════════════════════════════════════════════════╗
@@ -302,8 +914,31 @@ Cách sử dụng:
   python window_manager.py capture <tên_tab>      - Capture vị trí các tab
   python window_manager.py restore <tên_tab>      - Restore vị trí đã lưu
   python window_manager.py rearrange <tên_tab>    - Sắp xếp lại khi có tab đóng
+      [--tile] [--columns N] [--rows N]           - Xếp vào lưới tự sinh (cả cho monitor); tùy chọn
+      [--aspect 1.78] [--margin 0] [--overlap 8]    không chỉ định được suy ra từ layout đã capture
+      [--work-area x,y,w,h]
+      [--match substring|exact|regex|glob]        - (capture, restore, rearrange, monitor, record, replay)
+      [--process chrome.exe] [--class lớp]          Kiểu khớp tiêu đề, lọc theo tiến trình/lớp cửa sổ;
+      [--case-sensitive]                            cũng có thể viết "re:...", "glob:...", "exact:..."
   python window_manager.py monitor <tên_tab>      - Tự động giám sát và sắp xếp
+      [--events]                                  - Giám sát theo sự kiện thay vì quét định kỳ
+      [--interval 2.0] [--tolerance 10]           - Khoảng quét cố định / sai số cho phép
+      [--adaptive] [--min-interval 0.25]          - Quét thích ứng: nhanh sau thay đổi,
+      [--max-interval 2] [--settle 0.5]             giãn dần khi ổn định, chờ ổn định rồi mới sửa
+  python window_manager.py monitor-all [tên_tab ...] - Giám sát nhiều pattern trong một vòng lặp
+      [--interval 2.0] [--tolerance 10]           - (mặc định: tất cả pattern đã lưu)
+      [--metrics-file [file]]                     - (monitor, monitor-all) Ghi thống kê Prometheus định kỳ
+  python window_manager.py record <tên_tab> <file> - Ghi trace hình học các tab (nhị phân)
+      [--interval 0.5] [--duration giây]
+  python window_manager.py replay <tên_tab> <file> - Phát lại trace qua monitor trên backend giả lập
+      [--interval 2.0] [--tolerance 10]             (dùng layout đã lưu; nhận cả tùy chọn thích ứng)
+      [--speed 0]                                 - Hệ số tăng tốc, 0 = nhanh nhất có thể
+  python window_manager.py stats [file]           - Xem thống kê của monitor đang chạy
   python window_manager.py list                   - Liệt kê các pattern đã lưu
+  python window_manager.py daemon [--port 0]      - Chạy nền: các lệnh trên được chuyển cho daemon
+                                                    (monitor trả về ngay, thêm --local để chạy tại chỗ)
+  python window_manager.py unmonitor <tên_tab>    - Dừng giám sát một pattern trong daemon
+  python window_manager.py daemon-stop            - Dừng daemon
 
 Ví dụ:
   python window_manager.py capture "MetaBomb 2.0"
@@ -314,29 +949,163 @@ Ví dụ:
     
     command = sys.argv[1].lower()
     
-    if command == "list":
+    if command == "daemon-stop":
+        from window_daemon import send_request
+        response = send_request("shutdown")
+        if response is None:
+            print("ℹ Không có daemon nào đang chạy")
+        elif not response.get("ok"):
+            print(f"✗ Daemon: {response.get('error')}")
+        else:
+            print("✓ Đã dừng daemon")
+        return
+    if command == "daemon":
+        from window_daemon import send_request
+        if send_request("ping", timeout=2.0):
+            print("⚠ Daemon đang chạy rồi!")
+            return
+    if command == "unmonitor" and len(sys.argv) < 3:
+        print("✗ Vui lòng cung cấp tên tab")
+        return
+    if _forward_to_daemon(command, sys.argv[2:]):
+        return
+    if command == "unmonitor":
+        print("ℹ Không có daemon nào đang chạy")
+        return
+    
+    # Lệnh chỉ đọc: không in thông báo khởi động, backend không bao giờ được tải
+    manager = WindowManager(verbose=command not in ("list", "stats"))
+    
+    if command == "daemon":
+        from window_daemon import WindowManagerDaemon
+        
+        _, options = _parse_options(sys.argv[2:])
+        daemon = WindowManagerDaemon(manager, port=int(options.get("port", 0)))
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Tạm biệt!")
+    elif command == "list":
         manager.list_saved_patterns()
+    elif command == "stats":
+        # Monitor chạy ở tiến trình khác ghi thống kê ra file (--metrics-file)
+        path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_METRICS_FILE
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                print(f.read())
+        else:
+            print(f"ℹ Chưa có file thống kê {path} (chạy monitor với --metrics-file)")
+            print(format_stats(manager.stats()))
+    elif command == "monitor-all":
+        from window_supervisor import MonitorSupervisor, PatternSettings
+        
+        patterns, options = _parse_options(sys.argv[2:])
+        default = PatternSettings(
+            interval=float(options.get("interval", 2.0)),
+            tolerance=int(options.get("tolerance", 10))
+        )
+        supervisor = MonitorSupervisor(manager, patterns or None, default=default)
+        if not supervisor.patterns:
+            print("✗ Không có pattern nào để giám sát")
+            return
+        _enable_metrics_export(manager, options)
+        try:
+            supervisor.start()
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            supervisor.stop()
+            print(format_stats(manager.stats()))
+            print("\n👋 Tạm biệt!")
+    elif command in ("record", "replay"):
+        positional, options = _parse_options(sys.argv[2:])
+        if len(positional) < 2:
+            print("✗ Vui lòng cung cấp tên tab và file trace")
+            return
+        title_pattern, path = positional[:2]
+        _apply_selector_options(manager, title_pattern, options)
+        if command == "record":
+            from window_trace import record_windows
+            duration = options.get("duration")
+            record_windows(manager, title_pattern, path, interval=float(options.get("interval", 0.5)),
+                           duration=float(duration) if duration else None)
+            return
+        
+        from window_trace import replay_trace
+        scheduler = None
+        if options.keys() & {"adaptive", "min-interval", "max-interval", "settle"}:
+            scheduler = AdaptiveScheduler(
+                min_interval=float(options.get("min-interval", 0.25)),
+                max_interval=float(options.get("max-interval", 2.0)),
+                settle_time=float(options.get("settle", 0.5))
+            )
+        interval = options.get("interval")
+        try:
+            replay_trace(manager, title_pattern, path,
+                         interval=float(interval) if interval else None,
+                         tolerance=int(options.get("tolerance", 10)),
+                         speed=float(options.get("speed", 0)),
+                         scheduler=scheduler)
+        except (OSError, ValueError) as e:
+            print(f"✗ Không phát lại được {path}: {e}")
+            return
+        print(format_stats(manager.stats()))
     elif command in ["capture", "restore", "rearrange", "monitor"]:
         if len(sys.argv) < 3:
             print("✗ Vui lòng cung cấp tên tab")
             return
         
         title_pattern = sys.argv[2]
+        _, options = _parse_options(sys.argv[3:])
+        try:
+            _apply_selector_options(manager, title_pattern, options)
+            manager.selector(title_pattern)
+        except (re.error, ValueError) as e:
+            print(f"✗ Bộ chọn không hợp lệ: {e}")
+            return
         
         if command == "capture":
             manager.capture_windows(title_pattern)
         elif command == "restore":
             manager.restore_windows(title_pattern)
         elif command == "rearrange":
-            manager.rearrange_windows(title_pattern)
+            try:
+                template = _tiling_template(manager, title_pattern, options)
+            except ValueError as e:
+                print(f"✗ Mẫu lưới không hợp lệ: {e}")
+                return
+            manager.rearrange_windows(title_pattern, template=template)
         elif command == "monitor":
             try:
-                manager.start_monitoring(title_pattern)
+                template = _tiling_template(manager, title_pattern, options)
+            except ValueError as e:
+                print(f"✗ Mẫu lưới không hợp lệ: {e}")
+                return
+            try:
+                use_events = bool(options.get("events"))
+                scheduler = None
+                if options.keys() & {"adaptive", "min-interval", "max-interval", "settle"}:
+                    scheduler = AdaptiveScheduler(
+                        min_interval=float(options.get("min-interval", 0.25)),
+                        max_interval=float(options.get("max-interval", 2.0)),
+                        settle_time=float(options.get("settle", 0.5))
+                    )
+                if template is not None:
+                    manager.templates[title_pattern] = template
+                _enable_metrics_export(manager, options)
+                manager.start_monitoring(
+                    title_pattern,
+                    interval=float(options.get("interval", 2.0)),
+                    tolerance=int(options.get("tolerance", 10)),
+                    use_events=use_events,
+                    scheduler=scheduler
+                )
                 # Giữ chương trình chạy
                 while True:
                     time.sleep(1)
             except KeyboardInterrupt:
                 manager.stop_monitoring()
+                print(format_stats(manager.stats()))
                 print("\n👋 Tạm biệt!")
     else:
         print(f"✗ Lệnh không hợp lệ: {command}")
@@ -3,19 +3,33 @@ Modern GUI for Window Manager using CustomTkinter
 """
 
 import customtkinter as ctk
+import queue
 import threading
-from window_manager import WindowManager
+from task_executor import FAILED, RUNNING, CoalescingExecutor, Task
+from window_manager import WindowManager, _parse_options
+from window_scheduler import AdaptiveScheduler
+from log_sink import QueueLogSink
 import sys
-from PIL import Image
-import os
 
 # Cấu hình theme
 ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
 class WindowManagerApp(ctk.CTk):
-    def __init__(self):
+    LOG_POLL_MS = 50  # Chu kỳ lấy log từ queue ra textbox
+    TASK_POLL_MS = 100  # Chu kỳ cập nhật trạng thái tác vụ (thời gian chạy)
+    # Thao tác → chữ hiển thị trên thanh trạng thái
+    ACTIONS = {"capture": "capture", "restore": "restore", "rearrange": "sắp xếp"}
+
+    def __init__(self, log_max_lines: int = 5000, log_file: str = None):
+        """
+        Args:
+            log_max_lines: Số dòng tối đa giữ trong ô nhật ký (cũ hơn sẽ bị xóa)
+            log_file: Ghi toàn bộ nhật ký ra file xoay vòng, None để tắt
+        """
         super().__init__()
+        self.log_max_lines = log_max_lines
+        self.log_sink = QueueLogSink(mirror_file=log_file)
 
         # Window setup
         self.title("Window Manager Pro")
@@ -23,11 +37,22 @@ class WindowManagerApp(ctk.CTk):
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.manager = WindowManager()
+        # Cấu hình và backend được tải ở thread nền để cửa sổ hiện ngay
+        self.manager = None
+        self._loaded_manager = None
+        self._load_failed = False
         self.monitoring = False
+        self.monitor_title = None
+
+        # Các nút bấm chạy lần lượt trên một worker; trạng thái về thread Tk qua queue
+        self._task_updates: "queue.SimpleQueue[Task]" = queue.SimpleQueue()
+        self.tasks = CoalescingExecutor(on_update=self._task_updates.put)
+        self._tasks_busy = False
 
         self.setup_ui()
         self.redirect_output()
+        self._start_loading()
+        self.after(self.TASK_POLL_MS, self._poll_tasks)
 
     def setup_ui(self):
         # ============ Sidebar (Left) ============
@@ -62,6 +87,11 @@ class WindowManagerApp(ctk.CTk):
                                          text_color=("gray10", "#DCE4EE"))
         self.btn_rearrange.grid(row=4, column=0, padx=20, pady=10)
         
+        # Live stats panel
+        self.stats_label = ctk.CTkLabel(self.sidebar_frame, text="", justify="left", anchor="sw",
+                                      font=ctk.CTkFont(family="Consolas", size=11), text_color="gray")
+        self.stats_label.grid(row=5, column=0, padx=20, pady=(10, 0), sticky="sw")
+
         self.btn_list = ctk.CTkButton(self.sidebar_frame, text="Xem Danh Sách", 
                                     command=self.list_patterns,
                                     fg_color="transparent", text_color="gray")
@@ -101,6 +131,22 @@ class WindowManagerApp(ctk.CTk):
                                           text_color="#3B8ED0")
         self.tolerance_label.pack(side="right")
 
+        # Event-driven switch
+        self.events_switch = ctk.CTkSwitch(self.settings_frame, text="Giám sát theo sự kiện (thay vì quét định kỳ)",
+                                         font=ctk.CTkFont(size=13))
+        self.events_switch.pack(anchor="w", pady=(15, 0))
+
+        # Adaptive polling
+        self.adaptive_switch = ctk.CTkSwitch(self.settings_frame, text="Quét thích ứng (nhanh khi thay đổi, giãn dần khi ổn định)",
+                                           font=ctk.CTkFont(size=13))
+        self.adaptive_switch.pack(anchor="w", pady=(10, 0))
+
+        self.adaptive_frame = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
+        self.adaptive_frame.pack(fill="x", pady=(5, 0))
+        self.min_interval_entry = self._add_number_entry(self.adaptive_frame, "Min (s):", "0.25")
+        self.max_interval_entry = self._add_number_entry(self.adaptive_frame, "Max (s):", "2")
+        self.settle_entry = self._add_number_entry(self.adaptive_frame, "Chờ ổn định (s):", "0.5")
+
         # 2. Monitoring Action Area (Big Button)
         self.monitor_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.monitor_frame.grid(row=1, column=1, padx=20, pady=(0, 20), sticky="ew")
@@ -123,25 +169,83 @@ class WindowManagerApp(ctk.CTk):
                                      fg_color=("gray90", "gray20"))
         self.status_bar.grid(row=4, column=0, columnspan=2, sticky="ew")
 
-        # Initial Log
+        # Thanh tiến trình, chỉ hiện khi có tác vụ đang chạy
+        self.task_progress = ctk.CTkProgressBar(self, mode="indeterminate", height=4, corner_radius=0)
+        self.task_progress.grid(row=5, column=0, columnspan=2, sticky="ew")
+        self.task_progress.grid_remove()
+
+    def _action_buttons(self):
+        return (self.btn_capture, self.btn_restore, self.btn_rearrange, self.btn_list, self.btn_monitor)
+
+    def _start_loading(self):
+        for button in self._action_buttons():
+            button.configure(state="disabled")
+        self.status_bar.configure(text="Đang tải cấu hình...", text_color="#3B8ED0")
+        threading.Thread(target=self._load_manager, daemon=True).start()
+        self.after(self.LOG_POLL_MS, self._finish_loading)
+
+    def _load_manager(self):
+        try:
+            manager = WindowManager()
+            manager.backend  # Tải backend luôn để lần bấm đầu tiên không phải chờ
+        except Exception as e:
+            print(f"✗ Lỗi khi khởi tạo: {e}")
+            self._load_failed = True
+            return
+        self._loaded_manager = manager
+
+    def _finish_loading(self):
+        if self._load_failed:
+            self.status_bar.configure(text="Lỗi khi tải cấu hình", text_color="#E04F5F")
+            return
+        if self._loaded_manager is None:
+            self.after(self.LOG_POLL_MS, self._finish_loading)
+            return
+        self.manager = self._loaded_manager
+        for button in self._action_buttons():
+            button.configure(state="normal")
+        self.status_bar.configure(text="Sẵn sàng", text_color=("black", "white"))
         self.log("Hệ thống đã sẵn sàng.")
+        self.update_stats_panel()
+
+    def _add_number_entry(self, parent, label, default):
+        ctk.CTkLabel(parent, text=label, font=ctk.CTkFont(size=13)).pack(side="left", padx=(0, 5))
+        entry = ctk.CTkEntry(parent, width=60)
+        entry.pack(side="left", padx=(0, 15))
+        entry.insert(0, default)
+        return entry
+
+    def _read_float(self, entry, default):
+        try:
+            return float(entry.get())
+        except ValueError:
+            return default
 
     def update_tolerance_label(self, value):
         self.tolerance_label.configure(text=f"{int(value)} px")
 
     def redirect_output(self):
-        class OutputRedirector:
-            def __init__(self, text_widget):
-                self.text_widget = text_widget
-            def write(self, string):
-                self.text_widget.insert("end", string)
-                self.text_widget.see("end")
-            def flush(self): pass
-        sys.stdout = OutputRedirector(self.log_textbox)
+        # Mọi thread chỉ ghi vào queue, thread Tk lấy ra theo lô
+        sys.stdout = self.log_sink
+        self.after(self.LOG_POLL_MS, self._drain_log)
+
+    def _drain_log(self):
+        text = self.log_sink.drain()
+        if text:
+            # Chỉ giữ tối đa log_max_lines dòng cuối trong ô nhật ký
+            lines = text.splitlines(keepends=True)
+            if len(lines) > self.log_max_lines:
+                text = "".join(lines[-self.log_max_lines:])
+            self.log_textbox.insert("end", text)
+            line_count = int(self.log_textbox.index("end-1c").split(".")[0])
+            excess = line_count - self.log_max_lines
+            if excess > 0:
+                self.log_textbox.delete("1.0", f"{excess + 1}.0")
+            self.log_textbox.see("end")
+        self.after(self.LOG_POLL_MS, self._drain_log)
 
     def log(self, message):
-        self.log_textbox.insert("end", message + "\n")
-        self.log_textbox.see("end")
+        self.log_sink.write(message + "\n")
 
     def get_title(self):
         title = self.title_entry.get().strip()
@@ -152,29 +256,67 @@ class WindowManagerApp(ctk.CTk):
         return title
 
     def capture_windows(self):
-        title = self.get_title()
-        if not title: return
-        self.status_bar.configure(text=f"Đang capture '{title}'...", text_color="#3B8ED0")
-        threading.Thread(target=lambda: self._run_task(self.manager.capture_windows, title), daemon=True).start()
+        self._submit("capture", self.manager.capture_windows)
 
     def restore_windows(self):
-        title = self.get_title()
-        if not title: return
-        self.status_bar.configure(text=f"Đang restore '{title}'...", text_color="#3B8ED0")
-        threading.Thread(target=lambda: self._run_task(self.manager.restore_windows, title), daemon=True).start()
+        self._submit("restore", self.manager.restore_windows)
 
     def rearrange_windows(self):
-        title = self.get_title()
-        if not title: return
-        self.status_bar.configure(text=f"Đang sắp xếp '{title}'...", text_color="#3B8ED0")
-        threading.Thread(target=lambda: self._run_task(self.manager.rearrange_windows, title), daemon=True).start()
+        self._submit("rearrange", self.manager.rearrange_windows)
 
     def list_patterns(self):
         self.manager.list_saved_patterns()
 
-    def _run_task(self, func, *args):
-        func(*args)
-        self.status_bar.configure(text="Sẵn sàng", text_color=("black", "white"))
+    def _submit(self, action, func):
+        """Xếp thao tác vào hàng đợi; bấm lại khi thao tác cùng pattern còn chờ chỉ gộp vào"""
+        title = self.get_title()
+        if not title: return
+        self.tasks.submit((action, title), f"{self.ACTIONS[action]} '{title}'", func, title)
+
+    def _poll_tasks(self):
+        """Chạy trên thread Tk: áp dụng các thay đổi trạng thái tác vụ từ worker"""
+        try:
+            while True:
+                task = self._task_updates.get_nowait()
+                if task.done:
+                    self._report_task(task)
+        except queue.Empty:
+            pass
+        self._render_tasks()
+        self.after(self.TASK_POLL_MS, self._poll_tasks)
+
+    def _report_task(self, task):
+        merged = f" (gộp {task.coalesced} lần bấm)" if task.coalesced else ""
+        if task.status == FAILED:
+            self.log(f"✗ Lỗi khi {task.label}: {task.error}")
+        else:
+            self.log(f"⏱ {task.label.capitalize()} xong sau {task.elapsed():.2f}s{merged}")
+
+    def _render_tasks(self):
+        running = self.tasks.running
+        pending = self.tasks.pending()
+        if running is None or running.status != RUNNING:
+            if not self._tasks_busy:
+                return
+            # Vừa hết tác vụ: trả thanh trạng thái về như trước
+            self._tasks_busy = False
+            self.task_progress.stop()
+            self.task_progress.grid_remove()
+            if self.monitoring:
+                self.status_bar.configure(text=f"Đang giám sát '{self.monitor_title}'...", text_color="#2CC985")
+            else:
+                self.status_bar.configure(text="Sẵn sàng", text_color=("black", "white"))
+            return
+        text = f"Đang {running.label}... {running.elapsed():.1f}s"
+        if running.coalesced:
+            text += f" (gộp {running.coalesced} lần bấm)"
+        if pending:
+            text += "  |  Chờ: " + ", ".join(task.label for task in pending)
+        self.status_bar.configure(text=text, text_color="#3B8ED0")
+        if not self._tasks_busy:
+            self._tasks_busy = True
+            self.task_progress.grid()
+            self.task_progress.start()
 
     def toggle_monitoring(self):
         title = self.get_title()
@@ -182,23 +324,71 @@ class WindowManagerApp(ctk.CTk):
 
         if not self.monitoring:
             self.monitoring = True
+            self.monitor_title = title
             self.btn_monitor.configure(text="⏸  DỪNG GIÁM SÁT", fg_color="#E04F5F", hover_color="#B03E4B")
             self.status_bar.configure(text=f"Đang giám sát '{title}'...", text_color="#2CC985")
             
             tol = int(self.tolerance_slider.get())
-            self.manager.start_monitoring(title, interval=2.0, tolerance=tol)
+            use_events = bool(self.events_switch.get())
+            scheduler = None
+            if self.adaptive_switch.get():
+                try:
+                    scheduler = AdaptiveScheduler(
+                        min_interval=self._read_float(self.min_interval_entry, 0.25),
+                        max_interval=self._read_float(self.max_interval_entry, 2.0),
+                        settle_time=self._read_float(self.settle_entry, 0.5)
+                    )
+                except ValueError as e:
+                    self.log(f"⚠️ Cấu hình quét thích ứng không hợp lệ: {e}")
+            self.manager.start_monitoring(title, interval=2.0, tolerance=tol,
+                                          use_events=use_events, scheduler=scheduler)
         else:
             self.monitoring = False
             self.btn_monitor.configure(text="▶  BẮT ĐẦU GIÁM SÁT", fg_color="#2CC985", hover_color="#229E68")
             self.status_bar.configure(text="Sẵn sàng", text_color=("black", "white"))
             self.manager.stop_monitoring()
 
+    def update_stats_panel(self):
+        snap = self.manager.stats()
+        if snap["enabled"]:
+            phases = snap["phases"]
+            self.stats_label.configure(text=(
+                f"Lượt kiểm tra: {snap['ticks']}\n"
+                f"Lần sửa: {snap['corrections']}\n"
+                f"Tab đã di chuyển: {snap['windows_moved']}\n"
+                f"Lỗi di chuyển: {snap['failed_moves']}\n"
+                f"Quá hạn: {snap['timed_out_moves']}\n"
+                f"Dao động: {snap['oscillations']}\n"
+                f"Liệt kê: {phases['enumerate']['avg_ms']:.2f} ms\n"
+                f"Lọc tiêu đề: {phases['match']['avg_ms']:.2f} ms\n"
+                f"Kiểm tra lệch: {phases['drift']['avg_ms']:.2f} ms\n"
+                f"Sửa: {phases['correct']['avg_ms']:.2f} ms\n"
+                f"Độ lệch TB: {snap['drift_avg_px']:.1f} px"
+            ))
+        self.after(1000, self.update_stats_panel)
+
     def on_closing(self):
-        if self.monitoring:
+        self.tasks.shutdown()
+        if self.monitoring and self.manager is not None:
             self.manager.stop_monitoring()
+        sys.stdout = sys.__stdout__
+        self.log_sink.drain()
+        self.log_sink.close()
         self.destroy()
 
-if __name__ == "__main__":
-    app = WindowManagerApp()
+
+def main():
+    _, options = _parse_options(sys.argv[1:])
+    log_max_lines = options.get("log-max-lines", "5000")
+    log_file = options.get("log-file")
+    if not isinstance(log_max_lines, str) or not log_max_lines.isdigit() or int(log_max_lines) < 1 \
+            or (log_file is not None and not isinstance(log_file, str)):
+        print("✗ Dùng: python window_manager_gui.py [--log-max-lines N] [--log-file đường_dẫn]")
+        return
+    app = WindowManagerApp(log_max_lines=int(log_max_lines), log_file=log_file)
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
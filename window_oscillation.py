@@ -0,0 +1,107 @@
+"""
+Phát hiện dao động khi sửa vị trí cửa sổ
+Cửa sổ tự đổi lại hình học ngay sau khi bị sửa (vd: game tự scale) sẽ bị
+sửa mãi ở mọi lượt. Lịch sử sửa được ghi theo từng cửa sổ; cửa sổ bị sửa
+quá nhiều lần trong một khoảng thời gian được tạm miễn sửa, thời gian miễn
+tăng gấp đôi mỗi lần tái phạm
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class OscillationPolicy:
+    """
+    Ngưỡng phát hiện dao động và thời gian miễn sửa
+
+    Cửa sổ bị sửa `threshold` lần trong `window` giây được miễn sửa
+    `backoff` giây, gấp đôi mỗi lần tái phạm (tối đa `max_backoff`). Cửa sổ
+    đứng yên `calm` giây sau khi hết miễn được tính lại từ đầu.
+    `threshold` = 0 để tắt.
+    """
+    threshold: int = 3
+    window: float = 30.0
+    backoff: float = 10.0
+    max_backoff: float = 600.0
+    calm: float = 120.0
+
+
+@dataclass(frozen=True)
+class OscillationEvent:
+    """Một cửa sổ vừa bị tạm miễn sửa vì dao động"""
+    handle: object
+    slot: int
+    corrections: int  # Số lần sửa trong khoảng phát hiện
+    period: float  # Khoảng phát hiện (giây)
+    exempt_for: float  # Thời gian miễn sửa (giây)
+    level: int  # Lần tái phạm thứ mấy (1 = lần đầu)
+
+
+class _Exemption:
+    __slots__ = ("level", "until")
+
+    def __init__(self, level: int, until: float):
+        self.level = level
+        self.until = until
+
+
+class OscillationGuard:
+    """Lịch sử sửa và trạng thái miễn sửa của các cửa sổ trong một monitor"""
+
+    def __init__(self, policy: Optional[OscillationPolicy] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.policy = policy or OscillationPolicy()
+        self.clock = clock
+        self._history: Dict[object, Deque[float]] = {}
+        self._exemptions: Dict[object, _Exemption] = {}
+
+    def exempt(self, handle) -> bool:
+        """Cửa sổ có đang được miễn sửa không"""
+        exemption = self._exemptions.get(handle)
+        return exemption is not None and self.clock() < exemption.until
+
+    def exempt_remaining(self, handle) -> float:
+        exemption = self._exemptions.get(handle)
+        return max(exemption.until - self.clock(), 0.0) if exemption is not None else 0.0
+
+    def record(self, handle, slot: int) -> Optional[OscillationEvent]:
+        """Ghi nhận một lần sửa; trả về sự kiện nếu cửa sổ vừa bị phát hiện dao động"""
+        policy = self.policy
+        if policy.threshold <= 0:
+            return None
+        now = self.clock()
+        exemption = self._exemptions.get(handle)
+        if exemption is not None and now - exemption.until >= policy.calm:
+            # Đã yên đủ lâu sau lần miễn trước: không tính là tái phạm
+            del self._exemptions[handle]
+            exemption = None
+
+        history = self._history.get(handle)
+        if history is None:
+            history = self._history[handle] = deque()
+        history.append(now)
+        while history and history[0] <= now - policy.window:
+            history.popleft()
+        if len(history) < policy.threshold:
+            return None
+
+        level = exemption.level + 1 if exemption is not None else 1
+        exempt_for = min(policy.backoff * 2 ** (level - 1), policy.max_backoff)
+        self._exemptions[handle] = _Exemption(level, now + exempt_for)
+        corrections = len(history)
+        history.clear()
+        return OscillationEvent(handle, slot, corrections, policy.window, exempt_for, level)
+
+    def forget(self, handles):
+        """Bỏ lịch sử của các cửa sổ đã đóng"""
+        for handle in handles:
+            self._history.pop(handle, None)
+            self._exemptions.pop(handle, None)
+
+    def exempted(self) -> List[object]:
+        """Các cửa sổ đang được miễn sửa"""
+        now = self.clock()
+        return [h for h, e in self._exemptions.items() if now < e.until]
@@ -0,0 +1,80 @@
+"""
+Bộ lập lịch quét thích ứng cho vòng lặp giám sát
+Quét nhanh ngay sau khi có thay đổi, giãn dần (exponential backoff) khi các
+cửa sổ đứng yên, và chỉ cho phép sửa khi hình học đã ổn định
+"""
+
+import time
+from typing import Callable, Hashable, Optional
+
+
+class AdaptiveScheduler:
+    """
+    Lập lịch khoảng quét thích ứng có debounce và hysteresis
+
+    - Khi phát hiện thay đổi: về `min_interval` và giữ tốc độ nhanh trong
+      `fast_period` giây (hysteresis, tránh nhảy qua lại giữa nhanh/chậm)
+    - Khi ổn định: nhân khoảng quét với `backoff` đến tối đa `max_interval`.
+      Trần mặc định 2s bằng chu kỳ quét cố định cũ, nên lần thay đổi đầu tiên
+      sau một lúc yên lặng không bị phát hiện trễ hơn trước; dùng kèm nguồn sự
+      kiện thì thay đổi đánh thức monitor ngay và trần chỉ còn là nhịp kiểm tra kho
+    - Debounce: `settled()` chỉ True khi hình học không đổi trong `settle_time` giây
+    """
+
+    def __init__(self, min_interval: float = 0.25, max_interval: float = 2.0,
+                 settle_time: float = 0.5, backoff: float = 2.0, fast_period: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            min_interval: Khoảng quét nhỏ nhất ngay sau khi có thay đổi (giây)
+            max_interval: Khoảng quét lớn nhất khi ổn định lâu (giây)
+            settle_time: Thời gian hình học phải đứng yên trước khi sửa (giây)
+            backoff: Hệ số giãn khoảng quét mỗi lượt ổn định
+            fast_period: Thời gian giữ tốc độ nhanh sau thay đổi cuối (giây)
+            clock: Hàm lấy thời gian (thay bằng đồng hồ giả lập khi test)
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Cần 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.settle_time = settle_time
+        self.backoff = max(backoff, 1.0)
+        self.fast_period = fast_period
+        self.clock = clock
+
+        self.interval = min_interval
+        self.wakeups = 0
+        self.changes = 0
+        self._signature: Optional[Hashable] = None
+        self._last_change = float("-inf")
+
+    def observe(self, signature: Hashable) -> bool:
+        """
+        Ghi nhận hình học của lượt quét hiện tại
+        Trả về True nếu khác lượt trước
+        """
+        now = self.clock()
+        self.wakeups += 1
+        first = self._signature is None
+        changed = not first and signature != self._signature
+        self._signature = signature
+
+        if changed:
+            self.changes += 1
+            self._last_change = now
+            self.interval = self.min_interval
+        elif now - self._last_change >= self.fast_period:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changed
+
+    def settled(self) -> bool:
+        """Hình học đã đứng yên đủ `settle_time` chưa"""
+        return self.clock() - self._last_change >= self.settle_time
+
+    def active(self) -> bool:
+        """Còn trong `fast_period` sau thay đổi cuối (cần quét nhanh đến khi sửa xong)"""
+        return self.clock() - self._last_change < self.fast_period
+
+    def next_interval(self) -> float:
+        """Khoảng thời gian chờ đến lượt quét tiếp theo"""
+        return self.interval
@@ -0,0 +1,169 @@
+"""
+Bộ chọn cửa sổ
+Chọn cửa sổ theo tiêu đề (chứa chuỗi, khớp đúng, regex, glob), tùy chọn thêm
+tên tiến trình và lớp cửa sổ. Bộ chọn được biên dịch một lần; kết quả khớp
+được ghi nhớ theo handle và chỉ tính lại khi tiêu đề cửa sổ đó đổi, nên mỗi
+lượt monitor chỉ tốn công cho các cửa sổ vừa đổi tiêu đề
+
+Pattern dạng chuỗi có thể chọn kiểu khớp bằng tiền tố:
+    "MetaBomb"          chứa chuỗi (mặc định, không phân biệt hoa thường)
+    "exact:MetaBomb 2.0" khớp đúng cả tiêu đề
+    "re:^MetaBomb \\d"   regex (tìm ở bất kỳ vị trí nào)
+    "glob:MetaBomb*"     glob (cả tiêu đề)
+"""
+
+import fnmatch
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from window_backends import window_handle
+
+MATCH_MODES = ("substring", "exact", "regex", "glob")
+_PREFIXES = {"exact:": "exact", "re:": "regex", "glob:": "glob"}
+
+
+@dataclass(frozen=True)
+class Selector:
+    """
+    Điều kiện chọn cửa sổ
+
+    `process` và `window_class` so sánh không phân biệt hoa thường với tên
+    file thực thi (vd: "chrome.exe") và lớp cửa sổ (vd: "Chrome_WidgetWin_1").
+    """
+    pattern: str
+    mode: str = "substring"
+    case_sensitive: bool = False
+    process: Optional[str] = None
+    window_class: Optional[str] = None
+
+    @classmethod
+    def parse(cls, text: str, **criteria) -> "Selector":
+        """Bộ chọn từ pattern dạng chuỗi (kiểu khớp theo tiền tố, xem đầu module)"""
+        for prefix, mode in _PREFIXES.items():
+            if text.startswith(prefix):
+                return cls(text[len(prefix):], mode, **criteria)
+        return cls(text, **criteria)
+
+    def compile(self) -> "CompiledSelector":
+        return CompiledSelector(self)
+
+
+def _title_test(selector: Selector) -> Callable[[str], bool]:
+    flags = 0 if selector.case_sensitive else re.IGNORECASE
+    pattern = selector.pattern
+    if selector.mode == "regex":
+        return re.compile(pattern, flags).search
+    if selector.mode == "glob":
+        return re.compile(fnmatch.translate(pattern), flags).match
+    if selector.mode == "exact":
+        if selector.case_sensitive:
+            return pattern.__eq__
+        folded = pattern.casefold()
+        return lambda title: title.casefold() == folded
+    if selector.mode == "substring":
+        if selector.case_sensitive:
+            return lambda title: pattern in title
+        lowered = pattern.lower()
+        return lambda title: lowered in title.lower()
+    raise ValueError(f"Kiểu khớp không hợp lệ: {selector.mode} (chọn {', '.join(MATCH_MODES)})")
+
+
+def _criteria_test(selector: Selector) -> Optional[Callable]:
+    """Kiểm tra tiến trình/lớp cửa sổ, None nếu bộ chọn không có điều kiện này"""
+    process = selector.process.lower() if selector.process else None
+    window_class = selector.window_class.lower() if selector.window_class else None
+    if process is None and window_class is None:
+        return None
+
+    def test(window, backend) -> bool:
+        if backend is None:
+            return False
+        if process is not None and (backend.process_name(window) or "").lower() != process:
+            return False
+        if window_class is not None and (backend.window_class(window) or "").lower() != window_class:
+            return False
+        return True
+    return test
+
+
+class CompiledSelector:
+    """Bộ chọn đã biên dịch kèm bộ nhớ kết quả theo handle"""
+
+    def __init__(self, selector: Selector):
+        self.selector = selector
+        self._test = _title_test(selector)
+        self._criteria = _criteria_test(selector)
+        self._cache: Dict[object, Tuple[str, bool]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def matches(self, window, backend=None) -> bool:
+        """Cửa sổ có khớp không (không xét `visible`)"""
+        handle = window_handle(window)
+        title = window.title
+        cached = self._cache.get(handle)
+        if cached is not None and cached[0] == title:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        result = self.evaluate(window, title, backend)
+        self._cache[handle] = (title, result)
+        return result
+
+    def evaluate(self, window, title: str, backend=None) -> bool:
+        """Tính kết quả khớp, không dùng bộ nhớ"""
+        return bool(self._test(title)) and (self._criteria is None or self._criteria(window, backend))
+
+    def select(self, windows: Sequence, backend=None) -> List:
+        """Các cửa sổ đang hiển thị và khớp bộ chọn"""
+        selected = [w for w in windows if self.matches(w, backend) and w.visible]
+        _prune(self._cache, windows)
+        return selected
+
+
+class SelectorGroup:
+    """
+    Phân cửa sổ về nhiều bộ chọn trong một lần duyệt
+
+    Với mỗi handle ghi nhớ danh sách tên bộ chọn khớp, nên cửa sổ không đổi
+    tiêu đề chỉ tốn một lần tra dict dù có bao nhiêu bộ chọn.
+    """
+
+    def __init__(self, selectors: Dict[str, CompiledSelector]):
+        self.selectors = dict(selectors)
+        self._cache: Dict[object, Tuple[str, Tuple[str, ...]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def group(self, windows: Sequence, names: Sequence[str], backend=None) -> Dict[str, List]:
+        """Các cửa sổ đang hiển thị khớp từng bộ chọn trong `names`"""
+        groups: Dict[str, List] = {name: [] for name in names}
+        selectors = self.selectors.items()
+        cache = self._cache
+        for window in windows:
+            handle = window_handle(window)
+            title = window.title
+            cached = cache.get(handle)
+            if cached is not None and cached[0] == title:
+                self.hits += 1
+                matched = cached[1]
+            else:
+                self.misses += 1
+                matched = tuple(name for name, s in selectors if s.evaluate(window, title, backend))
+                cache[handle] = (title, matched)
+            if matched and window.visible:
+                for name in matched:
+                    group = groups.get(name)
+                    if group is not None:
+                        group.append(window)
+        _prune(cache, windows)
+        return groups
+
+
+def _prune(cache: Dict, windows: Sequence):
+    """Bỏ kết quả của các cửa sổ đã đóng khi bộ nhớ lớn hơn nhiều so với số cửa sổ"""
+    if len(cache) > 2 * len(windows) + 64:
+        alive = {window_handle(w) for w in windows}
+        for handle in [h for h in cache if h not in alive]:
+            del cache[handle]
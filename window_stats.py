@@ -0,0 +1,189 @@
+"""
+Đo đạc vòng lặp giám sát
+Thời gian từng pha (liệt kê, lọc tiêu đề, phát hiện lệch, sửa), bộ đếm và
+histogram độ lệch của cửa sổ; xuất ra dict hoặc định dạng text của Prometheus
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+PHASES = ("enumerate", "match", "drift", "correct")
+DRIFT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)  # pixel
+
+DEFAULT_METRICS_FILE = "window_manager.prom"
+
+
+class MonitorStats:
+    """
+    Thống kê của vòng lặp giám sát
+
+    Khi `enabled` là False, nơi gọi bỏ qua toàn bộ việc đo (chỉ một phép
+    kiểm tra thuộc tính) nên chi phí gần như bằng không.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.export_path: Optional[str] = None
+        self.export_period = 15.0
+        self._last_export = 0.0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.ticks = 0
+            self.corrections = 0
+            self.windows_moved = 0
+            self.windows_skipped = 0
+            self.failed_moves = 0
+            self.timed_out_moves = 0
+            self.unconverged_moves = 0
+            self.oscillations = 0
+            self.phase_count = {p: 0 for p in PHASES}
+            self.phase_total = {p: 0.0 for p in PHASES}
+            self.phase_max = {p: 0.0 for p in PHASES}
+            self.drift_buckets = [0] * (len(DRIFT_BUCKETS) + 1)
+            self.drift_sum = 0
+            self.drift_count = 0
+
+    def add_time(self, phase: str, seconds: float):
+        """Ghi nhận thời gian một pha"""
+        self.phase_count[phase] += 1
+        self.phase_total[phase] += seconds
+        if seconds > self.phase_max[phase]:
+            self.phase_max[phase] = seconds
+
+    def add_drift(self, pixels: int):
+        """Ghi nhận độ lệch (pixel, thành phần lớn nhất) của một cửa sổ so với slot"""
+        for i, bound in enumerate(DRIFT_BUCKETS):
+            if pixels <= bound:
+                break
+        else:
+            i = len(DRIFT_BUCKETS)
+        self.drift_buckets[i] += 1
+        self.drift_sum += pixels
+        self.drift_count += 1
+
+    def add_correction(self, result):
+        """Ghi nhận một lần sửa (ApplyResult)"""
+        self.corrections += 1
+        self.windows_moved += len(result.applied)
+        self.windows_skipped += len(result.skipped)
+        self.failed_moves += len(result.failed)
+        self.timed_out_moves += len(result.timed_out)
+        self.unconverged_moves += len(result.unconverged)
+
+    def snapshot(self) -> Dict:
+        """Bản chụp thống kê dạng dict"""
+        with self._lock:
+            phases = {}
+            for p in PHASES:
+                count = self.phase_count[p]
+                phases[p] = {
+                    "count": count,
+                    "total_ms": self.phase_total[p] * 1000,
+                    "avg_ms": self.phase_total[p] * 1000 / count if count else 0.0,
+                    "max_ms": self.phase_max[p] * 1000,
+                }
+            buckets = {}
+            for bound, value in zip(list(DRIFT_BUCKETS) + ["+Inf"], self.drift_buckets):
+                buckets[str(bound)] = value
+            return {
+                "enabled": self.enabled,
+                "uptime_s": time.time() - self.started,
+                "ticks": self.ticks,
+                "corrections": self.corrections,
+                "windows_moved": self.windows_moved,
+                "windows_skipped": self.windows_skipped,
+                "failed_moves": self.failed_moves,
+                "timed_out_moves": self.timed_out_moves,
+                "unconverged_moves": self.unconverged_moves,
+                "oscillations": self.oscillations,
+                "phases": phases,
+                "drift_histogram": buckets,
+                "drift_avg_px": self.drift_sum / self.drift_count if self.drift_count else 0.0,
+            }
+
+    def to_prometheus(self) -> str:
+        """Xuất thống kê theo định dạng text của Prometheus"""
+        snap = self.snapshot()
+        lines = []
+
+        def counter(name, help_text, value):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+        counter("window_manager_ticks_total", "Monitor ticks", snap["ticks"])
+        counter("window_manager_corrections_total", "Ticks that issued a correction", snap["corrections"])
+        counter("window_manager_windows_moved_total", "Windows moved back to their slot", snap["windows_moved"])
+        counter("window_manager_windows_skipped_total", "Windows skipped as already in place",
+                snap["windows_skipped"])
+        counter("window_manager_failed_moves_total", "Failed window moves", snap["failed_moves"])
+        counter("window_manager_timed_out_moves_total", "Window moves that hit the per-window deadline",
+                snap["timed_out_moves"])
+        counter("window_manager_unconverged_moves_total",
+                "Window moves that did not hold when read back", snap["unconverged_moves"])
+        counter("window_manager_oscillations_total",
+                "Windows temporarily exempted for fighting corrections", snap["oscillations"])
+
+        lines.append("# HELP window_manager_phase_seconds Time spent per monitor phase")
+        lines.append("# TYPE window_manager_phase_seconds summary")
+        for p in PHASES:
+            lines.append(f'window_manager_phase_seconds_sum{{phase="{p}"}} {self.phase_total[p]:.6f}')
+            lines.append(f'window_manager_phase_seconds_count{{phase="{p}"}} {self.phase_count[p]}')
+
+        lines.append("# HELP window_manager_drift_pixels Window drift from its slot")
+        lines.append("# TYPE window_manager_drift_pixels histogram")
+        cumulative = 0
+        for bound, value in snap["drift_histogram"].items():
+            cumulative += value
+            lines.append(f'window_manager_drift_pixels_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"window_manager_drift_pixels_sum {self.drift_sum}")
+        lines.append(f"window_manager_drift_pixels_count {self.drift_count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Ghi file Prometheus (ghi file tạm rồi đổi tên để không bao giờ đọc phải file dở)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def maybe_export(self):
+        """Ghi lại file Prometheus nếu đã bật và đến hạn"""
+        if self.export_path is None:
+            return
+        now = time.monotonic()
+        if now - self._last_export < self.export_period:
+            return
+        self._last_export = now
+        try:
+            self.write_prometheus(self.export_path)
+        except Exception as e:
+            print(f"✗ Lỗi khi ghi file thống kê: {e}")
+
+
+def format_stats(snap: Dict) -> str:
+    """Định dạng bản chụp thống kê để in ra màn hình"""
+    lines = [
+        f"Lượt kiểm tra: {snap['ticks']}  |  Lần sửa: {snap['corrections']}  |  "
+        f"Tab đã di chuyển: {snap['windows_moved']}  |  Lỗi di chuyển: {snap['failed_moves']}  |  "
+        f"Quá hạn: {snap['timed_out_moves']}",
+        f"Không giữ vị trí: {snap['unconverged_moves']}  |  Dao động: {snap['oscillations']}",
+    ]
+    for phase, p in snap["phases"].items():
+        lines.append(f"  {phase:<10} {p['count']:>7} lần  TB {p['avg_ms']:8.3f} ms  max {p['max_ms']:8.3f} ms")
+    hist = "  ".join(f"≤{k}:{v}" for k, v in snap["drift_histogram"].items() if v)
+    lines.append(f"  Độ lệch TB: {snap['drift_avg_px']:.1f}px  {hist}")
+    return "\n".join(lines)
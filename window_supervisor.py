@@ -0,0 +1,225 @@
+"""
+Giám sát nhiều pattern trong một vòng lặp duy nhất
+Mỗi lượt chỉ liệt kê cửa sổ một lần rồi chia về các pattern trong một lần duyệt,
+nên chi phí liệt kê không tăng theo số pattern. Độ lệch của các pattern không
+có cửa sổ mở/đóng được tính chung trong một lần trên layout dạng cột, và chỉ
+các cửa sổ lệch mới được đưa vào kiểm tra đầy đủ
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from layout_columns import Drift, DriftFrame
+from window_backends import window_handle
+from window_selectors import SelectorGroup
+
+
+@dataclass
+class PatternSettings:
+    """Cấu hình giám sát riêng cho một pattern"""
+    interval: float = 2.0
+    tolerance: int = 10
+
+
+@dataclass
+class _PatternState:
+    settings: PatternSettings
+    next_due: float = 0.0
+    state: Dict = field(default_factory=lambda: {"last_count": 0})
+
+
+class MonitorSupervisor:
+    """
+    Giám sát nhiều pattern của một WindowManager bằng một thread
+
+    Mỗi pattern có interval/tolerance riêng. Ở mỗi lượt, các pattern đến hạn
+    dùng chung một snapshot cửa sổ.
+    """
+
+    def __init__(self, manager, patterns: Optional[Iterable[str]] = None,
+                 settings: Optional[Dict[str, PatternSettings]] = None,
+                 default: Optional[PatternSettings] = None):
+        """
+        Args:
+            manager: WindowManager dùng để kiểm tra/sắp xếp
+            patterns: Các pattern cần giám sát. None = tất cả pattern trong windows_data
+            settings: Cấu hình riêng cho từng pattern
+            default: Cấu hình cho các pattern không có trong `settings`
+        """
+        self.manager = manager
+        self.default = default or PatternSettings()
+        self.settings = settings or {}
+        # Giám sát tất cả: pattern mới được capture (kể cả từ tiến trình khác) tự được thêm vào
+        self.follow_all = patterns is None
+        if patterns is None:
+            patterns = list(manager.windows_data.keys())
+        self.patterns: Dict[str, _PatternState] = {
+            p: _PatternState(settings=self.settings.get(p, self.default)) for p in patterns
+        }
+        self.thread: Optional[threading.Thread] = None
+        # Mỗi lần start có Event dừng riêng; start/stop được thực hiện lần lượt
+        self._stop = threading.Event()
+        self._stop.set()
+        self._lifecycle_lock = threading.Lock()
+        self.ticks = 0
+        self.enumerations = 0
+        self._selector_group: Optional[SelectorGroup] = None
+        self._frame: Optional[DriftFrame] = None  # Khung độ lệch dùng chung cho mọi pattern
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def add_pattern(self, pattern: str, settings: Optional[PatternSettings] = None):
+        """Thêm (hoặc cập nhật cấu hình) một pattern, có thể gọi khi đang chạy"""
+        if settings is not None:
+            self.settings[pattern] = settings
+        self.patterns[pattern] = _PatternState(settings=self.settings.get(pattern, self.default))
+
+    def remove_pattern(self, pattern: str):
+        """Ngừng giám sát một pattern, có thể gọi khi đang chạy"""
+        self.patterns.pop(pattern, None)
+
+    def group_windows(self, all_windows: List, patterns: Iterable[str]) -> Dict[str, List]:
+        """
+        Chia snapshot cửa sổ về các pattern trong một lần duyệt
+
+        Kết quả khớp được nhớ theo handle nên chỉ cửa sổ đổi tiêu đề mới phải
+        so lại với các bộ chọn, `visible` chỉ được đọc khi khớp ít nhất một pattern.
+        """
+        patterns = list(patterns)
+        # Bộ chọn của mọi pattern đang giám sát, dựng lại khi pattern/bộ chọn thay đổi
+        selectors = {p: self.manager.selector(p) for p in self.patterns}
+        for p in patterns:
+            if p not in selectors:
+                selectors[p] = self.manager.selector(p)
+        if self._selector_group is None or self._selector_group.selectors != selectors:
+            self._selector_group = SelectorGroup(selectors)
+        return self._selector_group.group(all_windows, patterns, self.manager.backend)
+
+    def tick(self, now: Optional[float] = None) -> List[str]:
+        """
+        Chạy một lượt cho các pattern đến hạn. Trả về danh sách pattern đã kiểm tra
+        """
+        if now is None:
+            now = time.monotonic()
+        if self.manager.reload_if_changed() and self.follow_all:
+            for p in self.manager.windows_data:
+                if p not in self.patterns:
+                    self.patterns[p] = _PatternState(settings=self.settings.get(p, self.default))
+        # Sao chép: pattern có thể được thêm/bớt từ thread khác (vd: daemon)
+        patterns = dict(self.patterns)
+        due = [p for p, ps in patterns.items() if ps.next_due <= now]
+        if not due:
+            return []
+
+        metrics = self.manager.metrics if self.manager.metrics.enabled else None
+        start = time.perf_counter() if metrics else 0.0
+        all_windows = self.manager.backend.get_all_windows()
+        self.enumerations += 1
+        if metrics:
+            middle = time.perf_counter()
+            metrics.add_time("enumerate", middle - start)
+        groups = self.group_windows(all_windows, due)
+        if metrics:
+            metrics.add_time("match", time.perf_counter() - middle)
+
+        drifts = self._precomputed_drift(due, patterns, groups, metrics)
+        for pattern in due:
+            ps = patterns[pattern]
+            drift = drifts.get(pattern)
+            if drift != []:  # Không có cửa sổ lệch: bỏ qua kiểm tra đầy đủ
+                try:
+                    self.manager._check_windows(pattern, ps.settings.tolerance, ps.state, groups[pattern],
+                                                drift=drift)
+                except Exception as e:
+                    print(f"✗ Lỗi khi giám sát '{pattern}': {e}")
+            ps.next_due = now + ps.settings.interval
+        self.ticks += 1
+        self.manager.metrics.maybe_export()
+        return due
+
+    def _precomputed_drift(self, due: List[str], patterns: Dict[str, _PatternState],
+                           groups: Dict[str, List], metrics) -> Dict[str, List[Drift]]:
+        """
+        Độ lệch của các pattern có cùng tập cửa sổ như lần trước và đang dùng
+        layout đã capture, tính chung trong một lần gọi `DriftFrame.drift`
+
+        Khung được dùng chung cho mọi pattern và giữ qua các lượt (cả trong
+        `_check_windows` của các pattern còn lại), nên chỉ cửa sổ đã đổi hình
+        học mới phải tính lại. Pattern không có trong kết quả (cửa sổ mở/đóng,
+        lưới tự sinh) tự tính độ lệch khi kiểm tra đầy đủ.
+        """
+        manager = self.manager
+        layout = manager.layout  # Một bản chụp cho cả lượt
+        frame = self._frame
+        observed = []
+        for pattern in due:
+            ps = patterns[pattern]
+            tracker = ps.state.get("tracker")
+            if tracker is None or pattern not in layout.windows:
+                continue
+            if ps.state.get("layout") is not manager._saved_layout(pattern, layout)[0]:
+                continue  # Đang dùng lưới tự sinh
+            if frame is None or frame.layout is not layout.columns:
+                frame = self._frame = layout.columns.frame()
+            ps.state["frame"] = frame
+            rects = {window_handle(w): (w.left, w.top, w.width, w.height) for w in groups[pattern]}
+            if rects.keys() != tracker.assigned.keys():
+                continue
+            frame.put(pattern, list(map(rects.get, tracker.by_slot())), ps.settings.tolerance)
+            observed.append(pattern)
+        if not observed:
+            return {}
+
+        start = time.perf_counter() if metrics else 0.0
+        magnitudes: Dict[str, List[int]] = {}
+        drifts: Dict[str, List[Drift]] = {pattern: [] for pattern in observed}
+        for drift in frame.drift(magnitudes if metrics else None):
+            drifts[drift.pattern].append(drift)
+        if metrics:
+            metrics.add_time("drift", time.perf_counter() - start)
+            # Pattern có cửa sổ lệch được đếm lượt trong lần kiểm tra đầy đủ
+            metrics.ticks += sum(1 for drift in drifts.values() if not drift)
+            for sizes in magnitudes.values():
+                for size in sizes:
+                    metrics.add_drift(size)
+        return drifts
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Vòng lặp giám sát, chạy đến khi `stop()` được gọi"""
+        stop = stop or self._stop
+        names = ", ".join(f"'{p}'" for p in self.patterns)
+        print(f"\n🔍 Bắt đầu giám sát {len(self.patterns)} pattern: {names}")
+        while not stop.is_set():
+            self.tick()
+            states = list(self.patterns.values())
+            if not states:
+                stop.wait(self.default.interval)
+                continue
+            next_due = min(ps.next_due for ps in states)
+            stop.wait(max(next_due - time.monotonic(), 0.01))
+
+    def start(self):
+        """Bắt đầu giám sát trong thread riêng"""
+        with self._lifecycle_lock:
+            if self.running:
+                print("⚠ Đang giám sát rồi!")
+                return
+            stop = threading.Event()
+            self._stop = stop
+            self.thread = threading.Thread(target=self.run, args=(stop,), daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Dừng giám sát (có tác dụng ngay, không đợi hết khoảng quét)"""
+        with self._lifecycle_lock:
+            if not self.running:
+                return
+            self._stop.set()
+            thread = self.thread
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+            print("\n✓ Đã dừng giám sát tất cả pattern")
@@ -0,0 +1,202 @@
+"""
+Sinh lưới slot cho số cửa sổ bất kỳ từ một mẫu (template)
+Dùng khi số cửa sổ vượt số slot đã capture: không cần capture lại, layout
+cho mỗi cặp (mẫu, số cửa sổ) chỉ được tính một lần
+"""
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from window_layout import Rect
+
+
+@dataclass(frozen=True)
+class TilingTemplate:
+    """
+    Mẫu lưới slot
+
+    `columns`/`rows` bằng 0 nghĩa là tự chọn sao cho mỗi ô lớn nhất có thể
+    với tỉ lệ `aspect_ratio`. `overlap` là số pixel các ô liền kề chồng lên
+    nhau (viền vô hình của Windows thường khoảng 8px, số âm để chừa khe hở).
+    """
+    work_area: Rect = (0, 0, 1920, 1080)  # (x, y, width, height) vùng làm việc của màn hình
+    columns: int = 0
+    rows: int = 0
+    aspect_ratio: float = 0.0  # width / height của mỗi ô, 0 = lấp đầy ô lưới
+    margin: int = 0
+    overlap: int = 8
+
+    @classmethod
+    def from_slots(cls, slots: Sequence[Rect], overlap: int = 8) -> "TilingTemplate":
+        """
+        Suy ra mẫu từ layout đã capture: vùng làm việc là khung bao các slot,
+        tỉ lệ và độ chồng lấy từ kích thước và khoảng cách giữa các slot
+        """
+        if not slots:
+            return cls(overlap=overlap)
+        left = min(x for x, _, _, _ in slots)
+        top = min(y for _, y, _, _ in slots)
+        right = max(x + w for x, _, w, _ in slots)
+        bottom = max(y + h for _, y, _, h in slots)
+        width = _median([w for _, _, w, _ in slots])
+        height = _median([h for _, _, _, h in slots])
+
+        # Khoảng cách giữa các cột/hàng liền kề (bỏ qua lệch vài pixel trong cùng một cột/hàng)
+        overlaps = []
+        for starts, size in (([x for x, _, _, _ in slots], width), ([y for _, y, _, _ in slots], height)):
+            starts = sorted(starts)
+            steps = [b - a for a, b in zip(starts, starts[1:]) if b - a > size / 2]
+            if steps:
+                overlaps.append(size - _median(steps))
+        if overlaps:
+            overlap = int(round(sum(overlaps) / len(overlaps)))
+
+        return cls(
+            work_area=(left, top, right - left, bottom - top),
+            aspect_ratio=width / height if height else 0.0,
+            overlap=overlap,
+        )
+
+
+def _median(values: Sequence[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def _grid_shape(template: TilingTemplate, count: int, width: float, height: float) -> Tuple[int, int]:
+    """Chọn (số cột, số hàng) đủ chứa `count` ô"""
+    if template.columns and template.rows and template.columns * template.rows >= count:
+        return template.columns, template.rows
+    if template.columns:
+        return template.columns, math.ceil(count / template.columns)
+    if template.rows:
+        return math.ceil(count / template.rows), template.rows
+
+    # Tự chọn: ô lớn nhất với tỉ lệ mục tiêu, hòa thì ít ô trống hơn
+    target = template.aspect_ratio or width / height
+    best = None
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        cell_w = (width + (columns - 1) * template.overlap) / columns
+        cell_h = (height + (rows - 1) * template.overlap) / rows
+        tile_w = min(cell_w, cell_h * target)
+        score = (tile_w * tile_w / target, -(columns * rows - count))
+        if best is None or score > best[0]:
+            best = (score, columns, rows)
+    return best[1], best[2]
+
+
+def generate_tiling(template: TilingTemplate, count: int) -> List[Rect]:
+    """
+    Sinh `count` slot theo mẫu, sắp xếp theo (x, y) như khi capture
+    """
+    if count <= 0:
+        return []
+    ax, ay, aw, ah = template.work_area
+    width = aw - 2 * template.margin
+    height = ah - 2 * template.margin
+    if width <= 0 or height <= 0:
+        raise ValueError("Vùng làm việc nhỏ hơn lề")
+
+    columns, rows = _grid_shape(template, count, width, height)
+    cell_w = (width + (columns - 1) * template.overlap) / columns
+    cell_h = (height + (rows - 1) * template.overlap) / rows
+    tile_w, tile_h = cell_w, cell_h
+    if template.aspect_ratio:
+        tile_w = min(cell_w, cell_h * template.aspect_ratio)
+        tile_h = tile_w / template.aspect_ratio
+    if tile_w < 1 or tile_h < 1 or tile_w <= template.overlap or tile_h <= template.overlap:
+        raise ValueError(f"Không đủ chỗ cho {count} cửa sổ trong vùng làm việc")
+
+    # Các ô liền kề nhau theo kích thước ô thật; lưới nhỏ hơn vùng làm việc (do tỉ lệ) được căn giữa
+    step_x = tile_w - template.overlap
+    step_y = tile_h - template.overlap
+    left = ax + template.margin + (width - (columns * step_x + template.overlap)) / 2
+    top = ay + template.margin + (height - (rows * step_y + template.overlap)) / 2
+
+    slots = []
+    for i in range(count):
+        row, column = divmod(i, columns)
+        slots.append((
+            int(round(left + column * step_x)),
+            int(round(top + row * step_y)),
+            int(round(tile_w)),
+            int(round(tile_h)),
+        ))
+    slots.sort(key=lambda s: (s[0], s[1]))
+    return slots
+
+
+class TilingCache:
+    """Ghi nhớ (LRU) layout đã sinh theo (mẫu, số cửa sổ)"""
+
+    def __init__(self, cache_size: int = 128):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[Tuple[TilingTemplate, int], List[Rect]]" = OrderedDict()
+
+    def generate(self, template: TilingTemplate, count: int) -> List[Rect]:
+        """
+        Layout cho `count` cửa sổ. Lần gọi lặp lại trả về đúng list cũ (không
+        tính lại), nên nơi gọi có thể so sánh bằng `is` để biết layout đổi
+        """
+        key = (template, count)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        slots = generate_tiling(template, count)
+        self._cache[key] = slots
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return slots
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _option(options, key: str, convert, default):
+    """Giá trị tùy chọn `--key`, lỗi rõ ràng nếu thiếu giá trị hoặc sai kiểu"""
+    value = options.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"--{key} cần một giá trị")
+    try:
+        return convert(value)
+    except ValueError:
+        raise ValueError(f"--{key} không hợp lệ: {value}") from None
+
+
+def _work_area(value: str) -> Rect:
+    parts = [int(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError
+    return tuple(parts)
+
+
+def parse_template(options, base: Optional[TilingTemplate] = None) -> TilingTemplate:
+    """
+    Tạo mẫu từ tùy chọn dòng lệnh (--columns, --rows, --aspect, --margin,
+    --overlap, --work-area x,y,w,h); tùy chọn không có lấy từ `base`.
+    Raise ValueError nếu một tùy chọn thiếu giá trị hoặc giá trị không hợp lệ
+    """
+    base = base or TilingTemplate()
+    try:
+        work_area = _option(options, "work-area", _work_area, base.work_area)
+    except ValueError:
+        raise ValueError("--work-area cần dạng x,y,width,height") from None
+    return TilingTemplate(
+        work_area=work_area,
+        columns=_option(options, "columns", int, base.columns),
+        rows=_option(options, "rows", int, base.rows),
+        aspect_ratio=_option(options, "aspect", float, base.aspect_ratio),
+        margin=_option(options, "margin", int, base.margin),
+        overlap=_option(options, "overlap", int, base.overlap),
+    )
@@ -0,0 +1,340 @@
+"""
+Ghi lại và phát lại hình học cửa sổ
+`record` lấy mẫu vị trí/kích thước và các lần cửa sổ xuất hiện/biến mất vào
+một file trace nhị phân; `replay` đưa trace đó vào `monitor_windows` qua
+backend giả lập với đồng hồ giả lập, để thử sai số, khoảng quét và cách sửa
+trên phiên thật mà không cần desktop
+
+Định dạng file (little-endian, chỉ ghi nối thêm):
+    Header  <8sHHdd>  magic, phiên bản, kích thước bản ghi, thời điểm bắt đầu (epoch), khoảng lấy mẫu
+    Bản ghi <dQB3x16s> thời gian từ lúc bắt đầu (s), handle, loại, 16 byte dữ liệu
+        APPEAR/MOVE: 4 số int32 (x, y, width, height)
+        TITLE: 16 byte UTF-8 của tiêu đề, nối tiếp ngay sau APPEAR của cùng handle
+        DISAPPEAR: bỏ trống
+        END: bỏ trống, đánh dấu lúc dừng ghi (để trace bao cả khoảng đứng yên cuối)
+"""
+
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from window_backends import SimulatedBackend, _spend, window_handle
+from window_layout import Rect
+
+MAGIC = b"WMTRACE\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHdd")
+RECORD = struct.Struct("<dQB3x16s")
+_RECT = struct.Struct("<iiii")
+
+APPEAR, MOVE, DISAPPEAR, TITLE, END = 1, 2, 3, 4, 5
+_TITLE_CHUNK = 16
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """Một thay đổi của cửa sổ trong trace"""
+    time: float  # Giây kể từ lúc bắt đầu ghi
+    kind: int  # APPEAR, MOVE hoặc DISAPPEAR
+    handle: int
+    rect: Optional[Rect] = None
+    title: str = ""
+
+
+class TraceRecorder:
+    """
+    Ghi nối thêm các thay đổi hình học vào file trace
+
+    Mỗi lần `sample` so với lần trước và chỉ ghi cửa sổ mới, đã đóng hoặc
+    đã đổi hình học. Ghi tiếp vào file đã có thì giữ nguyên header (và mốc
+    thời gian) của nó.
+    """
+
+    def __init__(self, path: str, interval: float = 0.5, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: File trace
+            interval: Khoảng lấy mẫu (giây), ghi vào header để phát lại
+            clock: Hàm lấy thời gian (thay bằng đồng hồ giả lập khi test)
+        """
+        self.path = path
+        self.clock = clock
+        self.records = 0
+        self._last: Dict[int, Rect] = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with TraceReader(path) as trace:
+                self.started, self.interval = trace.started, trace.interval
+                # Các cửa sổ còn mở cuối lần ghi trước, để lần lấy mẫu đầu ghi đúng phần thay đổi
+                for event in trace.events():
+                    if event.kind == DISAPPEAR:
+                        self._last.pop(event.handle, None)
+                    else:
+                        self._last[event.handle] = event.rect
+                end = HEADER.size + len(trace) * RECORD.size
+            self._file = open(path, 'ab')
+            # Bỏ bản ghi cuối bị ghi dở (tiến trình trước bị dừng giữa chừng)
+            self._file.truncate(end)
+        else:
+            self._file = open(path, 'ab')
+            self.started = clock()
+            self.interval = interval
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.started, interval))
+
+    def _write(self, now: float, kind: int, handle: int, payload: bytes = b""):
+        self._file.write(RECORD.pack(now, handle, kind, payload))
+        self.records += 1
+
+    def sample(self, windows: List) -> int:
+        """Ghi các thay đổi của danh sách cửa sổ hiện tại, trả về số bản ghi đã ghi"""
+        now = self.clock() - self.started
+        written = self.records
+        seen = {}
+        for w in windows:
+            handle = window_handle(w)
+            rect = (w.left, w.top, w.width, w.height)
+            seen[handle] = rect
+            previous = self._last.get(handle)
+            if previous is None:
+                self._write(now, APPEAR, handle, _RECT.pack(*rect))
+                title = w.title.encode('utf-8')
+                for i in range(0, len(title), _TITLE_CHUNK):
+                    self._write(now, TITLE, handle, title[i:i + _TITLE_CHUNK])
+            elif previous != rect:
+                self._write(now, MOVE, handle, _RECT.pack(*rect))
+        for handle in self._last.keys() - seen.keys():
+            self._write(now, DISAPPEAR, handle)
+        self._last = seen
+        self._file.flush()
+        return self.records - written
+
+    def close(self):
+        if not self._file.closed:
+            self._write(self.clock() - self.started, END, 0)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(data: bytes) -> Tuple[bytes, int, int, float, float]:
+    if len(data) < HEADER.size:
+        raise ValueError("File trace không hợp lệ (thiếu header)")
+    header = HEADER.unpack_from(data)
+    magic, version, record_size = header[:3]
+    if magic != MAGIC:
+        raise ValueError("Không phải file trace của Window Manager")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"Phiên bản trace không hỗ trợ: {version}")
+    return header
+
+
+class TraceReader:
+    """Đọc file trace qua mmap: bản ghi thứ i nằm ở vị trí cố định, không phải đọc cả file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, self.started, self.interval = _read_header(self._map)
+        # Bản ghi cuối bị ghi dở được bỏ qua
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, i: int) -> Tuple[float, int, int, bytes]:
+        """Bản ghi thô thứ i: (thời gian, handle, loại, dữ liệu)"""
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        now, handle, kind, payload = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+        return now, handle, kind, payload
+
+    @property
+    def duration(self) -> float:
+        return self.record(self._count - 1)[0] if self._count else 0.0
+
+    def events(self) -> Iterator[TraceEvent]:
+        """Các thay đổi theo thứ tự thời gian (tiêu đề đã được ghép vào APPEAR)"""
+        i = 0
+        while i < self._count:
+            now, handle, kind, payload = self.record(i)
+            i += 1
+            if kind == DISAPPEAR:
+                yield TraceEvent(now, kind, handle)
+            elif kind in (APPEAR, MOVE):
+                rect = _RECT.unpack(payload)
+                title = b""
+                while kind == APPEAR and i < self._count:
+                    _, next_handle, next_kind, chunk = self.record(i)
+                    if next_kind != TITLE or next_handle != handle:
+                        break
+                    title += chunk
+                    i += 1
+                yield TraceEvent(now, kind, handle, rect, title.rstrip(b"\0").decode('utf-8', 'replace'))
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_windows(manager, title_pattern: str, path: str, interval: float = 0.5,
+                   duration: Optional[float] = None) -> int:
+    """
+    Ghi trace các cửa sổ khớp pattern cho đến khi hết `duration` giây hoặc Ctrl+C
+    Trả về số bản ghi đã ghi
+    """
+    print(f"⏺ Đang ghi '{title_pattern}' vào {path} (mỗi {interval}s)")
+    deadline = time.monotonic() + duration if duration else None
+    with TraceRecorder(path, interval) as recorder:
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                recorder.sample(manager.get_windows_by_title(title_pattern))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        print(f"✓ Đã ghi {recorder.records} bản ghi")
+        return recorder.records
+
+
+@dataclass
+class ReplayReport:
+    """Kết quả một lần phát lại"""
+    duration: float  # Thời gian của trace (giây)
+    wall_time: float  # Thời gian thực đã chạy (giây)
+    events: int
+    ticks: int
+    corrections: int
+    windows_moved: int
+    failed_moves: int
+    oscillations: int = 0  # Số lần cửa sổ bị tạm miễn sửa vì dao động
+
+    def summary(self) -> str:
+        speedup = self.duration / self.wall_time if self.wall_time else float("inf")
+        return (f"{self.duration:.1f}s trace trong {self.wall_time:.2f}s (x{speedup:.0f}), "
+                f"{self.events} thay đổi, {self.ticks} lượt, {self.corrections} lần sửa, "
+                f"{self.windows_moved} cửa sổ di chuyển, {self.failed_moves} lỗi, "
+                f"{self.oscillations} dao động")
+
+
+class TraceReplay:
+    """
+    Phát lại trace trên SimulatedBackend với đồng hồ giả lập
+
+    `monitor_windows` chạy như bình thường nhưng mỗi lần chờ giữa các lượt
+    chỉ tua đồng hồ và áp dụng các thay đổi đến thời điểm đó, nên kết quả
+    lặp lại được và nhanh hơn thời gian thật nhiều lần.
+    """
+
+    def __init__(self, trace: TraceReader, speed: float = 0.0, call_latency: float = 0.0):
+        """
+        Args:
+            trace: Trace cần phát lại
+            speed: Hệ số tăng tốc so với thời gian thật (0 = nhanh nhất có thể)
+            call_latency: Độ trễ mỗi lệnh di chuyển/resize của backend giả lập (giây)
+        """
+        self.trace = trace
+        self.speed = speed
+        self.backend = SimulatedBackend(call_latency=call_latency)
+        self.now = 0.0
+        self.duration = trace.duration
+        self.applied = 0
+        self._events = trace.events()
+        self._pending: Optional[TraceEvent] = next(self._events, None)
+
+    @property
+    def finished(self) -> bool:
+        return self._pending is None and self.now >= self.duration
+
+    def clock(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        """Tua đồng hồ thêm `seconds` giây và áp dụng các thay đổi đến thời điểm đó"""
+        if self.speed > 0:
+            _spend(seconds / self.speed)
+        self.now += seconds
+        windows = self.backend.windows
+        while self._pending is not None and self._pending.time <= self.now:
+            event = self._pending
+            if event.kind == APPEAR:
+                self.backend.add_window(event.title, *event.rect, handle=event.handle)
+            elif event.kind == MOVE:
+                window = windows.get(event.handle)
+                if window is not None:
+                    window.left, window.top, window.width, window.height = event.rect
+            else:
+                self.backend.close_window(event.handle)
+            self.applied += 1
+            self._pending = next(self._events, None)
+
+    def run(self, manager, title_pattern: str, interval: Optional[float] = None,
+            tolerance: int = 10, scheduler=None) -> ReplayReport:
+        """
+        Chạy `manager.monitor_windows` trên trace cho đến hết trace
+
+        Args:
+            manager: WindowManager có layout đã lưu cho pattern (backend được thay
+                trong lúc phát lại rồi trả lại như cũ)
+            interval: Khoảng quét (giây), mặc định bằng khoảng lấy mẫu của trace
+            scheduler: AdaptiveScheduler (đồng hồ được thay bằng đồng hồ giả lập)
+
+        Lịch sử sửa (phát hiện dao động) của manager cũng dùng đồng hồ giả lập
+        trong lúc phát lại.
+        """
+        if interval is None:
+            interval = self.trace.interval or 2.0
+        backend, manager.backend = manager._backend, self.backend
+        if scheduler is not None:
+            scheduler.clock = self.clock
+        clock, manager.clock = manager.clock, self.clock
+        stats = manager.metrics
+        before = (stats.ticks, stats.corrections, stats.windows_moved, stats.failed_moves, stats.oscillations)
+
+        def sleep(seconds: float):
+            self.advance(seconds)
+            if self.finished:
+                manager.monitoring = False
+
+        start = time.perf_counter()
+        self.advance(0.0)
+        manager.monitoring = True
+        try:
+            manager.monitor_windows(title_pattern, interval, tolerance, scheduler=scheduler, sleep=sleep)
+        finally:
+            manager.monitoring = False
+            manager.backend = backend
+            manager.clock = clock
+        after = (stats.ticks, stats.corrections, stats.windows_moved, stats.failed_moves, stats.oscillations)
+        ticks, corrections, moved, failed, oscillations = (a - b for a, b in zip(after, before))
+        return ReplayReport(
+            duration=self.now,
+            wall_time=time.perf_counter() - start,
+            events=self.applied,
+            ticks=ticks,
+            corrections=corrections,
+            windows_moved=moved,
+            failed_moves=failed,
+            oscillations=oscillations,
+        )
+
+
+def replay_trace(manager, title_pattern: str, path: str, interval: Optional[float] = None,
+                 tolerance: int = 10, speed: float = 0.0, scheduler=None) -> ReplayReport:
+    """Phát lại file trace qua `monitor_windows` của manager (xem `TraceReplay`)"""
+    with TraceReader(path) as trace:
+        print(f"⏵ Phát lại {path}: {len(trace)} bản ghi, {trace.duration:.1f}s")
+        report = TraceReplay(trace, speed=speed).run(manager, title_pattern, interval, tolerance, scheduler)
+    print(f"✓ Phát lại xong: {report.summary()}")
+    return report